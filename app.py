@@ -3,25 +3,44 @@ from datetime import datetime
 
 from dotenv import load_dotenv
 from flask import (
-    Flask, abort, g, render_template, url_for,
+    Flask, Response, abort, g, redirect, render_template, request,
+    stream_with_context, url_for,
 )
 from markupsafe import Markup
 
 load_dotenv()
 
 app = Flask(__name__)
-app.config['TEMPLATES_AUTO_RELOAD'] = True
 
-from blog import find_post, load_posts, normalize_media_path  # noqa: E402
+from blog import get_store as get_post_store  # noqa: E402
+from blog import normalize_media_path, paginate_posts  # noqa: E402
+from blog import post_tags, tag_slug  # noqa: E402
+from blog.snapshot import install_snapshot  # noqa: E402
 from config import SITE_CONFIG  # noqa: E402,F401 (re-exported for freeze.py)
+from config import BLOG_PAGE_SIZE  # noqa: E402
 from config import build_absolute_url, build_page_context  # noqa: E402
+from config import current_site  # noqa: E402
 from content.loader import load_page  # noqa: E402
-from metrics import bar_heights, collect_metrics  # noqa: E402
+import early_hints  # noqa: E402
+import feeds  # noqa: E402
+import instrumentation  # noqa: E402
+import profiler  # noqa: E402
+import serving  # noqa: E402
+import templating  # noqa: E402
+import tenants  # noqa: E402
+from metrics import LEDGER_PATH, bar_heights, collect_metrics  # noqa: E402
+
+
+def load_build_metrics():
+    """Dashboard metrics from the ledger ``freeze.py`` keeps (read-only)."""
+    build_metrics = collect_metrics(ledger_path=LEDGER_PATH)
+    build_metrics['weekly_bars'] = bar_heights(build_metrics['weekly_commits'])
+    return build_metrics
+
 
 # Captured once at startup / freeze time — the static build bakes these
 # values into the HTML, so they are "as of last deploy" by design.
-BUILD_METRICS = collect_metrics()
-BUILD_METRICS['weekly_bars'] = bar_heights(BUILD_METRICS['weekly_commits'])
+BUILD_METRICS = load_build_metrics()
 
 
 def _icon(name, size=16, label=None):
@@ -36,12 +55,26 @@ def _icon(name, size=16, label=None):
 
 
 app.jinja_env.globals['icon'] = _icon
+templating.configure_templates(app)
+instrumentation.init_app(app)
+profiler.init_app(app)
+# Before serving: the shared page map only holds the primary site's pages.
+tenants.init_app(app)
+serving.init_app(app)
+early_hints.init_app(app)
+# Boot from the last build's parsed content; falls back to live parsing.
+install_snapshot()
+
+
+def get_store():
+    """The post store for this request; refreshed at most once per request."""
+    if 'post_store' not in g:
+        g.post_store = tenants.tenant_store() or get_post_store()
+    return g.post_store
 
 
 def get_posts():
-    if 'posts' not in g:
-        g.posts = load_posts()
-    return g.posts
+    return get_store().posts
 
 
 @app.route('/')
@@ -55,18 +88,104 @@ def home():
     )
 
 
-@app.route('/blog/')
-def blog_index():
+def blog_page_href(page, base='/blog/'):
+    return base if page == 1 else f'{base}page/{page}/'
+
+
+def _page_size():
+    site = g.get('site')
+    return site['page_size'] if site else BLOG_PAGE_SIZE
+
+
+def _render_list(posts, page, base, **context):
+    pagination = paginate_posts(posts, page, _page_size())
+    if pagination is None:
+        abort(404)
+    prev_page, next_page = pagination['prev_page'], pagination['next_page']
     return render_template(
         'blog/list.html',
-        **build_page_context(page_slug='blog', posts=get_posts()),
+        **build_page_context(
+            page_slug='blog',
+            posts=pagination['items'],
+            pagination=pagination,
+            prev_href=blog_page_href(prev_page, base) if prev_page else None,
+            next_href=blog_page_href(next_page, base) if next_page else None,
+            **context,
+        ),
         blog_index_href='/blog/',
     )
 
 
+@app.route('/blog/')
+def blog_index():
+    return _render_list(get_posts(), 1, '/blog/')
+
+
+@app.route('/blog/page/<int:page>/')
+def blog_page(page: int):
+    if page == 1:
+        return redirect(url_for('blog_index'), code=301)
+    return _render_list(get_posts(), page, '/blog/')
+
+
+def _render_archive(posts, heading, page, base):
+    if not posts:
+        abort(404)
+    return _render_list(posts, page, base, archive_heading=heading)
+
+
+def _render_tag(tag, page):
+    store = get_store()
+    return _render_archive(
+        store.tag_posts(tag),
+        f'Tagged “{store.tag_labels.get(tag, tag)}”',
+        page,
+        f'/blog/tag/{tag}/',
+    )
+
+
+@app.route('/blog/tag/<tag>/')
+def blog_tag(tag: str):
+    return _render_tag(tag, 1)
+
+
+@app.route('/blog/tag/<tag>/page/<int:page>/')
+def blog_tag_page(tag: str, page: int):
+    if page == 1:
+        return redirect(url_for('blog_tag', tag=tag), code=301)
+    return _render_tag(tag, page)
+
+
+def _render_date_archive(year, month, page):
+    posts = get_store().archive_posts(year, month)
+    heading = (
+        datetime(year, month, 1).strftime('%B %Y')
+        if month and posts else str(year)
+    )
+    base = f'/blog/{year}/{month:02d}/' if month else f'/blog/{year}/'
+    return _render_archive(posts, heading, page, base)
+
+
+@app.route('/blog/<int:year>/')
+@app.route('/blog/<int:year>/<int(fixed_digits=2):month>/')
+def blog_archive(year: int, month=None):
+    return _render_date_archive(year, month, 1)
+
+
+@app.route('/blog/<int:year>/page/<int:page>/')
+@app.route('/blog/<int:year>/<int(fixed_digits=2):month>/page/<int:page>/')
+def blog_archive_page(year: int, page: int, month=None):
+    if page == 1:
+        return redirect(
+            url_for('blog_archive', year=year, month=month), code=301,
+        )
+    return _render_date_archive(year, month, page)
+
+
 @app.route('/blog/<slug>/')
 def blog_detail(slug: str):
-    post = find_post(slug, posts=get_posts())
+    store = get_store()
+    post = store.get(slug)
     if post is None:
         abort(404)
     hero_value, is_external = normalize_media_path(post.get('hero_image'))
@@ -76,9 +195,19 @@ def blog_detail(slug: str):
         hero_url = url_for('static', filename=hero_value)
     else:
         hero_url = None
+    related_posts = [
+        other for other in map(store.get, post.get('related', ()))
+        if other is not None
+    ]
     return render_template(
         'blog/detail.html',
-        **build_page_context(page_slug='blog', post=post, hero_image_url=hero_url),
+        **build_page_context(
+            page_slug='blog',
+            post=post,
+            related_posts=related_posts,
+            hero_image_url=hero_url,
+            tags=[(label, tag_slug(label)) for label in post_tags(post)],
+        ),
     )
 
 
@@ -92,8 +221,16 @@ def about():
 
 @app.route('/sitemap.xml')
 def sitemap():
-    posts = get_posts()
+    store = get_store()
     today = datetime.utcnow().date().isoformat()
+    listings = [
+        (f'/blog/tag/{tag}/', posts) for tag, posts in sorted(store.tags.items())
+    ] + [
+        (f'/blog/{year}/{month:02d}/' if month else f'/blog/{year}/', posts)
+        for (year, month), posts in sorted(
+            store.archive.items(), key=lambda item: (item[0][0], item[0][1] or 0),
+        )
+    ]
     urls = [
         {'loc': build_absolute_url(p), 'lastmod': today, 'changefreq': 'weekly'}
         for p in ['/', '/blog/', '/about/']
@@ -103,7 +240,14 @@ def sitemap():
             'lastmod': post.get('date'),
             'changefreq': 'monthly',
         }
-        for post in posts
+        for post in store.posts
+    ] + [
+        {
+            'loc': build_absolute_url(path),
+            'lastmod': posts[0].get('date'),
+            'changefreq': 'weekly',
+        }
+        for path, posts in listings if posts
     ]
     return (
         render_template('sitemap.xml', urls=urls),
@@ -111,6 +255,32 @@ def sitemap():
     )
 
 
+def _feed_response(kind):
+    posts = get_posts()[:feeds.FEED_SIZE]
+    base_url = build_absolute_url('/').rstrip('/')
+    response = Response(
+        stream_with_context(
+            feeds.generate_feed(kind, posts, base_url, current_site()['config'])
+        ),
+        content_type=feeds.CONTENT_TYPES[kind],
+    )
+    response.set_etag(feeds.feed_etag(kind, posts, base_url))
+    response.last_modified = feeds.last_modified(posts)
+    response.cache_control.public = True
+    response.cache_control.max_age = 900
+    return response.make_conditional(request)
+
+
+@app.route('/feed.xml')
+def atom_feed():
+    return _feed_response('atom')
+
+
+@app.route('/rss.xml')
+def rss_feed():
+    return _feed_response('rss')
+
+
 @app.route('/robots.txt')
 def robots_txt():
     lines = [
@@ -122,8 +292,10 @@ def robots_txt():
 
 
 if __name__ == '__main__':
+    app.debug = os.getenv('FLASK_DEBUG', 'True').lower() == 'true'
+    templating.configure_templates(app)
     app.run(
         host='0.0.0.0',
         port=int(os.getenv('PORT', 5000)),
-        debug=os.getenv('FLASK_DEBUG', 'True').lower() == 'true',
+        debug=app.debug,
     )
@@ -1,5 +1,6 @@
 import os
 
+import templating
 from authoring_app import create_app
 
 
@@ -10,4 +11,6 @@ if __name__ == '__main__':
     host = os.getenv('AUTHORING_HOST', '0.0.0.0')
     port = int(os.getenv('AUTHORING_PORT', '5000'))
     debug = os.getenv('AUTHORING_DEBUG', 'true').lower() == 'true'
+    app.debug = debug
+    templating.configure_templates(app)
     app.run(host=host, port=port, debug=debug)
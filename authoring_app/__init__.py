@@ -5,6 +5,8 @@ from flask import Flask, redirect, url_for
 
 from blog.utils import get_content_dir
 from content.loader import load_toml
+import instrumentation
+import templating
 
 from .views import bp as authoring_bp
 
@@ -60,6 +62,8 @@ def create_app() -> Flask:
     media_dir.mkdir(parents=True, exist_ok=True)
 
     app.register_blueprint(authoring_bp)
+    instrumentation.init_app(app)
+    templating.configure_templates(app)
 
     @app.route('/')
     def root_redirect() -> str:
@@ -0,0 +1,293 @@
+"""Streaming export and bulk import of posts and uploads.
+
+``export_archive`` yields a tar archive of ``posts/*.md`` and ``uploads/*``
+chunk by chunk, optionally gzip- or zstd-compressed (zstd needs the
+``zstandard`` package). Headers are built per file and file bodies are
+copied in ``CHUNK_SIZE`` pieces, so memory use does not grow with the
+archive.
+
+``import_archive`` reads a tar (plain, gzip, bz2, xz or zstd) from a
+stream. Each member is copied in ``CHUNK_SIZE`` pieces to a uniquely named
+temporary file beside its destination, then handed to a small thread pool
+that replaces the destination only if its content differs; at most
+``workers * 2`` members are in flight. A member larger than
+``IMPORT_MAX_MEMBER_BYTES``, or an archive unpacking to more than
+``IMPORT_MAX_BYTES``, stops the import, as does a corrupt or truncated
+archive; all of these raise ``BackupError``. Anything other than a regular
+file directly under ``posts/`` (``.md``) or ``uploads/`` (an allowed media
+extension) is rejected. The post store is refreshed once when the import
+finishes or stops, if anything was written.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import tarfile
+import tempfile
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
+from typing import (
+    IO, Callable, Deque, Dict, Iterable, Iterator, Optional, Tuple,
+)
+
+from werkzeug.utils import secure_filename
+
+from blog.store import get_store
+
+CHUNK_SIZE = 1 << 16
+COMPRESSIONS = ('none', 'gzip', 'zstd')
+EXTENSIONS = {'none': '.tar', 'gzip': '.tar.gz', 'zstd': '.tar.zst'}
+MIMETYPES = {
+    'none': 'application/x-tar',
+    'gzip': 'application/gzip',
+    'zstd': 'application/zstd',
+}
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+IMPORT_WORKERS = 4
+IMPORT_MAX_MEMBER_BYTES = 64 << 20
+IMPORT_MAX_BYTES = 1 << 30
+
+
+class BackupError(ValueError):
+    """An unusable archive or an unavailable compression."""
+
+
+def archive_members(content_dir: Path,
+                    media_dir: Path) -> Iterator[Tuple[str, Path]]:
+    """``(archive name, file)`` for every post and upload, sorted."""
+    for path in sorted(content_dir.glob('*.md')):
+        if path.is_file():
+            yield f'posts/{path.name}', path
+    if media_dir.exists():
+        for path in sorted(media_dir.iterdir()):
+            if path.is_file():
+                yield f'uploads/{path.name}', path
+
+
+def _tar_stream(members: Iterable[Tuple[str, Path]]) -> Iterator[bytes]:
+    for name, path in members:
+        stat = path.stat()
+        info = tarfile.TarInfo(name)
+        info.size = stat.st_size
+        info.mtime = int(stat.st_mtime)
+        info.mode = 0o644
+        yield info.tobuf(format=tarfile.PAX_FORMAT)
+        with path.open('rb') as handle:
+            remaining = info.size
+            while remaining > 0:
+                chunk = handle.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    raise BackupError(f'{path} shrank while exporting')
+                remaining -= len(chunk)
+                yield chunk
+        padding = -info.size % tarfile.BLOCKSIZE
+        if padding:
+            yield tarfile.NUL * padding
+    yield tarfile.NUL * (tarfile.BLOCKSIZE * 2)
+
+
+def _compressor(compression: str) -> Optional[Tuple[Callable, Callable]]:
+    if compression == 'none':
+        return None
+    if compression == 'gzip':
+        gzip = zlib.compressobj(6, zlib.DEFLATED, 31)
+        return gzip.compress, gzip.flush
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise BackupError('zstd compression needs the zstandard package')
+        zstd = zstandard.ZstdCompressor().compressobj()
+        return zstd.compress, zstd.flush
+    raise BackupError(f'unknown compression {compression!r}')
+
+
+def export_archive(content_dir: Path, media_dir: Path,
+                   compression: str = 'gzip') -> Iterator[bytes]:
+    """Yield a (compressed) tar of posts and uploads, chunk by chunk."""
+    compressor = _compressor(compression)
+    stream = _tar_stream(archive_members(content_dir, media_dir))
+    if compressor is None:
+        yield from stream
+        return
+    compress, flush = compressor
+    for chunk in stream:
+        compressed = compress(chunk)
+        if compressed:
+            yield compressed
+    yield flush()
+
+
+class _PeekableStream:
+    """Lets the compression be sniffed without a seekable stream."""
+
+    def __init__(self, stream: IO[bytes]):
+        self._stream = stream
+        self._head = b''
+
+    def peek(self, size: int) -> bytes:
+        while len(self._head) < size:
+            chunk = self._stream.read(size - len(self._head))
+            if not chunk:
+                break
+            self._head += chunk
+        return self._head
+
+    def read(self, size: int = -1) -> bytes:
+        if self._head:
+            if size < 0:
+                data, self._head = self._head + self._stream.read(), b''
+                return data
+            data, self._head = self._head[:size], self._head[size:]
+            if len(data) < size:
+                data += self._stream.read(size - len(data))
+            return data
+        return self._stream.read(size)
+
+
+_READ_ERRORS: Tuple[type, ...] = (tarfile.TarError, EOFError, zlib.error)
+
+
+def _open_tar(stream: IO[bytes]) -> Tuple[tarfile.TarFile, Tuple[type, ...]]:
+    """The archive and the exceptions reading it can raise when corrupt."""
+    errors = _READ_ERRORS
+    stream = _PeekableStream(stream)
+    if stream.peek(4) == ZSTD_MAGIC:
+        try:
+            import zstandard
+        except ImportError:
+            raise BackupError('zstd archives need the zstandard package')
+        stream = zstandard.ZstdDecompressor().stream_reader(stream)
+        errors += (zstandard.ZstdError,)
+    try:
+        return tarfile.open(fileobj=stream, mode='r|*'), errors
+    except errors as exc:
+        raise BackupError(f'not a tar archive: {exc}') from exc
+
+
+def _destination(name: str, content_dir: Path, media_dir: Path,
+                 media_extensions: Iterable[str]) -> Optional[Path]:
+    parts = PurePosixPath(name).parts
+    if len(parts) != 2 or secure_filename(parts[1]) != parts[1]:
+        return None
+    folder, filename = parts
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if folder == 'posts' and extension == 'md':
+        return content_dir / filename
+    if folder == 'uploads' and extension in media_extensions:
+        return media_dir / filename
+    return None
+
+
+def _file_digest(path: Path) -> Optional[str]:
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        with path.open('rb') as handle:
+            for chunk in iter(lambda: handle.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+def _copy_member(source: IO[bytes], destination: Path,
+                 size: int) -> Tuple[Path, str]:
+    """Copy ``size`` bytes to a temporary file beside ``destination``.
+
+    Returns the temporary file and a digest of what was copied.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with tempfile.NamedTemporaryFile(
+        dir=destination.parent, prefix=f'.{destination.name}.',
+        suffix='.part', delete=False,
+    ) as handle:
+        partial = Path(handle.name)
+        try:
+            remaining = size
+            while remaining > 0:
+                chunk = source.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    raise EOFError(f'{destination.name} is truncated')
+                remaining -= len(chunk)
+                digest.update(chunk)
+                handle.write(chunk)
+        except BaseException:
+            handle.close()
+            partial.unlink(missing_ok=True)
+            raise
+    return partial, digest.hexdigest()
+
+
+def _write_member(partial: Path, destination: Path, digest: str,
+                  mtime: float) -> bool:
+    """Move ``partial`` over ``destination`` unless it already holds it.
+
+    True if written.
+    """
+    if _file_digest(destination) == digest:
+        partial.unlink()
+        return False
+    os.utime(partial, (mtime, mtime))
+    partial.replace(destination)
+    return True
+
+
+def import_archive(stream: IO[bytes], content_dir: Path, media_dir: Path,
+                   media_extensions: Iterable[str],
+                   workers: int = IMPORT_WORKERS,
+                   max_member_bytes: int = IMPORT_MAX_MEMBER_BYTES,
+                   max_bytes: int = IMPORT_MAX_BYTES) -> Dict[str, object]:
+    """Extract posts and uploads from ``stream``; return a summary."""
+    media_extensions = set(media_extensions)
+    content_dir.mkdir(parents=True, exist_ok=True)
+    media_dir.mkdir(parents=True, exist_ok=True)
+    summary: Dict[str, object] = {'written': 0, 'skipped': 0, 'rejected': []}
+    pending: Deque[Future] = deque()
+    unpacked = 0
+
+    def settle(future: Future) -> None:
+        key = 'written' if future.result() else 'skipped'
+        summary[key] = int(summary[key]) + 1
+
+    archive, errors = _open_tar(stream)
+    try:
+        with archive, ThreadPoolExecutor(workers) as pool:
+            try:
+                for member in archive:
+                    destination = _destination(
+                        member.name, content_dir, media_dir, media_extensions,
+                    ) if member.isfile() else None
+                    if destination is None:
+                        if not member.isdir():
+                            summary['rejected'].append(member.name)
+                        continue
+                    unpacked += member.size
+                    if member.size > max_member_bytes:
+                        raise BackupError(
+                            f'{member.name} is larger than '
+                            f'{max_member_bytes} bytes'
+                        )
+                    if unpacked > max_bytes:
+                        raise BackupError(
+                            f'archive unpacks to more than {max_bytes} bytes'
+                        )
+                    partial, digest = _copy_member(
+                        archive.extractfile(member), destination, member.size,
+                    )
+                    pending.append(pool.submit(
+                        _write_member, partial, destination, digest,
+                        member.mtime,
+                    ))
+                    while len(pending) >= workers * 2:
+                        settle(pending.popleft())
+            except errors as exc:
+                raise BackupError(f'unreadable archive: {exc}') from exc
+            finally:
+                while pending:
+                    settle(pending.popleft())
+    finally:
+        if summary['written']:
+            get_store(content_dir).refresh(force=True)
+    return summary
@@ -0,0 +1,156 @@
+"""Incremental Markdown rendering for the editor's live preview.
+
+The editor buffer is split into top-level blocks (paragraphs, headings,
+lists, tables, fenced code). Each block is rendered on its own and the
+HTML is cached per authoring session, keyed by a hash of the block text,
+so a keystroke only re-renders the block being edited. Blocks go through
+the same steps as post bodies in the store: the sandbox pool when
+``MARKDOWN_SANDBOX`` is on (see ``blog.rendering``), then code
+highlighting and media attributes.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List
+
+import markdown
+
+from blog.highlight import highlight_code
+from blog.media import process_media
+from blog.rendering import MARKDOWN_EXTENSIONS, get_sandbox, render_markdown
+from blog.utils import strip_leading_metadata_lines
+
+MAX_SESSIONS = 16
+MAX_FRAGMENTS_PER_SESSION = 4096
+
+FENCE_RE = re.compile(r'^(`{3,}|~{3,})')
+LIST_ITEM_RE = re.compile(r'^ {0,3}(?:[-*+]|\d+[.)])\s')
+REFERENCE_RE = re.compile(r'^ {0,3}\[[^\]]+\]:\s*\S', re.MULTILINE)
+
+_local = threading.local()
+_lock = threading.Lock()
+_sessions: 'OrderedDict[str, OrderedDict[str, str]]' = OrderedDict()
+
+
+def split_blocks(text: str) -> List[str]:
+    """Split Markdown into independently renderable top-level blocks.
+
+    Blank lines separate blocks, except inside fenced code, which ends at
+    a line of at least as many of its fence characters and nothing else.
+    Indented lines after a blank line continue the previous block (nested
+    list content), as does a list item after a list (a loose list), so
+    they are rendered in context. A document with reference-style link
+    definitions is one block, since a definition applies to every block.
+    """
+    if REFERENCE_RE.search(text):
+        return [text.strip('\n')] if text.strip() else []
+
+    blocks: List[str] = []
+    current: List[str] = []
+    fence = None
+
+    for line in text.splitlines():
+        stripped = line.lstrip()
+        if fence:
+            current.append(line)
+            closing = stripped.rstrip()
+            if len(closing) >= len(fence) and closing == fence[0] * len(closing):
+                fence = None
+            continue
+        if not stripped:
+            if current:
+                blocks.append('\n'.join(current))
+                current = []
+            continue
+        if not current and blocks and (
+            line[:1] in (' ', '\t')
+            or LIST_ITEM_RE.match(line) and LIST_ITEM_RE.match(blocks[-1])
+        ):
+            current = [blocks.pop(), '']
+        match = FENCE_RE.match(stripped)
+        if match:
+            fence = match.group(1)
+        current.append(line)
+
+    if current:
+        blocks.append('\n'.join(current))
+    return blocks
+
+
+def block_key(block: str) -> str:
+    return hashlib.blake2b(block.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def _converter() -> markdown.Markdown:
+    """Return a reusable Markdown instance for the current thread."""
+    md = getattr(_local, 'markdown', None)
+    if md is None:
+        md = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+        _local.markdown = md
+    return md
+
+
+def render_block(block: str) -> str:
+    sandbox = get_sandbox()
+    if sandbox is not None:
+        html = render_markdown(block, sandbox)
+    else:
+        html = _converter().reset().convert(block)
+    return process_media(highlight_code(html))
+
+
+def _session_cache(session_id: str) -> 'OrderedDict[str, str]':
+    with _lock:
+        cache = _sessions.get(session_id)
+        if cache is None:
+            cache = OrderedDict()
+            _sessions[session_id] = cache
+            while len(_sessions) > MAX_SESSIONS:
+                _sessions.popitem(last=False)
+        else:
+            _sessions.move_to_end(session_id)
+        return cache
+
+
+def render_incremental(
+    session_id: str,
+    text: str,
+    known: Iterable[str] = (),
+) -> Dict[str, object]:
+    """Render ``text`` reusing cached fragments for unchanged blocks.
+
+    Returns the ordered block keys plus HTML for every block whose key is
+    not in ``known`` (the fragments the client already holds).
+    """
+    cache = _session_cache(session_id)
+    known_keys = set(known)
+    body = strip_leading_metadata_lines(text)
+
+    order: List[str] = []
+    fragments: Dict[str, str] = {}
+    rendered = 0
+    for block in split_blocks(body):
+        key = block_key(block)
+        order.append(key)
+        html = cache.get(key)
+        if html is None:
+            html = render_block(block)
+            cache[key] = html
+            rendered += 1
+        else:
+            cache.move_to_end(key)
+        if key not in known_keys:
+            fragments[key] = html
+
+    while len(cache) > MAX_FRAGMENTS_PER_SESSION:
+        cache.popitem(last=False)
+
+    return {'blocks': order, 'fragments': fragments, 'rendered': rendered}
+
+
+def clear_sessions() -> None:
+    with _lock:
+        _sessions.clear()
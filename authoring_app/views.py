@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import secrets
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
@@ -7,12 +8,15 @@ from typing import Dict, List, Optional
 import frontmatter
 from flask import (
     Blueprint,
+    Response,
     current_app,
     flash,
     jsonify,
     redirect,
     render_template,
     request,
+    session,
+    stream_with_context,
     url_for,
 )
 from urllib.parse import urljoin, urlparse
@@ -20,6 +24,17 @@ from werkzeug.utils import secure_filename
 
 from blog.utils import normalize_media_path, parse_post
 from content.loader import message
+from instrumentation import timed
+
+from .backup import (
+    COMPRESSIONS,
+    EXTENSIONS,
+    MIMETYPES,
+    BackupError,
+    export_archive,
+    import_archive,
+)
+from .preview import render_incremental
 
 bp = Blueprint(
     'authoring',
@@ -55,6 +70,7 @@ def is_safe_url(target: str) -> bool:
     )
 
 
+@timed('load_all_posts')
 def load_all_posts() -> List[Dict[str, object]]:
     posts: List[Dict[str, str]] = []
     for path in sorted(get_content_dir().glob('*.md')):
@@ -110,6 +126,7 @@ def load_post(slug: str) -> Optional[frontmatter.Post]:
     return frontmatter.load(path)
 
 
+@timed('save_post')
 def save_post(
     *,
     slug: str,
@@ -163,6 +180,8 @@ def edit_post(slug: Optional[str] = None) -> str:
             errors.append(message('authoring', 'title_required'))
         if not slug_value:
             errors.append(message('authoring', 'slug_required'))
+        elif slug_value.isdigit():
+            errors.append(message('authoring', 'slug_numeric'))
         if not content:
             errors.append(message('authoring', 'content_required'))
 
@@ -246,6 +265,7 @@ def edit_post(slug: Optional[str] = None) -> str:
 
 
 @bp.route('/uploads', methods=['POST'])
+@timed('upload_media')
 def upload_media() -> str:
     next_url = request.form.get('next') or url_for('authoring.dashboard')
     if not is_safe_url(next_url):
@@ -320,6 +340,23 @@ def preview_post(slug: str) -> str:
     )
 
 
+@bp.route('/preview', methods=['POST'])
+def live_preview():
+    """Render the editor buffer, returning only blocks the client lacks."""
+    payload = request.get_json(silent=True) or {}
+    content = payload.get('content')
+    if content is None:
+        content = request.form.get('content', '')
+    known = payload.get('known') or []
+
+    session_id = session.get('preview_id')
+    if session_id is None:
+        session_id = secrets.token_hex(8)
+        session['preview_id'] = session_id
+
+    return jsonify(render_incremental(session_id, str(content), known))
+
+
 @bp.route('/uploads/list')
 def list_uploads():
     image_exts = {'png', 'jpg', 'jpeg', 'gif', 'webp', 'svg'}
@@ -337,6 +374,62 @@ def list_uploads():
     return jsonify(files)
 
 
+@bp.route('/export')
+def export_content():
+    """Stream a tar of every post and upload."""
+    compression = request.args.get('compression', 'gzip')
+    if compression not in COMPRESSIONS:
+        return jsonify(
+            error=message('authoring', 'export_bad_compression',
+                          compression=compression),
+        ), 400
+    try:
+        chunks = export_archive(
+            get_content_dir(), get_media_dir(), compression,
+        )
+        first = next(chunks)
+    except BackupError as exc:
+        return jsonify(error=str(exc)), 400
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+
+    def stream():
+        yield first
+        yield from chunks
+
+    response = Response(
+        stream_with_context(stream()), mimetype=MIMETYPES[compression],
+    )
+    response.headers['Content-Disposition'] = (
+        f'attachment; filename="content-{stamp}{EXTENSIONS[compression]}"'
+    )
+    return response
+
+
+@bp.route('/import', methods=['POST'])
+@timed('import_content')
+def import_content():
+    """Restore posts and uploads from a tar in the body or ``archive`` field."""
+    upload = request.files.get('archive')
+    stream = upload.stream if upload else request.stream
+    try:
+        summary = import_archive(
+            stream,
+            get_content_dir(),
+            get_media_dir(),
+            allowed_media_extensions(),
+        )
+    except BackupError as exc:
+        if upload:
+            flash(message('authoring', 'import_failed', error=exc), 'error')
+            return redirect(url_for('authoring.dashboard'))
+        return jsonify(error=str(exc)), 400
+    if upload:
+        flash(message('authoring', 'imported', **summary,
+                      rejected_count=len(summary['rejected'])), 'success')
+        return redirect(url_for('authoring.dashboard'))
+    return jsonify(summary)
+
+
 @bp.route('/posts/<slug>/delete', methods=['POST'])
 def delete_post(slug: str) -> str:
     path = get_content_dir() / f'{slug}.md'
@@ -0,0 +1,61 @@
+"""Export or restore the authoring content from the command line.
+
+    python backup.py export content.tar.gz [--compression gzip|zstd|none]
+    python backup.py import content.tar.gz
+
+Uses the same directories as the authoring app (``AUTHORING_CONTENT_DIR``,
+``AUTHORING_MEDIA_DIR``); see ``authoring_app/backup.py``.
+"""
+
+import argparse
+import json
+import sys
+
+from authoring_app import create_app
+from authoring_app.backup import (
+    COMPRESSIONS,
+    BackupError,
+    export_archive,
+    import_archive,
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python backup.py')
+    commands = parser.add_subparsers(dest='command', required=True)
+    export_parser = commands.add_parser('export', help='write an archive')
+    export_parser.add_argument('archive', help="output path, or '-' for stdout")
+    export_parser.add_argument(
+        '--compression', choices=COMPRESSIONS, default='gzip',
+    )
+    import_parser = commands.add_parser('import', help='restore an archive')
+    import_parser.add_argument('archive', help="input path, or '-' for stdin")
+    args = parser.parse_args(argv)
+
+    config = create_app().config
+    content_dir, media_dir = config['CONTENT_DIR'], config['MEDIA_UPLOAD_DIR']
+    if args.command == 'export':
+        output = (
+            sys.stdout.buffer if args.archive == '-'
+            else open(args.archive, 'wb')
+        )
+        with output:
+            for chunk in export_archive(content_dir, media_dir, args.compression):
+                output.write(chunk)
+        return 0
+
+    source = sys.stdin.buffer if args.archive == '-' else open(args.archive, 'rb')
+    with source:
+        try:
+            summary = import_archive(
+                source, content_dir, media_dir,
+                config['ALLOWED_MEDIA_EXTENSIONS'],
+            )
+        except BackupError as exc:
+            parser.exit(1, f'import failed: {exc}\n')
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
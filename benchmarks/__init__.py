@@ -0,0 +1 @@
+"""Timing and memory benchmarks for the content and rendering hot paths."""
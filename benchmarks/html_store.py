@@ -0,0 +1,159 @@
+"""Memory and latency of the tiered post HTML store against a plain dict.
+
+Usage::
+
+    python -m benchmarks.html_store --posts 10000 50000
+
+For each archive size this builds synthetic rendered HTML (lengths drawn
+from ``benchmarks.synthetic.LENGTHS``), then loads it into a plain dict
+(what post records used to hold) and into an ``HtmlStore``. It records
+the traced memory each one holds and replays a Zipf-like read pattern,
+where a few recent posts take most of the traffic, to report read latency
+percentiles and the hot-tier hit rate.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import hashlib
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from blog.html_store import HtmlStore
+
+from .synthetic import LENGTHS, _paragraph, _sentence
+
+DEFAULT_SIZES = (10000,)
+DEFAULT_READS = 100000
+ZIPF_EXPONENT = 1.1
+
+
+def build_html(rng: random.Random, words: int) -> str:
+    blocks = []
+    remaining = words
+    while remaining > 0:
+        size = min(remaining, rng.randint(40, 120))
+        if rng.random() < 0.1:
+            blocks.append(f'<h2>{_sentence(rng, 4)[:-1]}</h2>')
+        blocks.append(f'<p>{_paragraph(rng, size)}</p>')
+        remaining -= size
+    return '\n'.join(blocks)
+
+
+def build_archive(count: int, seed: int) -> Dict[str, str]:
+    rng = random.Random(seed)
+    # A pool of bodies reused across keys keeps generation fast at 50k
+    # posts; the keys differ so every post is stored separately.
+    pool = [build_html(rng, rng.choice(LENGTHS)) for _ in range(min(count, 500))]
+    archive = {}
+    for index in range(count):
+        body = f'<p>Post {index}</p>\n' + pool[index % len(pool)]
+        key = hashlib.blake2b(body.encode('utf-8'), digest_size=16).hexdigest()
+        archive[key] = body
+    return archive
+
+
+def zipf_reads(keys: List[str], reads: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) ** ZIPF_EXPONENT for rank in range(len(keys))]
+    return rng.choices(keys, weights=weights, k=reads)
+
+
+def _resident(build: Callable[[], Any]) -> tuple[Any, int]:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        value = build()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return value, current
+
+
+def _latency(get: Callable[[str], str], reads: List[str]) -> Dict[str, float]:
+    timings = []
+    gc.disable()
+    try:
+        for key in reads:
+            start = time.perf_counter()
+            get(key)
+            timings.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    timings.sort()
+    return {
+        'p50_us': timings[len(timings) // 2] * 1e6,
+        'p99_us': timings[int(len(timings) * 0.99)] * 1e6,
+        'total_s': sum(timings),
+    }
+
+
+def run_size(count: int, reads: int, hot_size: int, seed: int,
+             spill_dir: str | None = None) -> Dict[str, Any]:
+    # The plain dict is the archive itself: every body stays decompressed.
+    archive, flat_bytes = _resident(lambda: build_archive(count, seed))
+    pattern = zipf_reads(list(archive), reads, seed)
+
+    def tiered_store() -> HtmlStore:
+        store = HtmlStore(hot_size=hot_size, spill_dir=spill_dir)
+        for key, html in archive.items():
+            store.put(key, html)
+        return store
+
+    tiered, tiered_bytes = _resident(tiered_store)
+    flat_latency = _latency(archive.__getitem__, pattern)
+    tiered_latency = _latency(tiered.get, pattern)
+    stats = tiered.stats()
+    return {
+        'posts': count,
+        'reads': reads,
+        'hot_size': hot_size,
+        'dict': {'resident_bytes': flat_bytes, **flat_latency},
+        'tiered': {
+            'resident_bytes': tiered_bytes,
+            'resident_after_reads_bytes': stats['resident_bytes'],
+            'hit_rate': stats['hit_rate'],
+            **tiered_latency,
+        },
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.html_store')
+    parser.add_argument('--posts', type=int, nargs='+',
+                        default=list(DEFAULT_SIZES))
+    parser.add_argument('--reads', type=int, default=DEFAULT_READS)
+    parser.add_argument('--hot-size', type=int, default=64)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--spill', action='store_true',
+                        help='spill the cold tier to a temporary directory')
+    args = parser.parse_args(argv)
+
+    results = []
+    for count in args.posts:
+        with tempfile.TemporaryDirectory() as tmp:
+            result = run_size(count, args.reads, args.hot_size, args.seed,
+                              tmp if args.spill else None)
+        results.append(result)
+        for name in ('dict', 'tiered'):
+            row = result[name]
+            print(
+                f'{count:>6} posts  {name:<7}'
+                f'{row["resident_bytes"] / 2 ** 20:>9.1f} MiB'
+                f'  p50 {row["p50_us"]:>7.2f} us'
+                f'  p99 {row["p99_us"]:>7.2f} us',
+                file=sys.stderr,
+            )
+        print(f'{"":>13}hit rate {result["tiered"]["hit_rate"]:.1%}',
+              file=sys.stderr)
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,308 @@
+"""Benchmark harness for the content and rendering hot paths.
+
+Usage::
+
+    python -m benchmarks.run run --posts 10 1000 --output baseline.json
+    python -m benchmarks.run compare baseline.json current.json
+
+``run`` generates a synthetic archive per size (see ``benchmarks.synthetic``),
+times each case with the garbage collector paused, records peak traced
+memory from a separate pass, and writes a JSON report. Everything a run
+writes (posts, the static build, caches) stays in a temporary directory.
+``compare`` flags cases whose median time or peak memory grew beyond a
+threshold and exits non-zero when any did, so it can gate CI.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import functools
+import gc
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from blog import highlight
+
+from .synthetic import generate_posts
+
+REPORT_VERSION = 1
+DEFAULT_SIZES = (10, 100, 1000)
+DEFAULT_THRESHOLD = 0.10
+# Whole-archive cases are too slow to repeat many times on big archives.
+HEAVY_CASES = {'load_posts', 'freeze.build_static_site'}
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Time ``func`` ``repeat`` times, then record its peak allocation."""
+    func()  # warm caches and imports so the first sample isn't an outlier
+    gc.collect()
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    timings = []
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'repeat': repeat,
+        'min_s': min(timings),
+        'median_s': statistics.median(timings),
+        'mean_s': statistics.fmean(timings),
+        'peak_bytes': peak,
+    }
+
+
+@contextlib.contextmanager
+def _content_dir(directory: Path):
+    previous = os.environ.get('CONTENT_DIR')
+    os.environ['CONTENT_DIR'] = str(directory)
+    try:
+        yield
+    finally:
+        if previous is None:
+            os.environ.pop('CONTENT_DIR', None)
+        else:
+            os.environ['CONTENT_DIR'] = previous
+
+
+@contextlib.contextmanager
+def _patched(module: Any, **values: Any):
+    previous = {name: getattr(module, name) for name in values}
+    for name, value in values.items():
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(module, name, value)
+
+
+def _freeze_case(build_dir: Path) -> Callable[[], None]:
+    """Time ``build_static_site`` without touching anything outside tmp.
+
+    The commit ledger (git, possibly a fetch) and template precompilation
+    are skipped; the snapshot and nginx preload map are written beside
+    ``build_dir``.
+    """
+    import freeze
+
+    def run() -> None:
+        original_url = freeze.SITE_CONFIG['site_url']
+        freeze.SITE_CONFIG['site_url'] = original_url or 'https://bench.local'
+        try:
+            with _patched(
+                freeze,
+                BUILD_DIR=build_dir,
+                refresh_ledger=lambda path: None,
+                precompile_all_templates=lambda: None,
+                write_snapshot=functools.partial(
+                    freeze.write_snapshot,
+                    path=build_dir.parent / 'content.snapshot',
+                ),
+                write_nginx_map=functools.partial(
+                    freeze.write_nginx_map,
+                    path=build_dir.parent / 'nginx-preload.conf',
+                ),
+            ), contextlib.redirect_stdout(io.StringIO()):
+                freeze.build_static_site()
+        finally:
+            freeze.SITE_CONFIG['site_url'] = original_url
+
+    return run
+
+
+def build_cases(
+    directory: Path,
+    paths: List[Path],
+    build_dir: Path,
+) -> List[Tuple[str, Callable[[], Any]]]:
+    from app import app
+    from blog import find_post, load_posts, parse_post
+    from blog import strip_leading_metadata_lines
+    from config import build_page_context
+
+    longest = max(paths, key=lambda path: path.stat().st_size)
+    long_body = longest.read_text(encoding='utf-8').split('---\n', 2)[2]
+    posts = load_posts(directory)
+    last_slug = posts[-1]['slug']
+    client = app.test_client()
+
+    def render(route: str) -> Callable[[], None]:
+        def run() -> None:
+            response = client.get(route)
+            if response.status_code != 200:
+                raise RuntimeError(f'{route} returned {response.status_code}')
+        return run
+
+    def page_context() -> None:
+        with app.test_request_context('/blog/'):
+            build_page_context(page_slug='blog')
+
+    return [
+        ('parse_post', lambda: parse_post(longest)),
+        ('load_posts', lambda: load_posts(directory)),
+        (
+            'strip_leading_metadata_lines',
+            lambda: strip_leading_metadata_lines(long_body),
+        ),
+        ('find_post', lambda: find_post(last_slug, posts=posts)),
+        ('build_page_context', page_context),
+        ('route:/', render('/')),
+        ('route:/blog/', render('/blog/')),
+        ('route:/blog/<slug>/', render(f'/blog/{last_slug}/')),
+        ('route:/sitemap.xml', render('/sitemap.xml')),
+        ('freeze.build_static_site', _freeze_case(build_dir)),
+    ]
+
+
+def run_benchmarks(
+    sizes: List[int],
+    repeat: int,
+    seed: int,
+    only: List[str] | None = None,
+) -> Dict[str, Any]:
+    results: Dict[str, Dict[str, Any]] = {}
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = Path(tmp) / 'posts'
+            paths = generate_posts(directory, size, seed=seed)
+            with _content_dir(directory), _patched(
+                highlight, _cache=highlight.HighlightCache(Path(tmp) / 'highlight'),
+            ):
+                cases = build_cases(directory, paths, Path(tmp) / 'build')
+                size_results = {}
+                for name, func in cases:
+                    if only and name not in only:
+                        continue
+                    case_repeat = 1 if name in HEAVY_CASES else repeat
+                    size_results[name] = measure(func, case_repeat)
+                    print(
+                        f'{size:>6} posts  {name:<32}'
+                        f'{size_results[name]["median_s"] * 1000:>10.2f} ms',
+                        file=sys.stderr,
+                    )
+        results[str(size)] = size_results
+
+    return {
+        'version': REPORT_VERSION,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': seed,
+        'results': results,
+    }
+
+
+def compare_reports(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[Dict[str, Any]]:
+    """Return one row per case present in both reports.
+
+    A row is a regression when median time or peak memory grew by more than
+    ``threshold`` (a fraction, so 0.10 means 10%).
+    """
+    rows = []
+    for size, cases in current['results'].items():
+        base_cases = baseline['results'].get(size, {})
+        for name, stats in cases.items():
+            base = base_cases.get(name)
+            if base is None:
+                continue
+            time_ratio = stats['median_s'] / base['median_s']
+            memory_ratio = (
+                stats['peak_bytes'] / base['peak_bytes']
+                if base['peak_bytes'] else 1.0
+            )
+            rows.append({
+                'size': size,
+                'case': name,
+                'time_ratio': time_ratio,
+                'memory_ratio': memory_ratio,
+                'regression': (
+                    time_ratio > 1 + threshold
+                    or memory_ratio > 1 + threshold
+                ),
+            })
+    return rows
+
+
+def _load_report(path: str) -> Dict[str, Any]:
+    report = json.loads(Path(path).read_text(encoding='utf-8'))
+    if report.get('version') != REPORT_VERSION:
+        raise SystemExit(f'{path}: unsupported report version')
+    return report
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run benchmarks')
+    run_parser.add_argument(
+        '--posts', type=int, nargs='+', default=list(DEFAULT_SIZES),
+        help='archive sizes to generate (10 to 50000)',
+    )
+    run_parser.add_argument('--repeat', type=int, default=5)
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--only', nargs='+', help='case names to run')
+    run_parser.add_argument('--output', help='write the JSON report here')
+
+    compare_parser = commands.add_parser('compare', help='diff two reports')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument(
+        '--threshold', type=float, default=DEFAULT_THRESHOLD,
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        report = run_benchmarks(args.posts, args.repeat, args.seed, args.only)
+        text = json.dumps(report, indent=2, sort_keys=True)
+        if args.output:
+            Path(args.output).write_text(text + '\n', encoding='utf-8')
+        else:
+            print(text)
+        return 0
+
+    rows = compare_reports(
+        _load_report(args.baseline),
+        _load_report(args.current),
+        args.threshold,
+    )
+    for row in rows:
+        flag = 'REGRESSION' if row['regression'] else 'ok'
+        print(
+            f'{row["size"]:>6} posts  {row["case"]:<32}'
+            f'time x{row["time_ratio"]:.2f}  '
+            f'mem x{row["memory_ratio"]:.2f}  {flag}'
+        )
+    return 1 if any(row['regression'] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""Deterministic synthetic post archives for benchmarking.
+
+Posts vary in length and mix paragraphs, headings, lists, tables and
+fenced code so the Markdown pipeline sees a realistic workload. The same
+``seed`` always produces byte-identical files.
+"""
+from __future__ import annotations
+
+import random
+from datetime import date, timedelta
+from pathlib import Path
+from typing import List
+
+WORDS = (
+    'pipeline render shot asset build deploy cache python flask template '
+    'review layout frame studio tool script workflow publish queue worker '
+    'texture lighting compositing animation release version branch commit '
+    'metric latency memory profile module package container service'
+).split()
+
+TAGS = ['python', 'pipeline', 'devops', 'animation', 'tools', 'flask', 'docker']
+
+LENGTHS = (150, 400, 900, 2500, 10000)
+
+
+def _sentence(rng: random.Random, length: int) -> str:
+    words = [rng.choice(WORDS) for _ in range(length)]
+    return ' '.join(words).capitalize() + '.'
+
+
+def _paragraph(rng: random.Random, words: int) -> str:
+    sentences = []
+    while words > 0:
+        size = min(words, rng.randint(8, 20))
+        sentences.append(_sentence(rng, size))
+        words -= size
+    return ' '.join(sentences)
+
+
+def _table(rng: random.Random) -> str:
+    rows = ['| Step | Tool | Minutes |', '| --- | --- | ---: |']
+    for _ in range(rng.randint(3, 8)):
+        rows.append(
+            f'| {rng.choice(WORDS)} | {rng.choice(WORDS)} '
+            f'| {rng.randint(1, 90)} |'
+        )
+    return '\n'.join(rows)
+
+
+def _code(rng: random.Random) -> str:
+    lines = [
+        f'def {rng.choice(WORDS)}_{index}(value):\n'
+        f'    return value * {rng.randint(2, 9)}'
+        for index in range(rng.randint(2, 6))
+    ]
+    return '```python\n' + '\n\n'.join(lines) + '\n```'
+
+
+def build_body(rng: random.Random, words: int) -> str:
+    blocks: List[str] = []
+    remaining = words
+    while remaining > 0:
+        roll = rng.random()
+        if roll < 0.1:
+            blocks.append(f'## {_sentence(rng, 4)[:-1]}')
+        elif roll < 0.17:
+            blocks.append(_table(rng))
+        elif roll < 0.25:
+            blocks.append(_code(rng))
+        elif roll < 0.32:
+            blocks.append('\n'.join(
+                f'- {_sentence(rng, 6)}' for _ in range(rng.randint(2, 5))
+            ))
+        else:
+            size = min(remaining, rng.randint(40, 120))
+            blocks.append(_paragraph(rng, size))
+            remaining -= size
+    return '\n\n'.join(blocks)
+
+
+def build_post(index: int, rng: random.Random) -> str:
+    words = rng.choice(LENGTHS)
+    published = date(2020, 1, 1) + timedelta(days=index % 2000)
+    tags = rng.sample(TAGS, rng.randint(1, 3))
+    front_matter = [
+        '---',
+        f'title: Synthetic post {index}',
+        f'slug: synthetic-post-{index}',
+        f'date: {published.isoformat()}',
+        f'tags: [{", ".join(tags)}]',
+        'status: published',
+        '---',
+        '',
+    ]
+    if index % 7 == 0:
+        # Exercise strip_leading_metadata_lines.
+        front_matter += ['author: bench', 'category: synthetic', '']
+    return '\n'.join(front_matter) + build_body(rng, words) + '\n'
+
+
+def generate_posts(directory: Path, count: int, seed: int = 0) -> List[Path]:
+    """Write ``count`` posts into ``directory`` and return their paths."""
+    rng = random.Random(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for index in range(count):
+        path = directory / f'synthetic-post-{index:05d}.md'
+        path.write_text(build_post(index, rng), encoding='utf-8')
+        paths.append(path)
+    return paths
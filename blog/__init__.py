@@ -2,22 +2,41 @@
 
 from .utils import (
     CONTENT_DIR,
+    BodyStats,
+    analyze_body,
     find_post,
     get_content_dir,
+    is_draft,
+    is_public,
     load_posts,
     normalize_media_path,
+    paginate_posts,
     parse_post,
+    post_tags,
+    publish_timestamp,
     slug_from_filename,
     strip_leading_metadata_lines,
+    tag_slug,
 )
+from .store import PostStore, get_store
 
 __all__ = [
+    'BodyStats',
     'CONTENT_DIR',
+    'PostStore',
+    'analyze_body',
     'find_post',
     'get_content_dir',
+    'get_store',
+    'is_draft',
+    'is_public',
     'load_posts',
     'normalize_media_path',
+    'paginate_posts',
     'parse_post',
+    'post_tags',
+    'publish_timestamp',
     'slug_from_filename',
     'strip_leading_metadata_lines',
+    'tag_slug',
 ]
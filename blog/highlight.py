@@ -0,0 +1,177 @@
+"""Server-side syntax highlighting for fenced code blocks.
+
+``highlight_code`` rewrites the ``<pre><code class="language-…">`` blocks
+the ``fenced_code`` extension emits into Pygments token spans. Output uses
+CSS classes only, so the colours live in ``static/css/highlight.css``
+(generated once by ``make highlight-css`` from the ``[highlight]``
+styles in ``site.toml`` and imported by ``style.css``), and the spans for
+a block depend only on its language and code.
+
+Each block is highlighted once: results are cached in memory and in
+``HIGHLIGHT_CACHE_DIR`` (default ``.build-cache/highlight``, restored
+between CI builds) under a digest of the language, the code and the
+Pygments version. Without Pygments, or for an unknown language, blocks
+are left as they are.
+"""
+from __future__ import annotations
+
+import hashlib
+import html
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from content.loader import load_toml
+
+CACHE_DIR = Path(os.getenv('HIGHLIGHT_CACHE_DIR', '.build-cache/highlight'))
+STYLESHEET_PATH = (
+    Path(__file__).resolve().parent.parent / 'static' / 'css' / 'highlight.css'
+)
+CODE_SELECTOR = '.blog-post-body pre code'
+
+_CODE_BLOCK_RE = re.compile(
+    r'<pre><code class="language-([^"\s]+)">(.*?)</code></pre>', re.DOTALL,
+)
+
+
+def highlight_styles() -> Dict[str, str]:
+    return {
+        'style': 'friendly',
+        'dark_style': 'monokai',
+        **load_toml('site.toml').get('highlight', {}),
+    }
+
+
+def pygments_version() -> Optional[str]:
+    try:
+        import pygments
+    except ImportError:
+        return None
+    return pygments.__version__
+
+
+class HighlightCache:
+    """Highlighted blocks by key, in memory and (optionally) on disk."""
+
+    def __init__(self, cache_dir: Optional[Path | str] = CACHE_DIR):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._blocks: Dict[str, str] = {}
+        self.highlighted = 0
+        self.reused = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f'{key}.html'
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            block = self._blocks.get(key)
+        if block is None and self.cache_dir:
+            try:
+                block = self._path(key).read_text(encoding='utf-8')
+            except OSError:
+                return None
+            with self._lock:
+                self._blocks[key] = block
+        if block is not None:
+            self.reused += 1
+        return block
+
+    def put(self, key: str, block: str) -> None:
+        with self._lock:
+            self._blocks[key] = block
+            self.highlighted += 1
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            partial = path.with_suffix(f'.{os.getpid()}.tmp')
+            partial.write_text(block, encoding='utf-8')
+            partial.replace(path)
+        except OSError:
+            pass  # a read-only cache only costs re-highlighting
+
+
+_cache: Optional[HighlightCache] = None
+
+
+def get_cache() -> HighlightCache:
+    global _cache
+    if _cache is None:
+        _cache = HighlightCache()
+    return _cache
+
+
+def block_key(language: str, code: str, version: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (language, version, code):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _highlight(language: str, code: str) -> Optional[str]:
+    from pygments import highlight
+    from pygments.formatters import HtmlFormatter
+    from pygments.lexers import get_lexer_by_name
+    from pygments.util import ClassNotFound
+
+    try:
+        lexer = get_lexer_by_name(language)
+    except ClassNotFound:
+        return None
+    return highlight(code, lexer, HtmlFormatter(nowrap=True))
+
+
+def highlight_code(rendered: str,
+                   cache: Optional[HighlightCache] = None) -> str:
+    """Highlight the language-tagged code blocks in ``rendered``."""
+    if '<pre><code class="language-' not in rendered:
+        return rendered
+    version = pygments_version()
+    if version is None:
+        return rendered
+    cache = cache or get_cache()
+
+    def replace(match: re.Match) -> str:
+        language, escaped = match.group(1), match.group(2)
+        key = block_key(language, escaped, version)
+        block = cache.get(key)
+        if block is None:
+            spans = _highlight(language, html.unescape(escaped))
+            block = match.group(0) if spans is None else (
+                f'<pre><code class="language-{language}">{spans}</code></pre>'
+            )
+            cache.put(key, block)
+        return block
+
+    return _CODE_BLOCK_RE.sub(replace, rendered)
+
+
+def stylesheet(style: str, dark_style: str) -> str:
+    """Token colours for the light theme and ``[data-theme="dark"]``."""
+    from pygments.formatters import HtmlFormatter
+
+    def rules(name: str, selector: str) -> str:
+        formatter = HtmlFormatter(style=name, nobackground=True)
+        return '\n'.join(
+            line for line in formatter.get_style_defs(selector).splitlines()
+            if line.startswith(selector)
+        )
+
+    return (
+        '/* Generated by `make highlight-css`; do not edit. */\n'
+        f'{rules(style, CODE_SELECTOR)}\n'
+        f'{rules(dark_style, f"[data-theme=dark] {CODE_SELECTOR}")}\n'
+    )
+
+
+def write_stylesheet(path: Path = STYLESHEET_PATH) -> Path:
+    styles = highlight_styles()
+    path.write_text(
+        stylesheet(styles['style'], styles['dark_style']), encoding='utf-8',
+    )
+    return path
@@ -0,0 +1,177 @@
+"""Tiered storage for rendered post HTML.
+
+Traffic concentrates on a few recent posts, yet every post record used to
+hold its full rendered HTML for the life of the store. ``HtmlStore``
+keeps every post's HTML zlib-compressed (the cold tier, in memory or
+spilled to ``spill_dir``) and the ``hot_size`` most recently read posts
+decompressed in an LRU (the hot tier). ``PostRecord`` is the post dict
+the store hands out: reading its ``content`` goes through the tiers, so
+templates, feeds and the related-posts engine keep using
+``post['content']`` unchanged.
+
+Entries are keyed by the post's ``content_hash``, so an edited post gets
+a new entry and unchanged duplicates share one. ``max_hot_bytes`` (set
+per tenant by ``tenants.py``) also caps the hot tier by size.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+HOT_SIZE = int(os.getenv('POST_HTML_HOT_SIZE', '64'))
+SPILL_DIR = os.getenv('POST_HTML_SPILL_DIR') or None
+COMPRESSION_LEVEL = 6
+
+
+class HtmlStore:
+    def __init__(self, hot_size: int = HOT_SIZE,
+                 spill_dir: Optional[Path | str] = SPILL_DIR,
+                 max_hot_bytes: Optional[int] = None):
+        self.hot_size = hot_size
+        self.max_hot_bytes = max_hot_bytes
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        if self.spill_dir:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+        self._hot: OrderedDict[str, str] = OrderedDict()
+        self._cold: Dict[str, bytes] = {}
+        self._cold_sizes: Dict[str, int] = {}
+        self._hot_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._cold_sizes
+
+    def __len__(self) -> int:
+        return len(self._cold_sizes)
+
+    def _spill_path(self, key: str) -> Path:
+        return self.spill_dir / f'{key}.html.z'
+
+    def put(self, key: str, html: str) -> None:
+        if key in self._cold_sizes:
+            return
+        data = zlib.compress(html.encode('utf-8'), COMPRESSION_LEVEL)
+        with self._lock:
+            if self.spill_dir:
+                self._spill_path(key).write_bytes(data)
+            else:
+                self._cold[key] = data
+            self._cold_sizes[key] = len(data)
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            html = self._hot.pop(key, None)
+            if html is not None:
+                self._hot_bytes -= sys.getsizeof(html)
+            self._cold.pop(key, None)
+            if self._cold_sizes.pop(key, None) is not None and self.spill_dir:
+                self._spill_path(key).unlink(missing_ok=True)
+
+    def get(self, key: str) -> str:
+        """The HTML stored under ``key``; KeyError once it is discarded."""
+        with self._lock:
+            html = self._hot.get(key)
+            if html is not None:
+                self._hot.move_to_end(key)
+                self.hits += 1
+                return html
+            self.misses += 1
+            data = self._cold.get(key)
+        if data is None:
+            if not self.spill_dir or key not in self._cold_sizes:
+                raise KeyError(key)
+            try:
+                data = self._spill_path(key).read_bytes()
+            except FileNotFoundError:
+                raise KeyError(key) from None
+        html = zlib.decompress(data).decode('utf-8')
+        with self._lock:
+            if key in self._cold_sizes and key not in self._hot:
+                self._hot[key] = html
+                self._hot_bytes += sys.getsizeof(html)
+                self._trim()
+        return html
+
+    def _over_budget(self) -> bool:
+        if len(self._hot) > self.hot_size:
+            return True
+        return (
+            self.max_hot_bytes is not None
+            and self._hot_bytes > self.max_hot_bytes
+            and len(self._hot) > 1
+        )
+
+    def _trim(self) -> None:
+        while self._over_budget():
+            _, evicted = self._hot.popitem(last=False)
+            self._hot_bytes -= sys.getsizeof(evicted)
+
+    def set_budget(self, max_hot_bytes: Optional[int]) -> None:
+        """Cap the hot tier at ``max_hot_bytes``, evicting now if over."""
+        with self._lock:
+            self.max_hot_bytes = max_hot_bytes
+            self._trim()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._cold_sizes),
+                'hot_entries': len(self._hot),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'hot_bytes': self._hot_bytes,
+                'cold_bytes': sum(self._cold_sizes.values()),
+                'resident_bytes': (
+                    self._hot_bytes
+                    + sum(len(data) for data in self._cold.values())
+                ),
+            }
+
+
+class PostRecord(dict):
+    """A post dict whose ``content`` HTML lives in an ``HtmlStore``.
+
+    ``content`` is not a real key: ``dict(post)`` or ``{**post}`` copies
+    drop it, so copy with ``post.materialize()`` instead.
+    """
+
+    def __init__(self, fields: Dict[str, Any], html: HtmlStore):
+        super().__init__(fields)
+        self.html = html
+
+    def __getitem__(self, key: str) -> Any:
+        if key == 'content':
+            return self.html.get(dict.__getitem__(self, 'content_hash'))
+        return dict.__getitem__(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key == 'content':
+            try:
+                return self['content']
+            except KeyError:
+                return default
+        return dict.get(self, key, default)
+
+    def __contains__(self, key: object) -> bool:
+        return key == 'content' or dict.__contains__(self, key)
+
+    def materialize(self) -> Dict[str, Any]:
+        return {**self, 'content': self['content']}
@@ -0,0 +1,198 @@
+"""Post-processing for media in rendered post HTML.
+
+``markdown`` emits bare ``<img>`` tags. ``process_media`` makes body media
+lazy (``loading="lazy"``, ``decoding="async"``; ``preload="metadata"`` for
+video) and adds ``width``/``height`` read from the image file's header so
+the browser can reserve space before the bytes arrive. Sizes come from an
+index over ``static/`` and the authoring upload directory, keyed by path
+and re-read only when a file's mtime or size changes.
+"""
+from __future__ import annotations
+
+import os
+import re
+import struct
+import threading
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+Size = Tuple[int, int]
+
+STATIC_ROOT = Path(__file__).resolve().parent.parent / 'static'
+STATIC_URL_PREFIX = '/static/'
+
+_TAG_RE = re.compile(r'<(img|iframe|video)\b([^>]*?)(/?)>', re.IGNORECASE)
+_ATTR_RE = re.compile(r'([\w:-]+)\s*=\s*("[^"]*"|\'[^\']*\'|[^\s"\'>]+)')
+
+
+def _png_size(head: bytes, _: BinaryIO) -> Optional[Size]:
+    if head[12:16] == b'IHDR':
+        return struct.unpack('>II', head[16:24])
+    return None
+
+
+def _gif_size(head: bytes, _: BinaryIO) -> Optional[Size]:
+    return struct.unpack('<HH', head[6:10])
+
+
+def _webp_size(head: bytes, _: BinaryIO) -> Optional[Size]:
+    chunk = head[12:16]
+    if chunk == b'VP8 ' and head[23:26] == b'\x9d\x01\x2a':
+        width, height = struct.unpack('<HH', head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L' and head[20:21] == b'\x2f':
+        bits = int.from_bytes(head[21:25], 'little')
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8X':
+        width = int.from_bytes(head[24:27], 'little') + 1
+        height = int.from_bytes(head[27:30], 'little') + 1
+        return width, height
+    return None
+
+
+def _jpeg_size(head: bytes, handle: BinaryIO) -> Optional[Size]:
+    handle.seek(2)
+    while True:
+        marker = handle.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        kind = marker[1]
+        if kind == 0xFF:  # fill byte
+            handle.seek(-1, os.SEEK_CUR)
+            continue
+        if kind in (0x01, 0xD8) or 0xD0 <= kind <= 0xD7:
+            continue
+        length = struct.unpack('>H', handle.read(2))[0]
+        # SOF0-SOF15 carry the frame size, except DHT, JPG and DAC.
+        if 0xC0 <= kind <= 0xCF and kind not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack('>xHH', handle.read(5))
+            return width, height
+        handle.seek(length - 2, os.SEEK_CUR)
+
+
+_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', _png_size),
+    (b'GIF87a', _gif_size),
+    (b'GIF89a', _gif_size),
+    (b'\xff\xd8', _jpeg_size),
+)
+
+
+def image_size(path: Path) -> Optional[Size]:
+    """(width, height) from the header of a PNG, GIF, JPEG or WebP file."""
+    try:
+        with path.open('rb') as handle:
+            head = handle.read(32)
+            if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+                return _webp_size(head, handle)
+            for signature, reader in _SIGNATURES:
+                if head.startswith(signature):
+                    return reader(head, handle)
+    except (OSError, struct.error):
+        return None
+    return None
+
+
+class ImageSizeIndex:
+    """Cached intrinsic sizes for images under URL-prefixed directories."""
+
+    def __init__(self, roots: Dict[str, Path]):
+        self.roots = roots
+        self._sizes: Dict[Path, Tuple[Tuple[int, int], Optional[Size]]] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, src: str) -> Optional[Path]:
+        """Map an image ``src`` to a file under one of the roots."""
+        parts = urlsplit(src)
+        if parts.scheme or parts.netloc:
+            return None
+        url_path = unquote(parts.path)
+        if not url_path.startswith('/'):
+            url_path = f'/{url_path}'
+        for prefix, root in self.roots.items():
+            if url_path.startswith(prefix):
+                path = (root / url_path[len(prefix):]).resolve()
+                if path.is_relative_to(root.resolve()):
+                    return path
+        return None
+
+    def size(self, src: str) -> Optional[Size]:
+        path = self.resolve(src)
+        if path is None:
+            return None
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._sizes.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        size = image_size(path)
+        with self._lock:
+            self._sizes[path] = (signature, size)
+        return size
+
+
+def _default_roots() -> Dict[str, Path]:
+    roots = {STATIC_URL_PREFIX: STATIC_ROOT}
+    upload_dir = os.getenv('AUTHORING_MEDIA_DIR')
+    if upload_dir:
+        prefix = os.getenv('AUTHORING_MEDIA_URL_PREFIX', '/static/uploads')
+        roots = {prefix.rstrip('/') + '/': Path(upload_dir), **roots}
+    return roots
+
+
+_index: Optional[ImageSizeIndex] = None
+
+
+def get_size_index() -> ImageSizeIndex:
+    global _index
+    if _index is None:
+        _index = ImageSizeIndex(_default_roots())
+    return _index
+
+
+def _attributes(raw: str) -> Dict[str, str]:
+    return {
+        name.lower(): value.strip('"\'')
+        for name, value in _ATTR_RE.findall(raw)
+    }
+
+
+def _rewrite(match: re.Match, index: ImageSizeIndex) -> str:
+    tag, raw, closing = match.group(1), match.group(2), match.group(3)
+    attrs = _attributes(raw)
+    extra = []
+    if tag.lower() == 'video':
+        if 'preload' not in attrs:
+            extra.append('preload="metadata"')
+    else:
+        if 'loading' not in attrs:
+            extra.append('loading="lazy"')
+        if tag.lower() == 'img':
+            if 'decoding' not in attrs:
+                extra.append('decoding="async"')
+            if 'width' not in attrs and 'height' not in attrs:
+                size = index.size(attrs.get('src', ''))
+                if size:
+                    extra.append(f'width="{size[0]}" height="{size[1]}"')
+    if not extra:
+        return match.group(0)
+    closing = ' /' if closing else ''
+    return f'<{tag}{raw.rstrip()} {" ".join(extra)}{closing}>'
+
+
+def process_media(html: str, index: Optional[ImageSizeIndex] = None) -> str:
+    """Add lazy-loading attributes and intrinsic sizes to body media."""
+    index = index or get_size_index()
+    return _TAG_RE.sub(lambda match: _rewrite(match, index), html)
+
+
+def hero_size(hero_image: Optional[str]) -> Optional[Size]:
+    """Intrinsic size of a post's static-relative ``hero_image``."""
+    if not hero_image:
+        return None
+    return get_size_index().size(STATIC_URL_PREFIX + hero_image.lstrip('/'))
@@ -0,0 +1,161 @@
+"""Build-time related-posts engine.
+
+Each post becomes a sparse TF-IDF vector over its body words plus boosted
+``tag:`` terms, trimmed to its ``MAX_TERMS`` strongest terms and
+L2-normalised; terms found in over half the archive are dropped. Cosine
+similarity for every post is then a sparse matrix product X·Xᵀ, computed
+row by row through an inverted index (term → {slug: weight}), so only
+posts sharing a term are ever scored.
+
+After a full build, ``update`` re-vectorises only the changed posts
+against the existing document frequencies. It then re-ranks only the
+rows that share a term with an old or new vector, or that listed a
+changed post as a neighbour.
+"""
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Set
+
+from .utils import post_tags, tag_slug
+
+Post = Dict[str, Any]
+Vector = Dict[str, float]
+
+TOP_K = 3
+MAX_TERMS = 64
+TAG_WEIGHT = 3.0
+# Terms in more than this share of posts say little about similarity and
+# would make every row score every other row. Small archives keep them.
+MAX_DF_RATIO = 0.5
+MIN_POSTS_FOR_DF_CUTOFF = 20
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_WORD_RE = re.compile(r'[a-z][a-z0-9]{2,}')
+STOPWORDS = frozenset(
+    'the and for are but not you your with this that from have has had was '
+    'were will would can could should what when where which who why how all '
+    'any some into out our they them their there then than its also just '
+    'about over more most very been being only other such like use using'.split()
+)
+
+
+def post_terms(post: Post) -> Counter:
+    """Term frequencies for ``post``'s rendered body text and tags."""
+    text = _TAG_RE.sub(' ', post.get('content') or '').lower()
+    terms = Counter(
+        word for word in _WORD_RE.findall(text) if word not in STOPWORDS
+    )
+    for tag in post_tags(post):
+        terms[f'tag:{tag_slug(tag)}'] += 1
+    return terms
+
+
+class RelatedIndex:
+    def __init__(self, top_k: int = TOP_K):
+        self.top_k = top_k
+        self.terms: Dict[str, Counter] = {}
+        self.vectors: Dict[str, Vector] = {}
+        self.postings: Dict[str, Dict[str, float]] = {}
+        self.df: Counter = Counter()
+        self.neighbours: Dict[str, List[str]] = {}
+
+    def _idf(self, term: str) -> float:
+        return math.log((1 + len(self.terms)) / (1 + self.df[term])) + 1
+
+    def _vectorise(self, terms: Counter) -> Vector:
+        total = len(self.terms)
+        cutoff = (
+            MAX_DF_RATIO * total
+            if total >= MIN_POSTS_FOR_DF_CUTOFF else float('inf')
+        )
+        weights = {}
+        for term, count in terms.items():
+            if self.df[term] > cutoff:
+                continue
+            boost = TAG_WEIGHT if term.startswith('tag:') else 1.0
+            weights[term] = (1 + math.log(count)) * self._idf(term) * boost
+        if len(weights) > MAX_TERMS:
+            weights = dict(
+                heapq.nlargest(MAX_TERMS, weights.items(), key=lambda i: i[1])
+            )
+        norm = math.sqrt(sum(value * value for value in weights.values()))
+        if not norm:
+            return {}
+        return {term: value / norm for term, value in weights.items()}
+
+    def _post_vector(self, slug: str, vector: Vector) -> None:
+        self.vectors[slug] = vector
+        for term, weight in vector.items():
+            self.postings.setdefault(term, {})[slug] = weight
+
+    def _drop_vector(self, slug: str) -> Vector:
+        vector = self.vectors.pop(slug, {})
+        for term in vector:
+            column = self.postings.get(term)
+            if column is not None:
+                column.pop(slug, None)
+                if not column:
+                    del self.postings[term]
+        return vector
+
+    def _rank(self, slug: str) -> List[str]:
+        scores: Dict[str, float] = {}
+        for term, weight in self.vectors.get(slug, {}).items():
+            for other, other_weight in self.postings.get(term, {}).items():
+                if other != slug:
+                    scores[other] = scores.get(other, 0.0) + weight * other_weight
+        best = heapq.nsmallest(
+            self.top_k, scores.items(), key=lambda item: (-item[1], item[0]),
+        )
+        return [other for other, _ in best]
+
+    def rebuild(self, posts: Iterable[Post]) -> None:
+        """Vectorise every post and rank all rows in one batch."""
+        self.__init__(self.top_k)
+        for post in posts:
+            terms = post_terms(post)
+            self.terms[post['slug']] = terms
+            self.df.update(terms.keys())
+        for slug, terms in self.terms.items():
+            self._post_vector(slug, self._vectorise(terms))
+        for slug in self.vectors:
+            self.neighbours[slug] = self._rank(slug)
+
+    def update(self, changed: Iterable[Post], removed: Iterable[str]) -> Set[str]:
+        """Apply changed/removed posts; return the slugs whose rows moved."""
+        dirty: Set[str] = set()
+        touched_terms: Set[str] = set()
+        changed = list(changed)
+        moved = {*removed, *(post['slug'] for post in changed)}
+
+        for slug in moved:
+            old_terms = self.terms.pop(slug, None)
+            if old_terms is not None:
+                self.df.subtract(old_terms.keys())
+            touched_terms.update(self._drop_vector(slug))
+            self.neighbours.pop(slug, None)
+            dirty.add(slug)
+
+        for post in changed:
+            terms = post_terms(post)
+            self.terms[post['slug']] = terms
+            self.df.update(terms.keys())
+        for post in changed:
+            vector = self._vectorise(self.terms[post['slug']])
+            self._post_vector(post['slug'], vector)
+            touched_terms.update(vector)
+
+        for term in touched_terms:
+            dirty.update(self.postings.get(term, ()))
+        dirty.update(
+            slug for slug, others in self.neighbours.items()
+            if moved.intersection(others)
+        )
+        for slug in dirty:
+            if slug in self.vectors:
+                self.neighbours[slug] = self._rank(slug)
+        return dirty
@@ -0,0 +1,204 @@
+"""Markdown conversion, optionally sandboxed in a worker process pool.
+
+``render_markdown`` is the one place post bodies and editor previews are
+converted. By default it runs ``markdown`` inline. With
+``MARKDOWN_SANDBOX=true`` the conversion runs in a warm pool of
+``MARKDOWN_WORKERS`` processes instead: input over ``MARKDOWN_MAX_BYTES``
+is refused, a conversion that takes longer than ``MARKDOWN_TIMEOUT``
+seconds has its worker pool killed and replaced, and in both cases (or
+when the converter raises) the text is returned HTML-escaped in a
+``<pre>`` so a pathological document can't stall a request thread. The
+fallback is a ``FallbackHtml`` string, so callers that keep rendered
+output (the post store) can tell it apart and render again later.
+
+Render times of recent conversions and the fallback counts are exported
+on ``/__metrics``.
+"""
+from __future__ import annotations
+
+import atexit
+import html
+import multiprocessing
+import os
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import markdown
+
+from content.loader import message
+from instrumentation import register_collector
+
+MARKDOWN_EXTENSIONS = ['fenced_code', 'tables', 'sane_lists']
+
+SANDBOX = os.getenv('MARKDOWN_SANDBOX', 'false').lower() == 'true'
+WORKERS = int(os.getenv('MARKDOWN_WORKERS', '2'))
+TIMEOUT = float(os.getenv('MARKDOWN_TIMEOUT', '5'))
+MAX_BYTES = int(os.getenv('MARKDOWN_MAX_BYTES', str(2 * 1024 * 1024)))
+SAMPLE_SIZE = 1024
+PERCENTILES = (0.5, 0.9, 0.99)
+
+_worker_converter: Optional[markdown.Markdown] = None
+
+
+def _init_worker() -> None:
+    global _worker_converter
+    _worker_converter = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+
+
+def _convert(text: str) -> str:
+    return _worker_converter.reset().convert(text)
+
+
+class FallbackHtml(str):
+    """Escaped plain text served in place of a refused conversion."""
+
+
+def fallback_html(text: str) -> FallbackHtml:
+    """The body as escaped plain text, used when conversion is refused."""
+    return FallbackHtml(
+        f'<pre class="markdown-fallback">{html.escape(text)}</pre>'
+    )
+
+
+class MarkdownSandbox:
+    """A warm process pool that converts Markdown under time and size limits.
+
+    The pool is created lazily and re-created in a forked child (a pool
+    inherited from a preloading parent has no result-handler threads).
+    """
+
+    def __init__(self, workers: int = WORKERS, timeout: float = TIMEOUT,
+                 max_bytes: int = MAX_BYTES):
+        self.workers = workers
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self._pool: Optional[multiprocessing.pool.Pool] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> multiprocessing.pool.Pool:
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                context = multiprocessing.get_context('spawn')
+                self._pool = context.Pool(self.workers, _init_worker)
+                self._pid = os.getpid()
+            return self._pool
+
+    def _kill(self, pool: multiprocessing.pool.Pool) -> None:
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.terminate()
+
+    def start(self) -> None:
+        """Spawn the workers now so the first render doesn't pay for it."""
+        self._get_pool().map(_convert, [''] * self.workers)
+
+    def close(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None and self._pid == os.getpid():
+            pool.terminate()
+
+    def convert(self, text: str) -> Tuple[Optional[str], Optional[str]]:
+        """Return ``(html, None)`` or ``(None, reason)`` on refusal."""
+        if len(text.encode('utf-8')) > self.max_bytes:
+            return None, 'oversize'
+        pool = self._get_pool()
+        try:
+            return pool.apply_async(_convert, (text,)).get(self.timeout), None
+        except multiprocessing.TimeoutError:
+            self._kill(pool)
+            return None, 'timeout'
+        except Exception:  # noqa: BLE001 - any converter failure falls back
+            return None, 'error'
+
+
+class RenderStats:
+    """Recent render durations and fallback counts."""
+
+    def __init__(self, sample_size: int = SAMPLE_SIZE):
+        self._durations: Deque[float] = deque(maxlen=sample_size)
+        self.renders = 0
+        self.fallbacks: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, fallback: Optional[str] = None) -> None:
+        with self._lock:
+            self._durations.append(seconds)
+            self.renders += 1
+            if fallback:
+                self.fallbacks[fallback] += 1
+
+    def percentiles(self) -> Dict[float, float]:
+        with self._lock:
+            durations = sorted(self._durations)
+        if not durations:
+            return {q: 0.0 for q in PERCENTILES}
+        return {
+            q: durations[min(len(durations) - 1, int(q * len(durations)))]
+            for q in PERCENTILES
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._durations.clear()
+            self.renders = 0
+            self.fallbacks.clear()
+
+
+render_stats = RenderStats()
+_sandbox: Optional[MarkdownSandbox] = None
+_sandbox_lock = threading.Lock()
+
+
+def get_sandbox() -> Optional[MarkdownSandbox]:
+    """The process-wide sandbox, or None when ``MARKDOWN_SANDBOX`` is off."""
+    global _sandbox
+    if not SANDBOX:
+        return None
+    with _sandbox_lock:
+        if _sandbox is None:
+            _sandbox = MarkdownSandbox()
+            atexit.register(_sandbox.close)
+        return _sandbox
+
+
+def render_markdown(text: str,
+                    sandbox: Optional[MarkdownSandbox] = None) -> str:
+    sandbox = sandbox or get_sandbox()
+    started = time.perf_counter()
+    if sandbox is None:
+        rendered = markdown.markdown(text, extensions=MARKDOWN_EXTENSIONS)
+        render_stats.record(time.perf_counter() - started)
+        return rendered
+    rendered, reason = sandbox.convert(text)
+    render_stats.record(time.perf_counter() - started, reason)
+    if rendered is None:
+        print(message('blog', 'render_fallback', reason=reason))
+        return fallback_html(text)
+    return rendered
+
+
+def render_metrics() -> List[Tuple[str, str, str, Any]]:
+    """Markdown render percentiles and fallback counts, for ``/__metrics``."""
+    rows: List[Tuple[str, str, str, Any]] = [
+        (f'site_markdown_render_seconds_p{round(q * 100)}', 'gauge',
+         f'{round(q * 100)}th percentile of recent Markdown render times.',
+         seconds)
+        for q, seconds in render_stats.percentiles().items()
+    ]
+    rows.append(('site_markdown_renders_total', 'counter',
+                 'Markdown conversions.', render_stats.renders))
+    for reason in ('oversize', 'timeout', 'error'):
+        rows.append((
+            f'site_markdown_fallbacks_{reason}_total', 'counter',
+            f'Bodies served as plain text after a sandbox {reason}.',
+            render_stats.fallbacks[reason],
+        ))
+    return rows
+
+
+register_collector(render_metrics)
@@ -0,0 +1,108 @@
+"""Versioned binary snapshot of the parsed content.
+
+The static build writes the post store (post records with rendered HTML,
+tag/archive indexes, related-post vectors) and the TOML cache to a single
+file. At boot the public app memory-maps that file and installs the store
+instead of parsing every post. Files edited after the build are picked up
+by the store's normal mtime/size refresh. A snapshot written by different
+parser code, another snapshot version, or for another content directory
+is ignored, and the app falls back to live parsing.
+
+The payload is a pickle: only load snapshots the build itself produced.
+"""
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+from pathlib import Path
+from typing import Optional
+
+from content.loader import prime_toml_cache, toml_cache_entries
+
+from .store import PostStore, install_store
+
+SNAPSHOT_VERSION = 1
+MAGIC = b'MSNAP'
+_HEADER = struct.Struct('>5sH32s')
+_PARSER_SOURCES = (
+    'utils.py', 'media.py', 'store.py', 'related.py', 'html_store.py',
+    'rendering.py', 'highlight.py',
+)
+
+DEFAULT_SNAPSHOT_PATH = Path('.build-cache/content.snapshot')
+
+
+def snapshot_path() -> Path:
+    return Path(os.getenv('CONTENT_SNAPSHOT', DEFAULT_SNAPSHOT_PATH))
+
+
+def code_fingerprint() -> bytes:
+    """Digest of the parsing code; a change invalidates old snapshots."""
+    digest = hashlib.blake2b(digest_size=32)
+    package = Path(__file__).resolve().parent
+    for name in _PARSER_SOURCES:
+        digest.update((package / name).read_bytes())
+    return digest.digest()
+
+
+def write_snapshot(store: PostStore, path: Optional[Path] = None) -> Path:
+    path = path or snapshot_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = pickle.dumps(
+        {'store': store, 'toml': toml_cache_entries()},
+        protocol=pickle.HIGHEST_PROTOCOL,
+    )
+    temporary = path.with_suffix('.tmp')
+    with temporary.open('wb') as handle:
+        handle.write(_HEADER.pack(MAGIC, SNAPSHOT_VERSION, code_fingerprint()))
+        handle.write(payload)
+    os.replace(temporary, path)
+    return path
+
+
+def read_snapshot(path: Optional[Path] = None) -> Optional[dict]:
+    """Return the snapshot payload, or None if missing, incompatible or corrupt."""
+    path = path or snapshot_path()
+    try:
+        handle = path.open('rb')
+    except OSError:
+        return None
+    with handle:
+        try:
+            view = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            return None
+        with view:
+            if len(view) < _HEADER.size:
+                return None
+            magic, version, fingerprint = _HEADER.unpack_from(view)
+            if (
+                magic != MAGIC
+                or version != SNAPSHOT_VERSION
+                or fingerprint != code_fingerprint()
+            ):
+                return None
+            with memoryview(view)[_HEADER.size:] as body:
+                try:
+                    return pickle.loads(body)
+                except (
+                    pickle.UnpicklingError, EOFError, AttributeError,
+                    ImportError, IndexError, ValueError,
+                ):
+                    return None
+
+
+def install_snapshot(path: Optional[Path] = None) -> Optional[PostStore]:
+    """Load a compatible snapshot and serve its store; None on fallback."""
+    payload = read_snapshot(path)
+    if payload is None:
+        return None
+    store = payload['store']
+    if not store.directory.exists():
+        return None
+    prime_toml_cache(payload['toml'])
+    install_store(store)
+    return store
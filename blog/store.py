@@ -0,0 +1,437 @@
+"""In-process post store with incrementally maintained indexes.
+
+``load_posts`` parses the whole archive on every call. The store parses
+each file once, keeps the parsed records between requests and, on
+refresh, re-parses only files whose mtime or size changed. Tag and
+year/month indexes are updated for the changed posts alone, so archive
+routes are dictionary lookups rather than scans. Rendered HTML is kept
+in a tiered ``HtmlStore`` behind the ``PostRecord`` dicts (see
+``html_store``). Entries are reference-counted by content hash, and one
+no post uses any more is only discarded ``RETIRE_SECONDS`` later, so a
+record a request still holds across a rescan keeps its content.
+
+A post served as the sandbox's plain-text fallback is rendered again
+``RENDER_RETRY_SECONDS`` later, then after twice that, up to
+``RENDER_RETRIES`` times, or whenever its file changes; the build renders
+every post afresh. A file that fails to parse is remembered with no post, so it is not
+parsed again (or reported again) until it changes. Drafts are parsed but
+never indexed. Posts dated in the future wait in a
+min-heap of publish times; every ``refresh`` peeks at its head (even
+between rescans), and at a post's publish time indexes just that post.
+Each generation's affected pages are logged so cached pages for other
+routes stay valid (``changes_since``).
+"""
+from __future__ import annotations
+
+import hashlib
+import heapq
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from collections import Counter, deque
+from typing import Any, Deque, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from content.loader import message
+from instrumentation import register_collector, timed
+
+from .html_store import HtmlStore, PostRecord
+from .related import RelatedIndex
+from .utils import (
+    get_content_dir,
+    is_draft,
+    is_public,
+    parse_post,
+    post_tags,
+    publish_timestamp,
+    tag_slug,
+)
+
+Post = Dict[str, Any]
+ArchiveKey = Tuple[int, Optional[int]]
+# ('post', slug), ('tag', slug), ('archive', (year, month)) or
+# ('index', None) for listings of every post.
+Change = Tuple[str, Any]
+
+REFRESH_INTERVAL = float(os.getenv('POST_STORE_REFRESH_SECONDS', '1'))
+CHANGE_LOG_SIZE = 64
+RETIRE_SECONDS = 60
+RENDER_RETRY_SECONDS = float(os.getenv('MARKDOWN_RETRY_SECONDS', '300'))
+RENDER_RETRIES = 3
+
+
+def content_hash(post: Post) -> str:
+    """Digest of everything a rendered view of ``post`` depends on."""
+    digest = hashlib.blake2b(digest_size=16)
+    for key in (
+        'slug', 'title', 'date', 'description', 'excerpt', 'hero_image',
+        'tags', 'content',
+    ):
+        digest.update(repr(post.get(key)).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def sort_posts(posts: List[Post]) -> None:
+    """Sort in place exactly like ``load_posts``: newest first, then path."""
+    posts.sort(key=lambda item: str(item.get('source_path', '')))
+    posts.sort(key=lambda item: item.get('date') or datetime.min, reverse=True)
+
+
+class PostStore:
+    """Parsed posts for one content directory plus derived indexes."""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.generation = 0
+        self.posts: List[Post] = []
+        self.by_slug: Dict[str, Post] = {}
+        self.tags: Dict[str, List[Post]] = {}
+        self.tag_labels: Dict[str, str] = {}
+        self.archive: Dict[ArchiveKey, List[Post]] = {}
+        self.related = RelatedIndex()
+        self.html = HtmlStore()
+        self.clock = time.time
+        self._html_refs: Counter[str] = Counter()
+        self._retired: Deque[Tuple[float, str]] = deque()
+        self._files: Dict[Path, Tuple[Tuple[int, int], Optional[Post]]] = {}
+        self._listed: Set[Path] = set()
+        self._scheduled: List[Tuple[float, Path]] = []
+        # path -> (retry at, attempts) for posts rendered as a fallback
+        self._render_retries: Dict[Path, Tuple[float, int]] = {}
+        self._changes: Deque[Tuple[int, FrozenSet[Change]]] = deque(
+            maxlen=CHANGE_LOG_SIZE,
+        )
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state['_lock']
+        state['_checked_at'] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    # -- lookups -----------------------------------------------------------
+
+    def get(self, slug: str) -> Optional[Post]:
+        return self.by_slug.get(slug)
+
+    def tag_posts(self, slug: str) -> List[Post]:
+        return self.tags.get(slug, [])
+
+    def archive_posts(self, year: int, month: Optional[int] = None) -> List[Post]:
+        return self.archive.get((year, month), [])
+
+    def years(self) -> List[int]:
+        return sorted(
+            {year for year, month in self.archive if month is None},
+            reverse=True,
+        )
+
+    def next_publish_at(self) -> Optional[datetime]:
+        """When the earliest scheduled post goes live, if any."""
+        for published, path in sorted(self._scheduled):
+            if self._is_pending(published, path):
+                return datetime.fromtimestamp(published, tz=timezone.utc)
+        return None
+
+    def changes_since(self, generation: int) -> Optional[Set[Change]]:
+        """What changed after ``generation``, or None if no longer logged."""
+        if generation == self.generation:
+            return set()
+        logged = [(gen, keys) for gen, keys in self._changes if gen > generation]
+        if not logged or logged[0][0] != generation + 1:
+            return None
+        return set().union(*(keys for _, keys in logged))
+
+    # -- maintenance -------------------------------------------------------
+
+    def refresh(self, force: bool = False) -> bool:
+        """Pick up file changes and due scheduled posts; True if anything did.
+
+        Files are rescanned at most every ``REFRESH_INTERVAL``; the schedule
+        is a heap peek, so publishing is on time without extra rescans.
+        """
+        now = time.monotonic()
+        due = bool(self._scheduled) and self._scheduled[0][0] <= self.clock()
+        if (
+            not force
+            and self._checked_at is not None
+            and now - self._checked_at < REFRESH_INTERVAL
+        ):
+            if not due:
+                return False
+            with self._lock:
+                return self._publish_due()
+        with self._lock:
+            self._checked_at = now
+            self._discard_retired()
+            rescanned = self._rescan()
+            return self._publish_due() or rescanned
+
+    def _rescan(self) -> bool:
+        seen: Dict[Path, Tuple[int, int]] = {}
+        if self.directory.exists():
+            for path in self.directory.glob('*.md'):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                seen[path] = (stat.st_mtime_ns, stat.st_size)
+
+        removed = [path for path in self._files if path not in seen]
+        changed = [
+            path for path, signature in seen.items()
+            if path not in self._files or self._files[path][0] != signature
+        ]
+        now = self.clock()
+        changed.extend(
+            path for path, (retry_at, _) in self._render_retries.items()
+            if retry_at <= now and path in seen and path not in changed
+        )
+        if not removed and not changed:
+            return False
+
+        touched: set = set()
+        removed_slugs = []
+        parsed = []
+        for path in removed:
+            self._render_retries.pop(path, None)
+            _, post = self._files.pop(path)
+            if post is not None:
+                self._drop(path, post, touched, removed_slugs)
+        for path in changed:
+            retry = self._render_retries.pop(path, None)
+            if retry is not None and self._files[path][0] != seen[path]:
+                retry = None  # edited: start the backoff over
+            if path in self._files:
+                _, old = self._files.pop(path)
+                if old is not None:
+                    self._drop(path, old, touched, removed_slugs)
+            try:
+                post = parse_post(path)
+            except Exception as exc:  # noqa: BLE001 - surface file errors
+                print(message('blog', 'parse_failed', path=path, error=exc))
+                self._files[path] = (seen[path], None)
+                continue
+            post['updated_at'] = datetime.fromtimestamp(
+                seen[path][0] / 1e9, tz=timezone.utc,
+            )
+            post['content_hash'] = content_hash(post)
+            self._html_refs[post['content_hash']] += 1
+            self.html.put(post['content_hash'], post.pop('content'))
+            post = PostRecord(post, self.html)
+            self._files[path] = (seen[path], post)
+            if post.get('render_fallback'):
+                self._schedule_render_retry(path, retry)
+            if is_public(post, self.clock()):
+                self._list(path, post, touched)
+                parsed.append(post)
+            elif not is_draft(post):
+                heapq.heappush(
+                    self._scheduled, (publish_timestamp(post), path),
+                )
+
+        if not touched and not parsed and not removed_slugs:
+            return False
+        self._commit(touched, parsed, removed_slugs)
+        return True
+
+    def _schedule_render_retry(self, path: Path,
+                               previous: Optional[Tuple[float, int]]) -> None:
+        attempts = previous[1] + 1 if previous else 1
+        if attempts <= RENDER_RETRIES:
+            delay = RENDER_RETRY_SECONDS * 2 ** (attempts - 1)
+            self._render_retries[path] = (self.clock() + delay, attempts)
+
+    def _publish_due(self) -> bool:
+        """Index the scheduled posts whose publish time has passed."""
+        now = self.clock()
+        touched: set = set()
+        parsed = []
+        while self._scheduled and self._scheduled[0][0] <= now:
+            published, path = heapq.heappop(self._scheduled)
+            if self._is_pending(published, path):
+                post = self._files[path][1]
+                self._list(path, post, touched)
+                parsed.append(post)
+        if not parsed:
+            return False
+        self._commit(touched, parsed, [])
+        return True
+
+    def _is_pending(self, published: float, path: Path) -> bool:
+        """False for heap entries left behind by edits and removals."""
+        entry = self._files.get(path)
+        return (
+            entry is not None
+            and entry[1] is not None
+            and path not in self._listed
+            and not is_draft(entry[1])
+            and publish_timestamp(entry[1]) == published
+        )
+
+    def _list(self, path: Path, post: Post, touched: set) -> None:
+        self._listed.add(path)
+        self._index(post, touched)
+
+    def _drop(self, path: Path, post: Post, touched: set,
+              removed_slugs: List[str]) -> None:
+        key = post['content_hash']
+        self._html_refs[key] -= 1
+        if self._html_refs[key] <= 0:
+            del self._html_refs[key]
+            self._retired.append((self.clock(), key))
+        if path in self._listed:
+            self._listed.discard(path)
+            self._unindex(post, touched)
+            removed_slugs.append(post['slug'])
+
+    def _discard_retired(self) -> None:
+        """Drop HTML no post has used for ``RETIRE_SECONDS``."""
+        cutoff = self.clock() - RETIRE_SECONDS
+        while self._retired and self._retired[0][0] <= cutoff:
+            _, key = self._retired.popleft()
+            if key not in self._html_refs:
+                self.html.discard(key)
+
+    def _commit(self, touched: set, parsed: List[Post],
+                removed_slugs: List[str]) -> None:
+        self._reorder(touched)
+        dirty = self._update_related(parsed, removed_slugs)
+        slugs = {post['slug'] for post in parsed} | set(removed_slugs)
+        # Pages listing a changed post as related show its title too.
+        dirty |= {
+            post['slug'] for post in self.posts
+            if slugs.intersection(post.get('related', ()))
+        }
+        self.generation += 1
+        self._changes.append((self.generation, frozenset(
+            touched
+            | {('post', slug) for slug in dirty | slugs}
+            | {('index', None)}
+        )))
+
+    def _update_related(self, parsed: List[Post], removed: List[str]) -> Set[str]:
+        """Refresh ``related`` slugs on the post records whose rows moved."""
+        if not self.related.vectors or len(parsed) * 2 > len(self.posts):
+            self.related.rebuild(self.posts)
+            dirty = set(self.related.neighbours)
+        else:
+            dirty = self.related.update(parsed, removed)
+        for slug in dirty:
+            post = self.by_slug.get(slug)
+            if post is not None:
+                post['related'] = self.related.neighbours.get(slug, [])
+        return dirty
+
+    def _keys(self, post: Post) -> Iterable[Tuple[str, Any]]:
+        for tag in post_tags(post):
+            slug = tag_slug(tag)
+            if slug:
+                yield 'tag', slug
+        published = post.get('date')
+        if published:
+            yield 'archive', (published.year, None)
+            yield 'archive', (published.year, published.month)
+
+    def _index(self, post: Post, touched: set) -> None:
+        for kind, key in self._keys(post):
+            target = self.tags if kind == 'tag' else self.archive
+            target.setdefault(key, []).append(post)
+            touched.add((kind, key))
+        for tag in post_tags(post):
+            self.tag_labels.setdefault(tag_slug(tag), tag)
+
+    def _unindex(self, post: Post, touched: set) -> None:
+        for kind, key in self._keys(post):
+            target = self.tags if kind == 'tag' else self.archive
+            bucket = target.get(key)
+            if bucket:
+                bucket[:] = [item for item in bucket if item is not post]
+            touched.add((kind, key))
+
+    def _reorder(self, touched: set) -> None:
+        posts = [self._files[path][1] for path in self._listed]
+        sort_posts(posts)
+        self.posts = posts
+        for kind, key in touched:
+            target = self.tags if kind == 'tag' else self.archive
+            bucket = target.get(key)
+            if bucket:
+                sort_posts(bucket)
+            else:
+                target.pop(key, None)
+                if kind == 'tag':
+                    self.tag_labels.pop(key, None)
+        by_slug: Dict[str, Post] = {}
+        for post in self.posts:
+            by_slug.setdefault(post['slug'], post)
+        self.by_slug = by_slug
+
+
+_stores: Dict[Path, PostStore] = {}
+_stores_lock = threading.Lock()
+
+
+@timed('posts')
+def get_store(content_dir: Optional[Path | str] = None) -> PostStore:
+    """Return the refreshed store for ``content_dir`` (see get_content_dir)."""
+    directory = get_content_dir(content_dir).resolve()
+    with _stores_lock:
+        store = _stores.get(directory)
+        if store is None:
+            store = _stores[directory] = PostStore(directory)
+    store.refresh()
+    return store
+
+
+def install_store(store: PostStore) -> None:
+    """Serve ``store`` for its directory (e.g. one loaded from a snapshot)."""
+    with _stores_lock:
+        _stores[store.directory] = store
+
+
+def drop_store(content_dir: Path | str) -> bool:
+    """Forget the store for ``content_dir``; the next lookup re-parses."""
+    directory = get_content_dir(content_dir).resolve()
+    with _stores_lock:
+        return _stores.pop(directory, None) is not None
+
+
+def clear_stores() -> None:
+    with _stores_lock:
+        _stores.clear()
+
+
+def html_metrics() -> List[Tuple[str, str, str, float]]:
+    """Tiered HTML store totals across all stores, for ``/__metrics``."""
+    with _stores_lock:
+        stats = [store.html.stats() for store in _stores.values()]
+    hits = sum(item['hits'] for item in stats)
+    misses = sum(item['misses'] for item in stats)
+    return [
+        ('site_post_html_hits_total', 'counter',
+         'Post HTML reads served from the hot tier.', hits),
+        ('site_post_html_misses_total', 'counter',
+         'Post HTML reads decompressed from the cold tier.', misses),
+        ('site_post_html_hit_ratio', 'gauge',
+         'Hot-tier hit ratio.', hits / (hits + misses) if hits + misses else 0),
+        ('site_post_html_hot_bytes', 'gauge',
+         'Decompressed HTML held in the hot tier.',
+         sum(item['hot_bytes'] for item in stats)),
+        ('site_post_html_cold_bytes', 'gauge',
+         'Compressed HTML in the cold tier (memory or spill directory).',
+         sum(item['cold_bytes'] for item in stats)),
+        ('site_post_html_resident_bytes', 'gauge',
+         'HTML bytes held in memory across both tiers.',
+         sum(item['resident_bytes'] for item in stats)),
+    ]
+
+
+register_collector(html_metrics)
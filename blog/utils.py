@@ -1,16 +1,24 @@
 """Utilities for loading and formatting blog content."""
 from __future__ import annotations
 
+import math
 import os
 import re
-from datetime import datetime
+import time
+from datetime import datetime, timezone
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
 
 import frontmatter
-import markdown
 
 from content.loader import message
+from instrumentation import span, timed
+from profiler import profiled
+
+from .highlight import highlight_code
+from .media import hero_size, process_media
+from .rendering import FallbackHtml, render_markdown
 
 _DEFAULT_CONTENT_DIR = Path('content/posts')
 
@@ -58,6 +66,45 @@ def slug_from_filename(path: Path) -> str:
 METADATA_LINE_RE = re.compile(r'^[A-Za-z0-9_]+:\s*.+$')
 
 
+_TAG_SLUG_RE = re.compile(r'[^a-z0-9]+')
+
+
+def tag_slug(tag: str) -> str:
+    return _TAG_SLUG_RE.sub('-', str(tag).lower()).strip('-')
+
+
+def post_tags(post: Dict[str, Any]) -> List[str]:
+    """Return a post's tags as a list, accepting ``a, b`` strings too."""
+    value = post.get('tags') or []
+    if isinstance(value, str):
+        value = value.split(',')
+    return [str(tag).strip() for tag in value if str(tag).strip()]
+
+
+def publish_timestamp(post: Dict[str, Any]) -> Optional[float]:
+    """POSIX time a post goes live; naive ``date`` values are UTC."""
+    published = post.get('date')
+    if published is None:
+        return None
+    if published.tzinfo is None:
+        published = published.replace(tzinfo=timezone.utc)
+    return published.timestamp()
+
+
+def is_draft(post: Dict[str, Any]) -> bool:
+    return post.get('status') == 'draft'
+
+
+def is_public(post: Dict[str, Any], now: Optional[float] = None) -> bool:
+    """Not a draft, and dated at or before ``now`` (default: the clock)."""
+    if is_draft(post):
+        return False
+    published = publish_timestamp(post)
+    return published is None or published <= (
+        time.time() if now is None else now
+    )
+
+
 def strip_leading_metadata_lines(content: str) -> str:
     """Remove accidental metadata-style lines from the top of the body."""
     lines = content.splitlines()
@@ -75,12 +122,84 @@ def strip_leading_metadata_lines(content: str) -> str:
     return '\n'.join(cleaned).lstrip()
 
 
+EXCERPT_WORDS = 50
+WORDS_PER_MINUTE = 200
+# Separators other than ``\n`` that ``str.splitlines`` breaks on.
+_OTHER_LINE_BREAK_RE = re.compile('[\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]')
+_WORD_RE = re.compile(r'\S+')
+_COUNT_CHUNK = 1 << 16
+
+
+class BodyStats(NamedTuple):
+    body: str
+    word_count: int
+    excerpt: str
+    reading_time: int
+
+
+def _body_start(content: str) -> int:
+    """Offset of the first line ``strip_leading_metadata_lines`` keeps."""
+    position = 0
+    while position < len(content):
+        end = content.find('\n', position)
+        if end == -1:
+            end = len(content)
+        line = content[position:end].strip()
+        if line and not METADATA_LINE_RE.match(line):
+            return position
+        position = end + 1
+    return len(content)
+
+
+def _count_words(text: str) -> int:
+    """``len(text.split())`` without building the full word list."""
+    count = 0
+    inside_word = False
+    for offset in range(0, len(text), _COUNT_CHUNK):
+        chunk = text[offset:offset + _COUNT_CHUNK]
+        count += len(chunk.split())
+        if inside_word and not chunk[0].isspace():
+            count -= 1  # a word straddled the chunk boundary
+        inside_word = not chunk[-1].isspace()
+    return count
+
+
+def analyze_body(content: str) -> BodyStats:
+    """Strip leading metadata lines and measure the body in one pass.
+
+    Equivalent to ``strip_leading_metadata_lines`` followed by
+    ``body.split()`` for the word count and excerpt. With ``\n`` line
+    endings the body is a single slice of ``content``; only the leading
+    lines are inspected and words are counted chunk by chunk.
+    """
+    if _OTHER_LINE_BREAK_RE.search(content):
+        # splitlines() would normalise these endings; keep its exact output.
+        body = strip_leading_metadata_lines(content)
+    else:
+        end = len(content) - 1 if content.endswith('\n') else len(content)
+        body = content[_body_start(content):end].lstrip()
+
+    word_count = _count_words(body)
+    excerpt = ' '.join(
+        match.group() for match in islice(_WORD_RE.finditer(body), EXCERPT_WORDS)
+    )
+    return BodyStats(
+        body=body,
+        word_count=word_count,
+        excerpt=excerpt,
+        reading_time=max(1, round(word_count / WORDS_PER_MINUTE)),
+    )
+
+
 def parse_post(path: Path) -> Dict[str, Any]:
     """Parse a Markdown file with front matter into a dictionary."""
     post_data = frontmatter.load(path)
     metadata = post_data.metadata
 
     slug = metadata.get('slug') or slug_from_filename(path)
+    if str(slug).isdigit():
+        # /blog/<int:year>/ would shadow the post's URL.
+        raise ValueError(message('blog', 'numeric_slug', slug=slug))
     raw_date = metadata.get('date')
     try:
         published_at = (
@@ -89,18 +208,17 @@ def parse_post(path: Path) -> Dict[str, Any]:
     except ValueError:
         published_at = None
 
-    body = strip_leading_metadata_lines(post_data.content)
+    stats = analyze_body(post_data.content)
 
-    html = markdown.markdown(
-        body,
-        extensions=['fenced_code', 'tables', 'sane_lists'],
-    )
+    with span('markdown'):
+        html = render_markdown(stats.body)
+    render_fallback = isinstance(html, FallbackHtml)
+    with span('highlight'):
+        html = highlight_code(html)
+    html = process_media(html)
 
-    words = body.split()
-    word_count = len(words)
-    reading_time = max(1, round(word_count / 200))
-    excerpt = metadata.get('excerpt') or ' '.join(words[:50])
-    if metadata.get('excerpt') is None and word_count > 50:
+    excerpt = metadata.get('excerpt') or stats.excerpt
+    if metadata.get('excerpt') is None and stats.word_count > EXCERPT_WORDS:
         excerpt += '…'
 
     return {
@@ -113,30 +231,39 @@ def parse_post(path: Path) -> Dict[str, Any]:
         'description': metadata.get('description', ''),
         'excerpt': excerpt,
         'hero_image': metadata.get('hero_image'),
+        'hero_size': hero_size(metadata.get('hero_image')),
         'tags': metadata.get('tags', []),
         'content': html,
-        'word_count': word_count,
-        'reading_time': reading_time,
+        'word_count': stats.word_count,
+        'reading_time': stats.reading_time,
         'featured': metadata.get('featured', False),
+        'status': str(metadata.get('status') or 'published').strip().lower(),
         'source_path': path,
+        'render_fallback': render_fallback,
     }
 
 
+@profiled('load_posts')
+@timed('posts')
 def load_posts(
     content_dir: Optional[Path | str] = None,
 ) -> List[Dict[str, Any]]:
-    """Load and sort all markdown posts."""
+    """Load and sort all public (published, not future-dated) posts."""
     directory = get_content_dir(content_dir)
 
     posts: List[Dict[str, Any]] = []
     if not directory.exists():
         return posts
 
+    now = time.time()
     for path in sorted(directory.glob('*.md')):
         try:
-            posts.append(parse_post(path))
+            post = parse_post(path)
         except Exception as exc:  # noqa: BLE001 - surface file errors
             print(message('blog', 'parse_failed', path=path, error=exc))
+            continue
+        if is_public(post, now):
+            posts.append(post)
 
     posts.sort(
         key=lambda item: item.get('date') or datetime.min,
@@ -158,6 +285,31 @@ def find_post(
     return None
 
 
+def paginate_posts(
+    posts: List[Dict[str, Any]],
+    page: int,
+    per_page: int,
+) -> Optional[Dict[str, Any]]:
+    """Return the ``page``-th slice of date-sorted ``posts``.
+
+    Pages are 1-based. An empty archive still has one (empty) page; any
+    page outside the range returns ``None`` so routes can 404.
+    """
+    total = len(posts)
+    pages = max(1, math.ceil(total / per_page))
+    if page < 1 or page > pages:
+        return None
+    start = (page - 1) * per_page
+    return {
+        'items': posts[start:start + per_page],
+        'page': page,
+        'pages': pages,
+        'total': total,
+        'prev_page': page - 1 if page > 1 else None,
+        'next_page': page + 1 if page < pages else None,
+    }
+
+
 def normalize_media_path(value: Optional[str]) -> tuple[Optional[str], bool]:
     """Normalize a media reference to a static-relative path or return external URLs."""
     if not value:
@@ -174,12 +326,20 @@ def normalize_media_path(value: Optional[str]) -> tuple[Optional[str], bool]:
 
 
 __all__ = [
+    'BodyStats',
     'CONTENT_DIR',
+    'analyze_body',
     'find_post',
     'get_content_dir',
+    'is_draft',
+    'is_public',
     'load_posts',
     'normalize_media_path',
+    'paginate_posts',
     'parse_post',
+    'post_tags',
+    'publish_timestamp',
     'slug_from_filename',
     'strip_leading_metadata_lines',
+    'tag_slug',
 ]
@@ -1,47 +1,76 @@
 import os
 from datetime import datetime
 
-from flask import request, url_for
+from flask import g, has_request_context, request, url_for
 
 from content.loader import load_toml
+from instrumentation import timed
 
 
 SITE_CONTENT = load_toml('site.toml')
 SITE_DEFAULTS = SITE_CONTENT['site']
 
+_SITE_KEYS = {
+    'name': 'SITE_NAME',
+    'brand_name': 'SITE_BRAND_NAME',
+    'brand_legal_name': 'SITE_BRAND_LEGAL_NAME',
+    'tagline': 'SITE_TAGLINE',
+    'email': 'SITE_EMAIL',
+    'site_url': 'SITE_URL',
+    'meta_description': 'SITE_META_DESCRIPTION',
+    'asset_version': 'ASSET_VERSION',
+    'social_image': 'SITE_SOCIAL_IMAGE',
+    'github_url': 'SITE_GITHUB_URL',
+    'linkedin_url': 'SITE_LINKEDIN_URL',
+    'imdb_url': 'SITE_IMDB_URL',
+    'location': 'SITE_LOCATION',
+}
+
 
 def site_value(key: str, env_var: str) -> str:
     return os.getenv(env_var, SITE_DEFAULTS.get(key, ''))
 
 
-SITE_CONFIG = {
-    'name': site_value('name', 'SITE_NAME'),
-    'brand_name': site_value('brand_name', 'SITE_BRAND_NAME'),
-    'brand_legal_name': site_value(
-        'brand_legal_name',
-        'SITE_BRAND_LEGAL_NAME',
-    ),
-    'tagline': site_value('tagline', 'SITE_TAGLINE'),
-    'email': site_value('email', 'SITE_EMAIL'),
-    'site_url': site_value('site_url', 'SITE_URL').rstrip('/'),
-    'meta_description': site_value(
-        'meta_description',
-        'SITE_META_DESCRIPTION',
-    ),
-    'asset_version': site_value('asset_version', 'ASSET_VERSION'),
-    'social_image': site_value('social_image', 'SITE_SOCIAL_IMAGE'),
-    'github_url': site_value('github_url', 'SITE_GITHUB_URL'),
-    'linkedin_url': site_value('linkedin_url', 'SITE_LINKEDIN_URL'),
-    'imdb_url': site_value('imdb_url', 'SITE_IMDB_URL'),
-    'location': site_value('location', 'SITE_LOCATION'),
-}
+def build_site(content: dict, use_env: bool = True) -> dict:
+    """Settings for one site from its parsed ``site.toml``.
+
+    The primary site lets ``SITE_*`` environment variables override the
+    file; tenant sites (see ``tenants.py``) take theirs from the file only.
+    """
+    defaults = content['site']
+    config = {}
+    for key, env_var in _SITE_KEYS.items():
+        value = defaults.get(key, '')
+        config[key] = os.getenv(env_var, value) if use_env else value
+    config['site_url'] = config['site_url'].rstrip('/')
+    page_size = content['blog']['page_size']
+    if use_env:
+        page_size = os.getenv('BLOG_PAGE_SIZE', page_size)
+    return {
+        'config': config,
+        'page_size': int(page_size),
+        'nav_links': content['nav_links'],
+        'site_links': content['site_links'],
+    }
+
+
+DEFAULT_SITE = build_site(SITE_CONTENT)
+SITE_CONFIG = DEFAULT_SITE['config']
+BLOG_PAGE_SIZE = DEFAULT_SITE['page_size']
+
+NAV_LINKS = DEFAULT_SITE['nav_links']
+SITE_LINKS = DEFAULT_SITE['site_links']
+
 
-NAV_LINKS = SITE_CONTENT['nav_links']
-SITE_LINKS = SITE_CONTENT['site_links']
+def current_site() -> dict:
+    """The site serving this request (a tenant's, or the primary one)."""
+    if has_request_context():
+        return g.get('site') or DEFAULT_SITE
+    return DEFAULT_SITE
 
 
 def build_absolute_url(path: str) -> str:
-    site_url = SITE_CONFIG['site_url']
+    site_url = current_site()['config']['site_url']
     normalized = path if path.startswith('/') else f'/{path}'
     if site_url:
         return f'{site_url}{normalized}'
@@ -49,19 +78,21 @@ def build_absolute_url(path: str) -> str:
 
 
 def build_social_image_url() -> str:
-    social_image = SITE_CONFIG['social_image']
+    social_image = current_site()['config']['social_image']
     if social_image.startswith(('http://', 'https://')):
         return social_image
     static_path = url_for('static', filename=social_image)
     return build_absolute_url(static_path)
 
 
+@timed('context')
 def build_page_context(**extra) -> dict:
+    site = current_site()
     context = {
-        'config': SITE_CONFIG,
+        'config': site['config'],
         'current_year': datetime.now().year,
-        'nav_links': NAV_LINKS,
-        'site_links': SITE_LINKS,
+        'nav_links': site['nav_links'],
+        'site_links': site['site_links'],
         'canonical_url': build_absolute_url(request.path),
         'social_image_url': build_social_image_url(),
     }
@@ -2,13 +2,39 @@ from pathlib import Path
 import tomllib
 from typing import Any
 
+from instrumentation import timed
+
 
 CONTENT_ROOT = Path(__file__).resolve().parent
 
+# relative path -> ((mtime_ns, size), parsed data). Callers treat the
+# returned dicts as read-only, so cached objects are shared.
+_toml_cache: dict[str, tuple[tuple[int, int], dict[str, Any]]] = {}
+
 
+@timed('toml')
 def load_toml(relative_path: str) -> dict[str, Any]:
     path = CONTENT_ROOT / relative_path
-    return tomllib.loads(path.read_text(encoding='utf-8'))
+    stat = path.stat()
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _toml_cache.get(relative_path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    data = tomllib.loads(path.read_text(encoding='utf-8'))
+    _toml_cache[relative_path] = (signature, data)
+    return data
+
+
+def toml_cache_entries() -> dict[str, tuple[tuple[int, int], dict[str, Any]]]:
+    return dict(_toml_cache)
+
+
+def prime_toml_cache(
+    entries: dict[str, tuple[tuple[int, int], dict[str, Any]]],
+) -> None:
+    """Seed the cache, e.g. from a content snapshot; stale entries are
+    ignored on lookup because their signature no longer matches."""
+    _toml_cache.update(entries)
 
 
 def load_page(slug: str) -> dict[str, Any]:
@@ -0,0 +1,229 @@
+"""``Link`` preload headers for each page's critical sub-resources.
+
+``critical_resources`` reads a rendered page for what the browser would
+otherwise only discover while parsing it: same-origin stylesheets (and
+the stylesheets they ``@import``, which would each cost another round
+trip), the ``<head>`` preloads (fonts, the hero image) and preconnects,
+and same-origin ``<script src>``. ``link_header`` turns them into one
+``Link`` header value.
+
+Flask sends it on every ``200`` HTML response, so a CDN or proxy that
+turns ``Link`` headers into ``103 Early Hints`` can hint the next request
+for the path before the origin answers. Pages in the shared map
+(``serving.py``) carry the value computed when they were rendered; other
+pages reuse one cached under a digest of the body (whose stylesheet URLs
+carry ``asset_version``), so each distinct page is only scanned once.
+
+``freeze.py`` writes the same values for every built page to
+``PRELOAD_HEADERS_MAP`` (default ``nginx-preload.conf``) as an nginx
+``map`` from ``$uri`` to ``$preload_link``, which ``nginx.conf`` includes
+and sends with each page. ``PRELOAD_HEADERS=false`` turns the Flask
+headers off.
+"""
+
+import hashlib
+import html
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+from flask import current_app
+
+PRELOAD_HEADERS = os.getenv('PRELOAD_HEADERS', 'true').lower() == 'true'
+NGINX_MAP_PATH = Path(os.getenv('PRELOAD_HEADERS_MAP', 'nginx-preload.conf'))
+MAX_CACHED_HEADERS = 1024
+
+_headers = OrderedDict()  # body digest -> Link value
+_lock = threading.Lock()
+
+_HEAD_RE = re.compile(r'<head\b.*?</head>', re.DOTALL | re.IGNORECASE)
+_LINK_RE = re.compile(r'<link\b[^>]*>', re.IGNORECASE)
+_SCRIPT_SRC_RE = re.compile(r'<script\b[^>]*?\bsrc="([^"]+)"', re.IGNORECASE)
+_ATTR_RE = re.compile(r'\b([a-z-]+)(?:="([^"]*)")?', re.IGNORECASE)
+_IMPORT_RE = re.compile(r'@import\s+(?:url\()?\s*[\'"]?([^\'")\s;]+)')
+
+
+def _same_origin(url):
+    parts = urlsplit(url)
+    return not parts.scheme and not parts.netloc and url.startswith('/')
+
+
+def _attributes(tag):
+    return {
+        name.lower(): html.unescape(value)
+        for name, value in _ATTR_RE.findall(tag[len('<link'):])
+    }
+
+
+def critical_resources(document, read_stylesheet=None):
+    """``(url, params)`` pairs for the sub-resources a page needs first.
+
+    ``read_stylesheet(url)`` returns a same-origin stylesheet's text (or
+    None) so its ``@import`` rules are followed one level deep.
+    """
+    resources = []
+    head = _HEAD_RE.search(document)
+    for tag in _LINK_RE.findall(head.group() if head else ''):
+        attrs = _attributes(tag)
+        rels = set(attrs.get('rel', '').lower().split())
+        href = attrs.get('href')
+        if not href:
+            continue
+        crossorigin = {'crossorigin': None} if 'crossorigin' in attrs else {}
+        if 'preconnect' in rels:
+            resources.append((href, {'rel': 'preconnect', **crossorigin}))
+        elif 'preload' in rels and attrs.get('as'):
+            resources.append(
+                (href, {'rel': 'preload', 'as': attrs['as'], **crossorigin})
+            )
+        elif 'stylesheet' in rels and _same_origin(href):
+            resources.append((href, {'rel': 'preload', 'as': 'style'}))
+            css = read_stylesheet(href) if read_stylesheet else None
+            for imported in _IMPORT_RE.findall(css or ''):
+                resources.append(
+                    (urljoin(href, imported), {'rel': 'preload', 'as': 'style'})
+                )
+    for src in _SCRIPT_SRC_RE.findall(document):
+        src = html.unescape(src)
+        if _same_origin(src):
+            resources.append((src, {'rel': 'preload', 'as': 'script'}))
+
+    seen = set()
+    unique = []
+    for url, params in resources:
+        if url not in seen:
+            seen.add(url)
+            unique.append((url, params))
+    return unique
+
+
+def link_header(resources):
+    return ', '.join(
+        f'<{url}>' + ''.join(
+            f'; {name}' if value is None else f'; {name}={value}'
+            for name, value in params.items()
+        )
+        for url, params in resources
+    )
+
+
+_stylesheets = {}  # path -> (mtime_ns, size, text)
+
+
+def static_stylesheet_reader(static_dir, static_prefix='/static/'):
+    """Read ``/static/...`` stylesheets from ``static_dir``, cached by mtime."""
+    static_dir = Path(static_dir).resolve()
+
+    def read(url):
+        path = urlsplit(url).path
+        if not path.startswith(static_prefix):
+            return None
+        candidate = (static_dir / path[len(static_prefix):]).resolve()
+        if static_dir not in candidate.parents:
+            return None
+        try:
+            stat = candidate.stat()
+            cached = _stylesheets.get(candidate)
+            if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+                return cached[2]
+            text = candidate.read_text(encoding='utf-8')
+        except OSError:
+            return None
+        _stylesheets[candidate] = (stat.st_mtime_ns, stat.st_size, text)
+        return text
+
+    return read
+
+
+def _page_link_header(body):
+    reader = static_stylesheet_reader(
+        current_app.static_folder, f'{current_app.static_url_path}/',
+    )
+    return link_header(critical_resources(body.decode('utf-8'), reader))
+
+
+def _cache_key(body):
+    """None in debug mode, where stylesheets change under the same URL."""
+    if current_app.debug:
+        return None
+    return hashlib.blake2b(body, digest_size=16).digest()
+
+
+def _add_link_header(response):
+    if (
+        response.status_code != 200
+        or response.mimetype != 'text/html'
+        or response.direct_passthrough
+        or response.is_streamed
+        or 'Link' in response.headers
+    ):
+        return response
+    body = response.get_data()
+    key = _cache_key(body)
+    with _lock:
+        value = _headers.get(key) if key else None
+        if value is not None:
+            _headers.move_to_end(key)
+    if value is None:
+        value = _page_link_header(body)
+        if key:
+            with _lock:
+                _headers[key] = value
+                while len(_headers) > MAX_CACHED_HEADERS:
+                    _headers.popitem(last=False)
+    if value:
+        response.headers['Link'] = value
+    return response
+
+
+def clear_cache():
+    with _lock:
+        _headers.clear()
+
+
+def page_uri(build_dir, path):
+    """The ``$uri`` nginx serves a built file under (after ``index``)."""
+    return '/' + Path(path).relative_to(build_dir).as_posix()
+
+
+def nginx_map(headers):
+    """An nginx ``map`` from ``$uri`` to the page's ``Link`` value."""
+    def quote(value):
+        return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+    lines = [
+        '# Generated by freeze.py (early_hints.py); do not edit.',
+        'map $uri $preload_link {',
+        '    default "";',
+    ]
+    lines.extend(
+        f'    {quote(uri)} {quote(value)};'
+        for uri, value in sorted(headers.items())
+    )
+    lines.append('}')
+    return '\n'.join(lines) + '\n'
+
+
+def write_nginx_map(build_dir, path=NGINX_MAP_PATH):
+    """Write the header map for every built page; return ``(path, pages)``."""
+    build_dir = Path(build_dir)
+    reader = static_stylesheet_reader(build_dir / 'static')
+    headers = {}
+    for page in sorted(build_dir.rglob('*.html')):
+        resources = critical_resources(
+            page.read_text(encoding='utf-8'), reader,
+        )
+        if resources:
+            headers[page_uri(build_dir, page)] = link_header(resources)
+    path = Path(path)
+    path.write_text(nginx_map(headers), encoding='utf-8')
+    return path, len(headers)
+
+
+def init_app(app):
+    """Send ``Link`` preload headers with rendered pages."""
+    if PRELOAD_HEADERS:
+        app.after_request(_add_link_header)
@@ -0,0 +1,167 @@
+"""Atom and RSS feeds built from the post store.
+
+Feed readers poll far more often than posts change, so each entry's XML
+fragment is cached under the post's ``content_hash`` and ``<updated>``
+time: a poll after an edit re-serialises only the edited entry. Feeds are
+streamed, capped at ``FEED_SIZE`` entries, and carry an ETag derived from
+the same entry keys so a conditional poll is answered with a 304 without
+building any XML.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from xml.sax.saxutils import escape, quoteattr
+
+from blog.store import content_hash, post_tags
+
+FEED_SIZE = int(os.getenv('FEED_SIZE', '20'))
+MAX_CACHED_FRAGMENTS = 512
+
+CONTENT_TYPES = {
+    'atom': 'application/atom+xml; charset=utf-8',
+    'rss': 'application/rss+xml; charset=utf-8',
+}
+
+_fragments = OrderedDict()
+_lock = threading.Lock()
+
+
+def _as_utc(value):
+    if value is None:
+        return datetime(1970, 1, 1, tzinfo=timezone.utc)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def published_at(post):
+    return _as_utc(post.get('date') or post.get('updated_at'))
+
+
+def updated_at(post):
+    return _as_utc(post.get('updated_at') or post.get('date'))
+
+
+def _entry_key(post):
+    """What an entry's XML depends on besides the feed kind and base URL."""
+    return (
+        post.get('content_hash') or content_hash(post),
+        updated_at(post).isoformat(),
+    )
+
+
+def last_modified(posts):
+    return max((updated_at(post) for post in posts), default=None)
+
+
+def feed_etag(kind, posts, base_url):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f'{kind}\0{base_url}'.encode('utf-8'))
+    for post in posts:
+        digest.update('\0'.join(_entry_key(post)).encode('ascii'))
+    return digest.hexdigest()
+
+
+def atom_entry(post, base_url):
+    url = f'{base_url}/blog/{post["slug"]}/'
+    summary = post.get('description') or post.get('excerpt') or ''
+    categories = ''.join(
+        f'<category term={quoteattr(tag)}/>' for tag in post_tags(post)
+    )
+    return (
+        '<entry>'
+        f'<title>{escape(post["title"])}</title>'
+        f'<link rel="alternate" href={quoteattr(url)}/>'
+        f'<id>{escape(url)}</id>'
+        f'<published>{published_at(post).isoformat()}</published>'
+        f'<updated>{updated_at(post).isoformat()}</updated>'
+        f'<summary>{escape(summary)}</summary>'
+        f'<content type="html">{escape(post.get("content", ""))}</content>'
+        f'{categories}'
+        '</entry>\n'
+    )
+
+
+def rss_item(post, base_url):
+    url = f'{base_url}/blog/{post["slug"]}/'
+    summary = post.get('description') or post.get('excerpt') or ''
+    categories = ''.join(
+        f'<category>{escape(tag)}</category>' for tag in post_tags(post)
+    )
+    return (
+        '<item>'
+        f'<title>{escape(post["title"])}</title>'
+        f'<link>{escape(url)}</link>'
+        f'<guid isPermaLink="true">{escape(url)}</guid>'
+        f'<pubDate>{format_datetime(published_at(post))}</pubDate>'
+        f'<description>{escape(summary)}</description>'
+        f'<content:encoded>{escape(post.get("content", ""))}</content:encoded>'
+        f'{categories}'
+        '</item>\n'
+    )
+
+
+_SERIALIZERS = {'atom': atom_entry, 'rss': rss_item}
+
+
+def entry_fragment(kind, post, base_url):
+    """Return the cached XML for one entry, serialising it on a miss."""
+    key = (kind, base_url, *_entry_key(post))
+    with _lock:
+        fragment = _fragments.get(key)
+        if fragment is not None:
+            _fragments.move_to_end(key)
+            return fragment
+    fragment = _SERIALIZERS[kind](post, base_url)
+    with _lock:
+        _fragments[key] = fragment
+        while len(_fragments) > MAX_CACHED_FRAGMENTS:
+            _fragments.popitem(last=False)
+    return fragment
+
+
+def clear_cache():
+    with _lock:
+        _fragments.clear()
+
+
+def generate_feed(kind, posts, base_url, site):
+    """Yield the feed document piece by piece."""
+    updated = last_modified(posts) or datetime.now(timezone.utc)
+    title = escape(site['name'])
+    subtitle = escape(site.get('tagline') or '')
+    if kind == 'atom':
+        yield (
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<feed xmlns="http://www.w3.org/2005/Atom">\n'
+            f'<title>{title}</title>'
+            f'<subtitle>{subtitle}</subtitle>'
+            f'<link rel="self" href={quoteattr(base_url + "/feed.xml")}/>'
+            f'<link rel="alternate" href={quoteattr(base_url + "/blog/")}/>'
+            f'<id>{escape(base_url)}/</id>'
+            f'<updated>{updated.isoformat()}</updated>'
+            f'<author><name>{title}</name></author>\n'
+        )
+        closing = '</feed>\n'
+    else:
+        yield (
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<rss version="2.0" '
+            'xmlns:atom="http://www.w3.org/2005/Atom" '
+            'xmlns:content="http://purl.org/rss/1.0/modules/content/">\n'
+            '<channel>'
+            f'<title>{title}</title>'
+            f'<link>{escape(base_url)}/blog/</link>'
+            f'<description>{subtitle}</description>'
+            f'<atom:link rel="self" type="application/rss+xml" '
+            f'href={quoteattr(base_url + "/rss.xml")}/>'
+            f'<lastBuildDate>{format_datetime(updated)}</lastBuildDate>\n'
+        )
+        closing = '</channel>\n</rss>\n'
+    for post in posts:
+        yield entry_fragment(kind, post, base_url)
+    yield closing
@@ -1,9 +1,22 @@
+import math
 import os
 import shutil
 from pathlib import Path
-
-from app import SITE_CONFIG, app
+from typing import Any, Dict, List
+
+from app import BLOG_PAGE_SIZE, BUILD_METRICS, SITE_CONFIG, app, blog_page_href
+from app import load_build_metrics
+from authoring_app import create_app as create_authoring_app
+from blog import PostStore, get_store
+from blog.snapshot import write_snapshot
+from metrics import LEDGER_PATH, refresh_ledger
+from minify import MINIFY_OUTPUT, minify_files
+from prefetch import apply_prefetch
 from content.loader import message
+from early_hints import write_nginx_map
+from profiler import profiled
+from service_worker import SERVICE_WORKER, build_service_worker
+from templating import precompile_templates
 
 
 BUILD_DIR = Path('build')
@@ -20,8 +33,88 @@ def write_file(destination: Path, content: str) -> None:
     destination.write_text(content, encoding='utf-8')
 
 
+def route_destination(route: str) -> Path:
+    """Map a site route to its file under ``BUILD_DIR``."""
+    relative = route.strip('/')
+    if not relative:
+        return BUILD_DIR / 'index.html'
+    if route.endswith('/'):
+        return BUILD_DIR / relative / 'index.html'
+    return BUILD_DIR / relative
+
+
+def _page_hrefs(posts: List[Dict[str, Any]], base: str) -> List[str]:
+    pages = max(1, math.ceil(len(posts) / BLOG_PAGE_SIZE))
+    return [blog_page_href(page, base) for page in range(1, pages + 1)]
+
+
+def collect_routes(store: PostStore) -> List[str]:
+    """Every route the static build renders, one file per route."""
+    posts = store.posts
+    archives = sorted(store.archive, key=lambda key: (key[0], key[1] or 0))
+    return [
+        '/',
+        '/feed.xml',
+        '/rss.xml',
+        '/sitemap.xml',
+        '/robots.txt',
+        *_page_hrefs(posts, '/blog/'),
+        *(f'/blog/{post["slug"]}/' for post in posts),
+        *(
+            href for slug in sorted(store.tags)
+            for href in _page_hrefs(store.tags[slug], f'/blog/tag/{slug}/')
+        ),
+        *(
+            href for year, month in archives
+            for href in _page_hrefs(
+                store.archive[year, month],
+                f'/blog/{year}/{month:02d}/' if month else f'/blog/{year}/',
+            )
+        ),
+    ]
+
+
+def precompile_all_templates() -> None:
+    """Fill the shared bytecode cache for both apps' templates."""
+    for flask_app in (app, create_authoring_app()):
+        if flask_app.jinja_env.bytecode_cache is None:
+            continue
+        count = precompile_templates(flask_app)
+        print(message('freeze', 'precompiled', count=count, app=flask_app.name))
+
+
+def minify_build(paths: List[Path]) -> None:
+    before_total = after_total = 0
+    for path, before, after in minify_files(paths):
+        before_total += before
+        after_total += after
+        print(
+            message(
+                'freeze',
+                'minified',
+                path=path.relative_to(BUILD_DIR),
+                before=before,
+                after=after,
+                saved=before - after,
+            )
+        )
+    print(
+        message(
+            'freeze',
+            'minified_total',
+            count=len(paths),
+            saved=before_total - after_total,
+            percent=100 * (before_total - after_total) / (before_total or 1),
+        )
+    )
+
+
+@profiled('build_static_site')
 def build_static_site() -> None:
     require_site_url_for_static_build()
+    # Only the build updates the commit ledger; the app just reads it.
+    refresh_ledger(LEDGER_PATH)
+    BUILD_METRICS.update(load_build_metrics())
 
     base_path = os.getenv('GITHUB_PAGES_BASE_PATH', '')
     normalized_base_path = base_path.strip()
@@ -39,18 +132,18 @@ def build_static_site() -> None:
     original_base_path = app.config.get('SITE_BASE_PATH', '')
     app.config['SITE_BASE_PATH'] = normalized_base_path
 
+    written = []
     with app.app_context():
         with app.test_client() as client:
-            static_routes = [
-                ('/', BUILD_DIR / 'index.html'),
-            ]
-            for route, destination in static_routes:
+            for route in collect_routes(get_store()):
+                destination = route_destination(route)
                 response = client.get(route, follow_redirects=True)
                 if response.status_code != 200:
                     raise RuntimeError(
                         message('freeze', 'render_failed', route=route)
                     )
                 write_file(destination, response.data.decode('utf-8'))
+                written.append(destination)
                 print(
                     message(
                         'freeze',
@@ -62,6 +155,36 @@ def build_static_site() -> None:
     write_file(BUILD_DIR / '.nojekyll', '')
     app.config['SITE_BASE_PATH'] = original_base_path
 
+    hinted = apply_prefetch(BUILD_DIR, normalized_base_path)
+    if hinted:
+        print(message('freeze', 'prefetch', count=hinted))
+
+    if MINIFY_OUTPUT:
+        minify_build(written)
+    if SERVICE_WORKER:
+        path, version, shell = build_service_worker(
+            BUILD_DIR, normalized_base_path,
+        )
+        print(
+            message(
+                'freeze',
+                'service_worker',
+                path=path.relative_to(BUILD_DIR),
+                version=version,
+                count=len(shell),
+            )
+        )
+    header_map, pages = write_nginx_map(BUILD_DIR)
+    print(message('freeze', 'preload_headers', path=header_map, count=pages))
+
+    precompile_all_templates()
+    store = get_store()
+    snapshot = write_snapshot(store)
+    print(message('freeze', 'snapshot', path=snapshot))
+    next_publish = store.next_publish_at()
+    if next_publish is not None:
+        print(message('freeze', 'next_rebuild', at=next_publish.isoformat()))
+
     print(f"\n{message('freeze', 'complete')}")
 
 
@@ -0,0 +1,21 @@
+import os
+
+wsgi_app = 'wsgi:application'
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+# Import the app (and warm its caches) in the master; workers share the
+# result copy-on-write instead of each building their own.
+preload_app = True
+# Recycled workers are re-forked from the warm master, so recycling is cheap.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = max_requests // 10
+
+
+def post_fork(server, worker):
+    # Each worker starts its own Markdown sandbox pool (MARKDOWN_SANDBOX);
+    # one inherited from the master would have no handler threads.
+    from blog.rendering import get_sandbox
+
+    sandbox = get_sandbox()
+    if sandbox is not None:
+        sandbox.start()
@@ -0,0 +1,210 @@
+"""Opt-in per-request timing for the hot paths.
+
+Set ``INSTRUMENTATION=true`` (or the ``INSTRUMENTATION`` config key) and
+``init_app`` wires three things into a Flask app:
+
+* every request collects spans for the phases it runs (post loading,
+  Markdown, TOML parsing, context building, Jinja rendering, …),
+* responses carry a ``Server-Timing`` header summarising those spans,
+* ``/__metrics`` exposes process-wide histograms in Prometheus text format,
+  plus any gauges and counters from ``register_collector`` callbacks.
+
+When disabled nothing is registered and ``span``/``timed`` reduce to a
+single flag check, so the hooks can stay in the hot paths permanently.
+"""
+
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+from flask import Response, before_render_template, g, has_request_context
+from flask import request, template_rendered
+
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_enabled = False
+_lock = threading.Lock()
+_histograms = {}
+_collectors = []
+_NULL_SPAN = nullcontext()
+
+
+def is_enabled():
+    return _enabled
+
+
+class Histogram:
+    """Cumulative Prometheus-style histogram with fixed buckets."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[index] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += seconds
+        self.count += 1
+
+
+def observe(metric, label, seconds):
+    with _lock:
+        key = (metric, label)
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+        histogram.observe(seconds)
+
+
+def register_collector(collect):
+    """Add ``collect() -> [(name, type, help, value), …]`` to ``/__metrics``."""
+    if collect not in _collectors:
+        _collectors.append(collect)
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+
+def _record(phase, seconds):
+    observe('phase', phase, seconds)
+    if has_request_context():
+        spans = g.setdefault('_timing_spans', {})
+        spans[phase] = spans.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def _span(phase):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(phase, time.perf_counter() - start)
+
+
+def span(phase):
+    """Context manager timing one phase; a shared no-op when disabled."""
+    if not _enabled:
+        return _NULL_SPAN
+    return _span(phase)
+
+
+def timed(phase):
+    """Decorator form of ``span`` for whole functions."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _span(phase):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def render_prometheus():
+    """Serialise all histograms in the Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        items = sorted(_histograms.items())
+    for metric in ('phase', 'request'):
+        name = f'site_{metric}_duration_seconds'
+        label_name = 'phase' if metric == 'phase' else 'endpoint'
+        lines.append(f'# HELP {name} Time spent per {label_name}.')
+        lines.append(f'# TYPE {name} histogram')
+        for (kind, label), histogram in items:
+            if kind != metric:
+                continue
+            cumulative = 0
+            for bound, count in zip(BUCKETS, histogram.counts):
+                cumulative += count
+                lines.append(
+                    f'{name}_bucket{{{label_name}="{label}",le="{bound}"}} '
+                    f'{cumulative}'
+                )
+            lines.append(
+                f'{name}_bucket{{{label_name}="{label}",le="+Inf"}} '
+                f'{histogram.count}'
+            )
+            lines.append(
+                f'{name}_sum{{{label_name}="{label}"}} {histogram.total}'
+            )
+            lines.append(
+                f'{name}_count{{{label_name}="{label}"}} {histogram.count}'
+            )
+    for collect in _collectors:
+        for name, kind, description, value in collect():
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.append(f'{name} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def server_timing_header(spans, total):
+    parts = [
+        f'{phase};dur={seconds * 1000:.2f}'
+        for phase, seconds in spans.items()
+    ]
+    parts.append(f'total;dur={total * 1000:.2f}')
+    return ', '.join(parts)
+
+
+def _before_request():
+    g._timing_start = time.perf_counter()
+    g._timing_spans = {}
+
+
+def _after_request(response):
+    start = g.pop('_timing_start', None)
+    if start is None:
+        return response
+    total = time.perf_counter() - start
+    observe('request', request.endpoint or 'unmatched', total)
+    response.headers['Server-Timing'] = server_timing_header(
+        g.pop('_timing_spans', {}), total,
+    )
+    return response
+
+
+def _render_started(sender, template, context, **extra):
+    g._timing_render_start = time.perf_counter()
+
+
+def _render_finished(sender, template, context, **extra):
+    start = g.pop('_timing_render_start', None)
+    if start is not None:
+        _record('render', time.perf_counter() - start)
+
+
+def _metrics_view():
+    return Response(
+        render_prometheus(),
+        content_type='text/plain; version=0.0.4',
+    )
+
+
+def init_app(app):
+    """Register timing hooks on ``app`` when instrumentation is enabled."""
+    global _enabled
+
+    enabled = app.config.setdefault(
+        'INSTRUMENTATION',
+        os.getenv('INSTRUMENTATION', '').lower() == 'true',
+    )
+    if not enabled:
+        return
+
+    _enabled = True
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    before_render_template.connect(_render_started, app, weak=False)
+    template_rendered.connect(_render_finished, app, weak=False)
+    app.add_url_rule('/__metrics', 'instrumentation_metrics', _metrics_view)
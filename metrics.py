@@ -8,16 +8,36 @@ build time.
 Every value degrades to None when git or the .git directory is missing
 (the production Docker image has neither); the dashboard renders those
 as "n/a" rather than inventing numbers.
+
+Counting every commit needs the full history. To let the build run from
+a shallow clone, ``collect_metrics`` can keep a ledger: a small JSON file
+with the total and per-week (Monday, UTC) commit counts up to a known
+commit. ``refresh_ledger`` (run by ``freeze.py`` and ``make
+metrics-ledger``) scans only ``<known commit>..HEAD`` and rewrites the
+ledger, which is kept in the build cache between runs. If its commit is
+missing from a shallow clone, the history is fetched once
+(``--unshallow``) and the ledger is rebuilt from it. ``collect_metrics``
+only reads the ledger, so importing the app never writes to the tree or
+touches the network.
 """
 
+import json
+import os
 import subprocess
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
 
 SPARKLINE_WEEKS = 12
+LEDGER_WEEKS = 52
+LEDGER_VERSION = 1
+LEDGER_PATH = Path(
+    os.getenv('METRICS_LEDGER', '.build-cache/metrics-ledger.json')
+)
 _GIT_TIMEOUT_SECONDS = 10
+_FETCH_TIMEOUT_SECONDS = 300
 
 
-def _git(args, cwd=None):
+def _git(args, cwd=None, timeout=_GIT_TIMEOUT_SECONDS):
     """Run a git command; return stripped stdout, or None on any failure."""
     try:
         result = subprocess.run(
@@ -25,7 +45,7 @@ def _git(args, cwd=None):
             capture_output=True,
             text=True,
             check=True,
-            timeout=_GIT_TIMEOUT_SECONDS,
+            timeout=timeout,
             cwd=cwd,
         )
     except (OSError, subprocess.CalledProcessError, subprocess.TimeoutExpired):
@@ -69,16 +89,123 @@ def bar_heights(counts, floor=6):
     ]
 
 
-def collect_metrics(repo_dir=None, now=None):
+def week_start(moment):
+    """Monday (UTC) of the week containing ``moment``, as an ISO date."""
+    day = moment.astimezone(timezone.utc).date()
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+
+def _count_commits(raw, ledger):
+    """Add commits (one ``%ct`` timestamp per line) to ``ledger``."""
+    weeks = ledger['weeks']
+    for line in raw.splitlines():
+        moment = datetime.fromtimestamp(int(line), tz=timezone.utc)
+        key = week_start(moment)
+        weeks[key] = weeks.get(key, 0) + 1
+        ledger['total'] += 1
+    for key in sorted(weeks)[:-LEDGER_WEEKS]:
+        del weeks[key]
+    return ledger
+
+
+def _unshallow(repo_dir):
+    """Fetch the full history if this is a shallow clone."""
+    shallow = _git(['rev-parse', '--is-shallow-repository'], cwd=repo_dir)
+    if shallow == 'true':
+        _git(
+            ['fetch', '--unshallow', '--quiet'],
+            cwd=repo_dir, timeout=_FETCH_TIMEOUT_SECONDS,
+        )
+
+
+def _is_ancestor(commit, repo_dir):
+    return _git(
+        ['merge-base', '--is-ancestor', commit, 'HEAD'], cwd=repo_dir,
+    ) is not None
+
+
+def update_ledger(ledger, repo_dir=None):
+    """Bring ``ledger`` up to HEAD, scanning only commits it hasn't seen.
+
+    Returns the updated ledger, or None without git.
+    """
+    head = _git(['rev-parse', 'HEAD'], cwd=repo_dir)
+    if head is None:
+        return None
+    if ledger and ledger.get('version') == LEDGER_VERSION:
+        if ledger['commit'] == head:
+            return ledger
+        known = ledger['commit']
+        if not _is_ancestor(known, repo_dir):
+            _unshallow(repo_dir)
+        if _is_ancestor(known, repo_dir):
+            raw = _git(['log', '--format=%ct', f'{known}..HEAD'], cwd=repo_dir)
+            if raw is not None:
+                ledger = dict(ledger, weeks=dict(ledger['weeks']), commit=head)
+                return _count_commits(raw, ledger)
+    # No usable ledger (first run, history rewritten): one full scan.
+    _unshallow(repo_dir)
+    raw = _git(['log', '--format=%ct', 'HEAD'], cwd=repo_dir)
+    if raw is None:
+        return None
+    fresh = {'version': LEDGER_VERSION, 'commit': head, 'total': 0, 'weeks': {}}
+    return _count_commits(raw, fresh)
+
+
+def load_ledger(path):
+    try:
+        return json.loads(Path(path).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+def save_ledger(ledger, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(ledger, sort_keys=True), encoding='utf-8')
+
+
+def ledger_weekly_counts(ledger, now, weeks=SPARKLINE_WEEKS):
+    """Per-week counts, oldest first, for the `weeks` weeks ending ``now``."""
+    this_week = date.fromisoformat(week_start(now))
+    return [
+        ledger['weeks'].get(
+            (this_week - timedelta(weeks=weeks_ago)).isoformat(), 0,
+        )
+        for weeks_ago in range(weeks - 1, -1, -1)
+    ]
+
+
+def refresh_ledger(ledger_path, repo_dir=None):
+    """Bring the ledger at ``ledger_path`` up to HEAD and save it.
+
+    May fetch history (see module docstring), so only build steps call it.
+    """
+    ledger = update_ledger(load_ledger(ledger_path), repo_dir=repo_dir)
+    if ledger is not None:
+        save_ledger(ledger, ledger_path)
+    return ledger
+
+
+def collect_metrics(repo_dir=None, now=None, ledger_path=None):
     """Assemble the dashboard metrics dict.
 
     `repo_dir` and `now` exist so tests can inject a fixed repo path and
-    a frozen clock instead of depending on the real environment.
+    a frozen clock instead of depending on the real environment. With
+    `ledger_path`, totals and weekly counts are read from the ledger
+    there (see module docstring) when it holds one; this never updates
+    it. Otherwise they come from a scan of the local history.
     """
     now = now or datetime.now(timezone.utc)
 
-    total = _git(['rev-list', '--count', 'HEAD'], cwd=repo_dir)
     last_commit_iso = _git(['log', '-1', '--format=%cI'], cwd=repo_dir)
+    ledger = load_ledger(ledger_path) if ledger_path is not None else None
+    if ledger and ledger.get('version') == LEDGER_VERSION:
+        total = ledger['total']
+        weekly = ledger_weekly_counts(ledger, now)
+    else:
+        total = _git(['rev-list', '--count', 'HEAD'], cwd=repo_dir)
+        weekly = _weekly_commit_counts(now, repo_dir=repo_dir)
 
     return {
         'available': total is not None,
@@ -87,6 +214,6 @@ def collect_metrics(repo_dir=None, now=None):
             datetime.fromisoformat(last_commit_iso)
             if last_commit_iso else None
         ),
-        'weekly_commits': _weekly_commit_counts(now, repo_dir=repo_dir),
+        'weekly_commits': weekly,
         'generated_at': now,
     }
@@ -0,0 +1,98 @@
+"""Whitespace and comment minifier for frozen HTML and XML pages.
+
+Opt-in with ``MINIFY_OUTPUT=true``. ``freeze.py`` runs it over the files
+it wrote, before any compression of the build, so compressed copies are
+made from the smaller bytes.
+
+HTML: runs of ASCII whitespace between tokens collapse to one character
+(a newline if the run had one, otherwise a space), which leaves the
+rendered text unchanged. ``pre``, ``code``, ``textarea``, ``script`` and
+``style`` elements are copied verbatim. Quoted attribute values are not
+touched, and comments are dropped except conditional comments. XML: only
+whitespace-only runs that span lines between two tags (template
+indentation) are removed.
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+MINIFY_OUTPUT = os.getenv('MINIFY_OUTPUT', 'false').lower() == 'true'
+
+_QUOTED = r'"[^"]*"|\'[^\']*\''
+_HTML_TOKEN_RE = re.compile(
+    r'(?P<raw><(?P<name>pre|code|textarea|script|style)\b'
+    rf'(?:{_QUOTED}|[^\'">])*>.*?</(?P=name)\s*>)'
+    r'|(?P<comment><!--.*?-->)'
+    rf'|(?P<tag></?[A-Za-z!][^\'">]*(?:(?:{_QUOTED})[^\'">]*)*>)',
+    re.IGNORECASE | re.DOTALL,
+)
+_TAG_SPACE_RE = re.compile(rf'({_QUOTED})|[ \t\n\r\f]+')
+_TAG_END_RE = re.compile(r'[ \t\n\r\f]+(/?>)$')
+_SPACE_RE = re.compile(r'[ \t\n\r\f]+')
+_XML_INDENT_RE = re.compile(r'>[ \t\r]*\n[ \t\r\n]*<')
+_XML_COMMENT_RE = re.compile(r'<!--.*?-->', re.DOTALL)
+
+
+def _collapse(match):
+    return '\n' if '\n' in match.group() else ' '
+
+
+def _minify_tag(tag):
+    tag = _TAG_SPACE_RE.sub(lambda m: m.group(1) or _collapse(m), tag)
+    return _TAG_END_RE.sub(r'\1', tag)
+
+
+def minify_html(document):
+    parts = []
+    text = []  # text since the last kept token; dropped comments join it
+    position = 0
+    for match in _HTML_TOKEN_RE.finditer(document):
+        text.append(document[position:match.start()])
+        position = match.end()
+        comment = match.group('comment')
+        if comment and not comment.startswith('<!--[if'):
+            continue
+        parts.append(_SPACE_RE.sub(_collapse, ''.join(text)))
+        text = []
+        if match.group('tag'):
+            parts.append(_minify_tag(match.group('tag')))
+        else:
+            parts.append(match.group())
+    text.append(document[position:])
+    parts.append(_SPACE_RE.sub(_collapse, ''.join(text)))
+    return ''.join(parts).strip() + '\n'
+
+
+def minify_xml(document):
+    document = _XML_COMMENT_RE.sub('', document)
+    return _XML_INDENT_RE.sub('><', document).strip() + '\n'
+
+
+_MINIFIERS = {'.html': minify_html, '.xml': minify_xml}
+
+
+def minify_file(path):
+    """Minify ``path`` in place; return ``(path, bytes_before, bytes_after)``."""
+    path = Path(path)
+    minifier = _MINIFIERS.get(path.suffix)
+    original = path.read_bytes()
+    if minifier is None:
+        return path, len(original), len(original)
+    minified = minifier(original.decode('utf-8')).encode('utf-8')
+    if len(minified) >= len(original):
+        return path, len(original), len(original)
+    path.write_bytes(minified)
+    return path, len(original), len(minified)
+
+
+def minify_files(paths, workers=None):
+    """Minify ``paths`` across a process pool; return per-file results."""
+    paths = list(paths)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) < 2:
+        return [minify_file(path) for path in paths]
+    chunksize = max(1, len(paths) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(minify_file, paths, chunksize=chunksize))
@@ -0,0 +1,120 @@
+"""Prefetch hints for the static build, from its internal link graph.
+
+After ``freeze.py`` has rendered every page, ``apply_prefetch`` reads the
+links inside each page's ``<main>`` (the navbar and footer are the same on
+every page, and ``script.js`` prefetches them on hover) and keeps those
+that point at another built page. A page's top ``PREFETCH_LIMIT``
+destinations, ranked by how often the page links to them, then by how
+many pages link to them, then by position, go into a
+``<script type="speculationrules">`` block before ``</head>``: all of them
+are prefetched, and the first is prerendered once the pointer rests on a
+link to it. Browsers without Speculation Rules get the same list as
+``<link rel="prefetch">`` tags from ``script.js`` when the page is idle.
+
+Browsers skip speculative loads under Save-Data; ``script.js`` does the
+same. ``PREFETCH_LIMIT=0`` turns the hints off.
+"""
+
+import json
+import os
+import re
+from collections import Counter
+from pathlib import Path
+
+PREFETCH_LIMIT = int(os.getenv('PREFETCH_LIMIT', '4'))
+PRERENDER_LIMIT = 1
+
+_MAIN_RE = re.compile(r'<main\b.*?</main>', re.DOTALL | re.IGNORECASE)
+_HREF_RE = re.compile(r'<a\b[^>]*?\bhref="([^"]*)"', re.IGNORECASE)
+_HEAD_END_RE = re.compile(r'</head>', re.IGNORECASE)
+
+
+def page_url(build_dir, path, base_path=''):
+    """The URL a built ``.html`` file is served at."""
+    relative = Path(path).relative_to(build_dir).as_posix()
+    if relative == 'index.html':
+        return f'{base_path}/'
+    if relative.endswith('/index.html'):
+        return f'{base_path}/{relative[:-len("index.html")]}'
+    return f'{base_path}/{relative}'
+
+
+def page_links(document):
+    """Root-relative hrefs in ``<main>``, without fragment or query, in order."""
+    main = _MAIN_RE.search(document)
+    if main is None:
+        return []
+    links = []
+    for href in _HREF_RE.findall(main.group()):
+        href = href.split('#', 1)[0].split('?', 1)[0]
+        if href.startswith('/') and not href.startswith('//'):
+            links.append(href)
+    return links
+
+
+def link_graph(pages):
+    """``{url: Counter(destination url -> links)}`` between built pages."""
+    graph = {}
+    for url, document in pages.items():
+        graph[url] = Counter(
+            href for href in page_links(document)
+            if href in pages and href != url
+        )
+    return graph
+
+
+def top_destinations(graph, limit=PREFETCH_LIMIT):
+    """Each page's most likely next pages, best first."""
+    inbound = Counter(
+        destination for links in graph.values() for destination in links
+    )
+    ranked = {}
+    for url, links in graph.items():
+        order = {destination: index for index, destination in enumerate(links)}
+        ranked[url] = sorted(
+            links,
+            key=lambda destination: (
+                -links[destination], -inbound[destination], order[destination],
+            ),
+        )[:limit]
+    return ranked
+
+
+def speculation_rules(urls, prerender=PRERENDER_LIMIT):
+    rules = {'prefetch': [{'source': 'list', 'urls': urls}]}
+    if prerender and urls:
+        rules['prerender'] = [{
+            'source': 'list',
+            'urls': urls[:prerender],
+            'eagerness': 'moderate',
+        }]
+    return (
+        '    <script type="speculationrules">'
+        f'{json.dumps(rules, separators=(",", ":"))}</script>\n'
+    )
+
+
+def apply_prefetch(build_dir, base_path='', limit=PREFETCH_LIMIT):
+    """Add speculation rules to every built page; return the pages changed."""
+    if limit <= 0:
+        return 0
+    build_dir = Path(build_dir)
+    paths = {
+        page_url(build_dir, path, base_path): path
+        for path in sorted(build_dir.rglob('*.html'))
+    }
+    pages = {
+        url: path.read_text(encoding='utf-8') for url, path in paths.items()
+    }
+    changed = 0
+    for url, urls in top_destinations(link_graph(pages), limit).items():
+        document = pages[url]
+        if not urls or not _HEAD_END_RE.search(document):
+            continue
+        updated = _HEAD_END_RE.sub(
+            lambda match: speculation_rules(urls) + match.group(),
+            document, count=1,
+        )
+        paths[url].write_text(updated, encoding='utf-8')
+        changed += 1
+    return changed
@@ -0,0 +1,217 @@
+"""Sampling profiler for slow requests and offline build analysis.
+
+Enable with ``PROFILE_SLOW_REQUESTS=true``. A single daemon thread samples
+the stack of every thread inside a profiled section (a request, a
+``load_posts`` call, a static build) every ``PROFILE_INTERVAL_MS``. When
+the section finishes faster than ``PROFILE_THRESHOLD_MS`` its samples are
+dropped; slower sections are written to ``PROFILE_DIR`` as collapsed
+stacks (``flamegraph.pl``/speedscope compatible) or, with
+``PROFILE_FORMAT=speedscope``, as speedscope JSON. Only the newest
+``PROFILE_KEEP`` files are kept.
+
+Nested sections on one thread fold into the outermost one, so a slow
+request that spends its time in ``load_posts`` produces a single file.
+While no section is running the sampler thread waits rather than waking
+every interval.
+"""
+
+import functools
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+from flask import g, request
+
+_settings = {
+    'enabled': False,
+    'interval': 0.005,
+    'threshold': 0.25,
+    'directory': Path('profiles'),
+    'keep': 50,
+    'format': 'collapsed',
+}
+_active = {}
+_lock = threading.Lock()
+_busy = threading.Condition(_lock)  # notified when a section starts
+_sampler = None
+
+
+def configure(**overrides):
+    """Load settings from the environment, then apply ``overrides``."""
+    _settings.update({
+        'enabled': os.getenv('PROFILE_SLOW_REQUESTS', '').lower() == 'true',
+        'interval': float(os.getenv('PROFILE_INTERVAL_MS', '5')) / 1000,
+        'threshold': float(os.getenv('PROFILE_THRESHOLD_MS', '250')) / 1000,
+        'directory': Path(os.getenv('PROFILE_DIR', 'profiles')),
+        'keep': int(os.getenv('PROFILE_KEEP', '50')),
+        'format': os.getenv('PROFILE_FORMAT', 'collapsed'),
+    })
+    _settings.update(overrides)
+    return _settings
+
+
+def is_enabled():
+    return _settings['enabled']
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f'{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})'
+
+
+def fold_stack(frame):
+    """Return the stack as a root-first tuple of frame labels."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return tuple(labels)
+
+
+def _sample_loop():
+    while True:
+        with _busy:
+            _busy.wait_for(lambda: _active)
+        time.sleep(_settings['interval'])
+        with _lock:
+            frames = sys._current_frames()
+            for thread_id, samples in _active.items():
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    samples[fold_stack(frame)] += 1
+
+
+def _ensure_sampler():
+    global _sampler
+    if _sampler is None or not _sampler.is_alive():
+        _sampler = threading.Thread(
+            target=_sample_loop, name='site-profiler', daemon=True,
+        )
+        _sampler.start()
+
+
+def start():
+    """Begin sampling the current thread; returns a token for ``stop``."""
+    thread_id = threading.get_ident()
+    with _lock:
+        if thread_id in _active:
+            return None
+        _active[thread_id] = Counter()
+        _busy.notify()
+    _ensure_sampler()
+    return thread_id, time.perf_counter()
+
+
+def stop(token, name):
+    """Stop sampling; write a profile if the section exceeded the threshold."""
+    if token is None:
+        return None
+    thread_id, started = token
+    with _lock:
+        samples = _active.pop(thread_id, Counter())
+    elapsed = time.perf_counter() - started
+    if elapsed < _settings['threshold'] or not samples:
+        return None
+    return write_profile(name, samples, elapsed)
+
+
+def to_collapsed(samples):
+    return ''.join(
+        f'{";".join(stack)} {count}\n' for stack, count in samples.items()
+    )
+
+
+def to_speedscope(name, samples, interval):
+    frames = []
+    index = {}
+    encoded = []
+    weights = []
+    for stack, count in samples.items():
+        row = []
+        for label in stack:
+            if label not in index:
+                index[label] = len(frames)
+                frames.append({'name': label})
+            row.append(index[label])
+        encoded.append(row)
+        weights.append(count * interval * 1000)
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'shared': {'frames': frames},
+        'profiles': [{
+            'type': 'sampled',
+            'name': name,
+            'unit': 'milliseconds',
+            'startValue': 0,
+            'endValue': sum(weights),
+            'samples': encoded,
+            'weights': weights,
+        }],
+        'name': name,
+    }
+
+
+def _prune(directory):
+    files = sorted(directory.glob('*.profile*'))
+    for stale in files[:max(0, len(files) - _settings['keep'])]:
+        stale.unlink(missing_ok=True)
+
+
+def write_profile(name, samples, elapsed):
+    directory = _settings['directory']
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+    safe_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('_') or 'root'
+    base = f'{stamp}-{round(elapsed * 1000)}ms-{safe_name}'
+    if _settings['format'] == 'speedscope':
+        path = directory / f'{base}.profile.speedscope.json'
+        payload = to_speedscope(name, samples, _settings['interval'])
+        path.write_text(json.dumps(payload), encoding='utf-8')
+    else:
+        path = directory / f'{base}.profile.collapsed'
+        path.write_text(to_collapsed(samples), encoding='utf-8')
+    _prune(directory)
+    return path
+
+
+def profiled(name):
+    """Decorator that profiles each call of the wrapped function."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _settings['enabled']:
+                return func(*args, **kwargs)
+            token = start()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stop(token, name)
+        return wrapper
+    return decorator
+
+
+def _before_request():
+    g._profile_token = start()
+
+
+def _teardown_request(exc):
+    token = g.pop('_profile_token', None)
+    stop(token, f'{request.method} {request.path}')
+
+
+def init_app(app):
+    """Profile every request of ``app`` when profiling is enabled."""
+    if not _settings['enabled']:
+        return
+    app.before_request(_before_request)
+    app.teardown_request(_teardown_request)
+
+
+configure()
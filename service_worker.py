@@ -0,0 +1,215 @@
+"""A versioned service worker for the static build.
+
+``build_service_worker`` runs last in ``freeze.py``, once minification
+has settled the files. It collects the app shell from the
+built pages (the same-origin stylesheets, scripts, preloads and icons
+their ``<head>`` and ``<script src>`` tags reference, plus whatever those
+stylesheets ``@import`` or ``url()``), names the version after a digest
+of those files, and writes ``sw.js`` at the root of the build. Every page
+gets a ``<meta name="service-worker">`` tag that ``script.js`` registers.
+
+The worker precaches the shell in ``shell-<version>`` and serves it cache
+first; pages are served stale-while-revalidate from a ``pages`` cache that
+keeps the ``SERVICE_WORKER_MAX_PAGES`` most recently stored pages, so
+repeat visits and offline reads come from the cache. On activation it
+deletes this site's caches from other versions. Cache names are prefixed
+with the worker's scope, as sites on one GitHub Pages origin share their
+caches. ``SERVICE_WORKER=false`` leaves the build without one.
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+SERVICE_WORKER = os.getenv('SERVICE_WORKER', 'true').lower() == 'true'
+MAX_PAGES = int(os.getenv('SERVICE_WORKER_MAX_PAGES', '50'))
+SCRIPT_NAME = 'sw.js'
+
+_HEAD_RE = re.compile(r'<head\b.*?</head>', re.DOTALL | re.IGNORECASE)
+_LINK_RE = re.compile(r'<link\b[^>]*>', re.IGNORECASE)
+_SCRIPT_SRC_RE = re.compile(r'<script\b[^>]*?\bsrc="([^"]+)"', re.IGNORECASE)
+_ATTR_RE = re.compile(r'\b(rel|href)="([^"]*)"', re.IGNORECASE)
+_CSS_URL_RE = re.compile(
+    r'@import\s+(?:url\()?\s*[\'"]?([^\'")\s;]+)|url\(\s*[\'"]?([^\'")]+)',
+)
+_HEAD_END_RE = re.compile(r'</head>', re.IGNORECASE)
+_SHELL_RELS = {'stylesheet', 'preload', 'modulepreload', 'icon'}
+
+WORKER_TEMPLATE = """\
+// Generated by freeze.py (service_worker.py); do not edit.
+const VERSION = '__VERSION__';
+const PRECACHE = __PRECACHE__;
+const MAX_PAGES = __MAX_PAGES__;
+const PREFIX = new URL(self.registration.scope).pathname;
+const SHELL_CACHE = `${PREFIX}shell-${VERSION}`;
+const PAGES_CACHE = `${PREFIX}pages`;
+const SHELL = new Set(PRECACHE.map((url) => new URL(url, self.location).href));
+
+self.addEventListener('install', (event) => {
+    event.waitUntil(
+        caches.open(SHELL_CACHE)
+            .then((cache) => cache.addAll(PRECACHE))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', (event) => {
+    event.waitUntil(
+        caches.keys()
+            .then((keys) => Promise.all(keys
+                .filter((key) => key.startsWith(PREFIX))
+                .filter((key) => key !== SHELL_CACHE && key !== PAGES_CACHE)
+                .map((key) => caches.delete(key))))
+            .then(() => self.clients.claim())
+    );
+});
+
+const trimPages = (cache) => cache.keys().then((keys) => Promise.all(
+    keys.slice(0, Math.max(0, keys.length - MAX_PAGES))
+        .map((key) => cache.delete(key))
+));
+
+const staleWhileRevalidate = (event) => caches.open(PAGES_CACHE)
+    .then((cache) => cache.match(event.request).then((cached) => {
+        const refresh = fetch(event.request).then((response) => {
+            if (response.ok && response.type === 'basic') {
+                const stored = cache.put(event.request, response.clone())
+                    .then(() => trimPages(cache));
+                event.waitUntil(stored);
+            }
+            return response;
+        });
+        if (cached) {
+            event.waitUntil(refresh.catch(() => undefined));
+            return cached;
+        }
+        return refresh;
+    }));
+
+self.addEventListener('fetch', (event) => {
+    const request = event.request;
+    if (request.method !== 'GET' || !request.url.startsWith(self.registration.scope)) {
+        return;
+    }
+    if (SHELL.has(request.url)) {
+        event.respondWith(
+            caches.match(request, { cacheName: SHELL_CACHE })
+                .then((cached) => cached || fetch(request))
+        );
+    } else if (request.mode === 'navigate') {
+        event.respondWith(staleWhileRevalidate(event));
+    }
+});
+"""
+
+
+def _local_file(build_dir, url, base_path):
+    """The build file a root-relative ``url`` is served from, or None."""
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path.startswith('/'):
+        return None
+    path = parts.path
+    if base_path:
+        if not path.startswith(f'{base_path}/'):
+            return None
+        path = path[len(base_path):]
+    candidate = Path(build_dir) / path.lstrip('/')
+    return candidate if candidate.is_file() else None
+
+
+def page_assets(document):
+    """Sub-resource URLs a page's ``<head>`` and scripts reference."""
+    urls = []
+    head = _HEAD_RE.search(document)
+    for tag in _LINK_RE.findall(head.group() if head else ''):
+        attrs = {
+            name.lower(): html.unescape(value)
+            for name, value in _ATTR_RE.findall(tag)
+        }
+        if set(attrs.get('rel', '').lower().split()) & _SHELL_RELS:
+            if 'href' in attrs:
+                urls.append(attrs['href'])
+    urls.extend(html.unescape(src) for src in _SCRIPT_SRC_RE.findall(document))
+    return urls
+
+
+def stylesheet_assets(css, url):
+    """URLs a stylesheet served at ``url`` imports or references."""
+    found = []
+    for imported, referenced in _CSS_URL_RE.findall(css):
+        target = imported or referenced
+        if target.startswith('data:'):
+            continue
+        found.append(urljoin(url, target))
+    return found
+
+
+def collect_shell(build_dir, base_path=''):
+    """``{url: file}`` for every shell asset the built pages load."""
+    build_dir = Path(build_dir)
+    pending = []
+    for path in sorted(build_dir.rglob('*.html')):
+        pending.extend(page_assets(path.read_text(encoding='utf-8')))
+    shell = {}
+    while pending:
+        url = pending.pop()
+        if url in shell:
+            continue
+        local = _local_file(build_dir, url, base_path)
+        if local is None:
+            continue
+        shell[url] = local
+        if local.suffix == '.css':
+            pending.extend(
+                stylesheet_assets(local.read_text(encoding='utf-8'), url)
+            )
+    return dict(sorted(shell.items()))
+
+
+def shell_version(shell):
+    digest = hashlib.blake2b(WORKER_TEMPLATE.encode('utf-8'), digest_size=8)
+    for url, path in shell.items():
+        digest.update(url.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def render_worker(urls, version, max_pages=MAX_PAGES):
+    return (
+        WORKER_TEMPLATE
+        .replace('__VERSION__', version)
+        .replace('__PRECACHE__', json.dumps(urls, indent=4))
+        .replace('__MAX_PAGES__', str(max_pages))
+    )
+
+
+def register_pages(build_dir, worker_url):
+    """Point every built page at the worker; return how many changed."""
+    tag = f'<meta name="service-worker" content="{html.escape(worker_url)}">'
+    changed = 0
+    for path in Path(build_dir).rglob('*.html'):
+        document = path.read_text(encoding='utf-8')
+        if tag in document or not _HEAD_END_RE.search(document):
+            continue
+        updated = _HEAD_END_RE.sub(
+            lambda match: f'{tag}\n{match.group()}', document, count=1,
+        )
+        path.write_text(updated, encoding='utf-8')
+        changed += 1
+    return changed
+
+
+def build_service_worker(build_dir, base_path=''):
+    """Write ``sw.js`` and register it; return ``(path, version, shell)``."""
+    build_dir = Path(build_dir)
+    shell = collect_shell(build_dir, base_path)
+    version = shell_version(shell)
+    path = build_dir / SCRIPT_NAME
+    path.write_text(render_worker(list(shell), version), encoding='utf-8')
+    register_pages(build_dir, f'{base_path}/{SCRIPT_NAME}')
+    return path, version, shell
@@ -0,0 +1,192 @@
+"""Production serving under gunicorn with a preloaded, pre-warmed master.
+
+``wsgi.py`` (loaded with ``preload_app``) calls ``warm_up`` in the master
+before any worker is forked: the post store, TOML caches and compiled
+templates are built once and shared with every worker copy-on-write,
+and ``gc.freeze`` keeps the collector from dirtying those pages.
+
+Warm-up also renders every public GET page into one shared anonymous
+memory map. Workers only read from it, and because the master owns the
+mapping, a worker recycled after ``max_requests`` is forked with every
+page already in place. A page is served from the map only while the post
+store has not changed anything the page shows since the generation it
+was rendered from (see ``PostStore.changes_since``; a scheduled post
+going live makes its own page, its tag and archive pages and the
+listings stale, not every other post) and, when no ``SITE_URL`` pins
+absolute URLs, the request comes in on the origin the pages were
+rendered for (``SERVING_ORIGIN``). Anything else falls through to the
+normal view.
+
+``/ready`` answers 503 until warm-up has finished.
+"""
+
+import hashlib
+import mmap
+import os
+import re
+import time
+
+from flask import Response, g, request
+
+from blog import get_store
+from config import SITE_CONFIG
+from templating import precompile_templates
+
+READY_PATH = '/ready'
+
+_state = {'ready': False, 'pages': None}
+
+_BLOG_PAGE_RE = re.compile(
+    r'^/blog/(?:tag/(?P<tag>[^/]+)|(?P<year>\d+)(?:/(?P<month>\d{2}))?'
+    r'|(?P<slug>[^/]+))/$'
+)
+
+
+def page_change_key(path):
+    """The ``PostStore`` change key whose presence makes ``path`` stale."""
+    match = _BLOG_PAGE_RE.match(path)
+    if match is None:
+        return 'index', None
+    if match['tag']:
+        return 'tag', match['tag']
+    if match['year']:
+        month = match['month']
+        return 'archive', (int(match['year']), int(month) if month else None)
+    return 'post', match['slug']
+
+
+class PageSegment:
+    """Rendered pages packed into one shared memory map workers only read."""
+
+    def __init__(self, pages, generation, origin):
+        self.generation = generation
+        self.origin = origin
+        self.index = {}
+        size = sum(len(body) for body, _ in pages.values())
+        self._map = mmap.mmap(-1, max(size, 1))
+        offset = 0
+        for path, (body, link) in pages.items():
+            self._map[offset:offset + len(body)] = body
+            etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+            self.index[path] = (offset, len(body), etag, link)
+            offset += len(body)
+        self.size = size
+        self._checked = (generation, frozenset())
+
+    def is_current(self, path, store):
+        """Whether ``path`` still matches what ``store`` would render."""
+        if store.generation == self.generation:
+            return True
+        checked, stale = self._checked
+        if checked != store.generation:
+            changes = store.changes_since(self.generation)
+            stale = None if changes is None else frozenset(
+                page for page in self.index
+                if page_change_key(page) in changes
+            )
+            self._checked = (store.generation, stale)
+        return stale is not None and path not in stale
+
+    def __contains__(self, path):
+        return path in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def page(self, path):
+        """Return ``(body, etag, link)`` for ``path`` or None.
+
+        ``link`` is the ``Link`` header the page was rendered with, if any.
+        """
+        entry = self.index.get(path)
+        if entry is None:
+            return None
+        offset, length, etag, link = entry
+        return self._map[offset:offset + length], etag, link
+
+
+def is_ready():
+    return _state['ready']
+
+
+def page_segment():
+    return _state['pages']
+
+
+def serving_origin():
+    """Origin pages are rendered for, or None if ``SITE_URL`` fixes it."""
+    if SITE_CONFIG['site_url']:
+        return None
+    return os.getenv('SERVING_ORIGIN', 'http://localhost').rstrip('/')
+
+
+def render_pages(app, routes, origin):
+    """Render ``routes`` with a test client; keep the 200 text/html ones.
+
+    Returns ``{route: (body, Link header or None)}``.
+    """
+    pages = {}
+    with app.test_client() as client:
+        for route in routes:
+            response = client.get(route, base_url=origin or 'http://localhost')
+            if response.status_code == 200 and response.mimetype == 'text/html':
+                pages[route] = (response.get_data(), response.headers.get('Link'))
+    return pages
+
+
+def warm_up(app, routes=()):
+    """Build every per-process cache in this process; return a summary."""
+    started = time.perf_counter()
+    reset()
+    origin = serving_origin()
+    with app.app_context():
+        store = get_store()
+        templates = precompile_templates(app)
+        pages = render_pages(app, routes, origin)
+    segment = PageSegment(pages, store.generation, origin)
+    _state['pages'] = segment
+    _state['ready'] = True
+    return {
+        'posts': len(store.posts),
+        'templates': templates,
+        'pages': len(segment),
+        'bytes': segment.size,
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def reset():
+    _state['ready'] = False
+    _state['pages'] = None
+
+
+def _serve_shared_page():
+    segment = _state['pages']
+    if (
+        segment is None
+        or g.get('tenant') is not None
+        or request.method != 'GET'
+        or request.query_string
+        or request.path not in segment
+        or segment.origin not in (None, request.url_root.rstrip('/'))
+        or not segment.is_current(request.path, get_store())
+    ):
+        return None
+    body, etag, link = segment.page(request.path)
+    response = Response(body, mimetype='text/html')
+    response.set_etag(etag)
+    if link:
+        response.headers['Link'] = link
+    return response.make_conditional(request)
+
+
+def _ready():
+    if not _state['ready']:
+        return Response('warming up\n', status=503, mimetype='text/plain')
+    return Response('ready\n', mimetype='text/plain')
+
+
+def init_app(app):
+    """Register the readiness check and the shared page lookup."""
+    app.add_url_rule(READY_PATH, 'ready', _ready)
+    app.before_request(_serve_shared_page)
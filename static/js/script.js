@@ -86,6 +86,113 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
 
+    // ===== LINK PREFETCH =====
+    // Prefetch internal pages when a link is hovered or touched, a few at a
+    // time. Pages from the static build also carry speculation rules for
+    // their likeliest next pages (prefetch.py); browsers without them get
+    // the same list as <link rel="prefetch"> once the page is idle.
+    const connection = navigator.connection;
+    const saveData = connection &&
+        (connection.saveData || /2g/.test(connection.effectiveType || ''));
+    const prefetchSupported = (() => {
+        const link = document.createElement('link');
+        return link.relList && link.relList.supports &&
+            link.relList.supports('prefetch');
+    })();
+
+    if (!saveData && prefetchSupported) {
+        const maxInFlight = 2;
+        const hoverDelay = 65;
+        const requested = new Set([location.pathname]);
+        const queue = [];
+        let inFlight = 0;
+
+        const pump = () => {
+            while (inFlight < maxInFlight && queue.length) {
+                const link = document.createElement('link');
+                link.rel = 'prefetch';
+                link.href = queue.shift();
+                const done = () => {
+                    inFlight -= 1;
+                    pump();
+                };
+                link.addEventListener('load', done, { once: true });
+                link.addEventListener('error', done, { once: true });
+                inFlight += 1;
+                document.head.appendChild(link);
+            }
+        };
+
+        const prefetch = (url) => {
+            if (requested.has(url)) {
+                return;
+            }
+            requested.add(url);
+            queue.push(url);
+            pump();
+        };
+
+        const prefetchable = (anchor) => {
+            if (!anchor || anchor.hasAttribute('download') || anchor.target === '_blank') {
+                return null;
+            }
+            const url = new URL(anchor.href, location.href);
+            if (url.origin !== location.origin || !/^https?:$/.test(url.protocol)) {
+                return null;
+            }
+            if (/\.(xml|txt|png|jpe?g|gif|webp|svg|pdf|zip)$/i.test(url.pathname)) {
+                return null;
+            }
+            return url.pathname;
+        };
+
+        let hoverTimer = null;
+        document.addEventListener('mouseover', (event) => {
+            const url = prefetchable(event.target.closest && event.target.closest('a[href]'));
+            if (!url) {
+                return;
+            }
+            clearTimeout(hoverTimer);
+            hoverTimer = setTimeout(() => prefetch(url), hoverDelay);
+        });
+        document.addEventListener('mouseout', () => clearTimeout(hoverTimer));
+        document.addEventListener('touchstart', (event) => {
+            const url = prefetchable(event.target.closest && event.target.closest('a[href]'));
+            if (url) {
+                prefetch(url);
+            }
+        }, { passive: true });
+
+        const rules = document.querySelector('script[type="speculationrules"]');
+        const rulesSupported = HTMLScriptElement.supports &&
+            HTMLScriptElement.supports('speculationrules');
+        if (rules) {
+            const whenIdle = window.requestIdleCallback || ((fn) => setTimeout(fn, 1));
+            whenIdle(() => {
+                try {
+                    const parsed = JSON.parse(rules.textContent);
+                    (parsed.prefetch || []).forEach(rule => {
+                        // The browser already fetches these itself.
+                        (rule.urls || []).forEach(rulesSupported
+                            ? (url) => requested.add(url)
+                            : prefetch);
+                    });
+                } catch (error) {
+                    console.error('❌ Speculation rules could not be read', error);
+                }
+            });
+        }
+    }
+
+    // ===== SERVICE WORKER =====
+    // Only pages from the static build name a worker (service_worker.py).
+    const workerMeta = document.querySelector('meta[name="service-worker"]');
+    if (workerMeta && 'serviceWorker' in navigator) {
+        navigator.serviceWorker.register(workerMeta.content).catch((error) => {
+            console.error('❌ Service worker registration failed', error);
+        });
+    }
+
     // ===== CONTACT FORM HANDLER =====
     const contactForm = document.getElementById('contact-form');
     if (contactForm) {
@@ -0,0 +1,49 @@
+"""Jinja environment setup shared by the public and authoring apps.
+
+In debug mode templates auto-reload so edits show up immediately. Outside
+debug the apps run in production template mode: auto-reload is off (no
+``stat`` per render) and compiled templates go through an on-disk
+bytecode cache. Every process on the host shares that cache (by default
+``.jinja-cache/`` beside the app), and the static build fills it ahead of
+time with ``precompile_templates``.
+"""
+
+import os
+
+from jinja2 import FileSystemBytecodeCache
+
+DEFAULT_TEMPLATE_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '.jinja-cache',
+)
+
+
+def template_cache_dir():
+    """``TEMPLATE_CACHE_DIR``, else ``.jinja-cache/`` beside the app."""
+    return os.getenv('TEMPLATE_CACHE_DIR') or DEFAULT_TEMPLATE_CACHE_DIR
+
+
+def configure_templates(app):
+    """Pick debug or production template mode for ``app``."""
+    if app.debug:
+        app.config['TEMPLATES_AUTO_RELOAD'] = True
+        app.jinja_env.auto_reload = True
+        app.jinja_env.bytecode_cache = None
+        return
+
+    app.config['TEMPLATES_AUTO_RELOAD'] = False
+    app.jinja_env.auto_reload = False
+    directory = template_cache_dir()
+    os.makedirs(directory, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+
+def precompile_templates(app):
+    """Compile every template ``app`` can load; return how many there were.
+
+    With a bytecode cache configured this writes each template's bytecode
+    to disk, so workers started afterwards skip compilation.
+    """
+    names = app.jinja_env.list_templates()
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
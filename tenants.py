@@ -0,0 +1,218 @@
+"""Host-based multi-site serving from one process.
+
+Set ``TENANTS_FILE`` to a TOML file listing the tenant sites::
+
+    [defaults]
+    memory_budget_mb = 16          # resident rendered-HTML budget per tenant
+
+    [[tenants]]
+    name = "alice"
+    hosts = ["alice.example.com", "www.alice.example.com"]
+    root = "sites/alice"           # relative to the tenants file
+    memory_budget_mb = 8
+
+Each root holds the tenant's own ``site.toml`` (merged over the primary
+one, table by table, without the ``SITE_*`` environment overrides) and
+its ``posts/``. A request whose host matches a tenant is served with that
+tenant's settings and post store; any other host gets the primary site.
+
+A tenant's post store is built on its first request. Its resident HTML
+(the hot tier plus the compressed cold tier, unless that is spilled to
+``POST_HTML_SPILL_DIR``) is held to the tenant's budget by shrinking the
+hot tier to what the cold tier leaves of it; a cold tier larger than the
+budget leaves the hot tier empty. Active tenants are kept in LRU order:
+when more than ``TENANT_MAX_ACTIVE`` are warm or their resident HTML
+exceeds ``TENANTS_MEMORY_BUDGET_MB``, the least recently used tenant's
+store is dropped and rebuilt on its next request. Tenants idle for
+``TENANT_IDLE_SECONDS`` are dropped by a sweep at the start of every
+request, whichever host it is for.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from flask import g, request
+
+from blog import get_store
+from blog.store import drop_store
+from config import SITE_CONTENT, build_site
+from content.loader import load_toml
+from instrumentation import register_collector
+
+TENANTS_FILE = os.getenv('TENANTS_FILE', '')
+MAX_ACTIVE = int(os.getenv('TENANT_MAX_ACTIVE', '16'))
+IDLE_SECONDS = float(os.getenv('TENANT_IDLE_SECONDS', '1800'))
+TOTAL_BUDGET = int(os.getenv('TENANTS_MEMORY_BUDGET_MB', '256')) * 2 ** 20
+DEFAULT_BUDGET_MB = 16
+
+
+class Tenant:
+    def __init__(self, name, hosts, root, memory_budget):
+        self.name = name
+        self.hosts = hosts
+        self.root = Path(root)
+        self.content_dir = self.root / 'posts'
+        self.memory_budget = memory_budget
+
+    def site(self):
+        """The tenant's site settings (re-read when its site.toml changes)."""
+        own = load_toml(str(self.root / 'site.toml'))
+        merged = {**SITE_CONTENT}
+        for table, value in own.items():
+            if isinstance(value, dict) and isinstance(merged.get(table), dict):
+                merged[table] = {**merged[table], **value}
+            else:
+                merged[table] = value
+        return build_site(merged, use_env=False)
+
+
+class TenantRegistry:
+    """Tenants by host, plus the LRU of tenants whose caches are warm."""
+
+    def __init__(self, tenants, max_active=MAX_ACTIVE,
+                 idle_seconds=IDLE_SECONDS, total_budget=TOTAL_BUDGET):
+        self.tenants = tenants
+        self.by_host = {
+            host.lower(): tenant for tenant in tenants for host in tenant.hosts
+        }
+        self.max_active = max_active
+        self.idle_seconds = idle_seconds
+        self.total_budget = total_budget
+        self.evictions = 0
+        self.clock = time.monotonic
+        self._active = OrderedDict()  # name -> (tenant, store, last_used)
+        self._lock = threading.Lock()
+
+    def resolve(self, host):
+        return self.by_host.get(host.split(':', 1)[0].lower())
+
+    def store(self, tenant):
+        """The tenant's refreshed post store; marks it most recently used."""
+        store = get_store(tenant.content_dir)
+        stats = store.html.stats()
+        cold = stats['resident_bytes'] - stats['hot_bytes']
+        store.html.set_budget(max(0, tenant.memory_budget - cold))
+        now = self.clock()
+        with self._lock:
+            self._active[tenant.name] = (tenant, store, now)
+            self._active.move_to_end(tenant.name)
+            self._evict(now)
+        return store
+
+    def sweep(self):
+        """Drop the stores of tenants idle for longer than ``idle_seconds``."""
+        now = self.clock()
+        with self._lock:
+            while self._active:
+                name, (tenant, _, last_used) = next(iter(self._active.items()))
+                if now - last_used <= self.idle_seconds:
+                    return
+                self._drop(name, tenant)
+
+    def active(self):
+        with self._lock:
+            return list(self._active)
+
+    def resident_bytes(self):
+        with self._lock:
+            stores = [store for _, store, _ in self._active.values()]
+        return sum(store.html.stats()['resident_bytes'] for store in stores)
+
+    def _evict(self, now):
+        while len(self._active) > 1:
+            name, (tenant, store, last_used) = next(iter(self._active.items()))
+            resident = sum(
+                entry[1].html.stats()['resident_bytes']
+                for entry in self._active.values()
+            )
+            if (
+                len(self._active) <= self.max_active
+                and resident <= self.total_budget
+                and now - last_used <= self.idle_seconds
+            ):
+                return
+            self._drop(name, tenant)
+
+    def _drop(self, name, tenant):
+        del self._active[name]
+        drop_store(tenant.content_dir)
+        self.evictions += 1
+
+
+def load_tenants(path):
+    """Parse a tenants file into ``Tenant`` objects."""
+    path = Path(path).resolve()
+    data = load_toml(str(path))
+    budget_mb = data.get('defaults', {}).get(
+        'memory_budget_mb', DEFAULT_BUDGET_MB,
+    )
+    return [
+        Tenant(
+            name=entry['name'],
+            hosts=entry['hosts'],
+            root=path.parent / entry['root'],
+            memory_budget=int(
+                entry.get('memory_budget_mb', budget_mb) * 2 ** 20
+            ),
+        )
+        for entry in data.get('tenants', [])
+    ]
+
+
+_registry = None
+
+
+def get_registry():
+    return _registry
+
+
+def current_tenant():
+    return g.get('tenant')
+
+
+def tenant_store():
+    """This request's tenant store, or None on the primary site."""
+    tenant = g.get('tenant')
+    if tenant is None:
+        return None
+    return _registry.store(tenant)
+
+
+def _select_tenant():
+    _registry.sweep()
+    tenant = _registry.resolve(request.host)
+    if tenant is not None:
+        g.tenant = tenant
+        g.site = tenant.site()
+
+
+def tenant_metrics():
+    if _registry is None:
+        return []
+    return [
+        ('site_tenants_active', 'gauge',
+         'Tenants whose post stores are warm.', len(_registry.active())),
+        ('site_tenants_resident_bytes', 'gauge',
+         'Rendered HTML held in memory for active tenants.',
+         _registry.resident_bytes()),
+        ('site_tenant_evictions_total', 'counter',
+         'Tenant stores dropped by LRU, budget or idle eviction.',
+         _registry.evictions),
+    ]
+
+
+register_collector(tenant_metrics)
+
+
+def init_app(app, tenants_file=None):
+    """Route requests by host when a tenants file is configured."""
+    global _registry
+    tenants_file = tenants_file or TENANTS_FILE
+    if not tenants_file:
+        _registry = None
+        return
+    _registry = TenantRegistry(load_tenants(tenants_file))
+    app.before_request(_select_tenant)
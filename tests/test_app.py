@@ -91,3 +91,127 @@ def test_blog_detail(client, tmp_path, monkeypatch):
     response = client.get('/blog/how-i-teach-game-development/')
     assert response.status_code == 200
     assert b'How I Teach Game Development' in response.data
+
+
+def test_blog_detail_hero_is_preloaded_not_lazy(client, tmp_path, monkeypatch):
+    (tmp_path / 'hero.md').write_text(
+        "---\n"
+        "title: Hero\n"
+        "slug: hero\n"
+        "date: 2024-01-01\n"
+        "hero_image: images/toucan-logo.png\n"
+        "---\n"
+        "\n"
+        "![Logo](/static/images/toucan-logo.png)\n"
+    )
+    monkeypatch.setenv('CONTENT_DIR', str(tmp_path))
+
+    html = client.get('/blog/hero/').get_data(as_text=True)
+
+    assert (
+        '<link rel="preload" as="image" '
+        'href="/static/images/toucan-logo.png" fetchpriority="high">'
+    ) in html
+    hero = html.split('class="blog-post-hero"')[1].split('</figure>')[0]
+    assert 'loading="lazy"' not in hero
+    assert 'width="85" height="65"' in hero
+    body = html.split('class="blog-post-body"')[1]
+    assert 'loading="lazy" decoding="async" width="85" height="65"' in body
+
+
+def test_blog_detail_external_hero_uses_its_url(client, tmp_path, monkeypatch):
+    (tmp_path / 'remote.md').write_text(
+        "---\ntitle: Remote\nslug: remote\ndate: 2024-01-01\n"
+        "hero_image: https://cdn.example.com/hero.jpg\n---\n\nBody.\n"
+    )
+    monkeypatch.setenv('CONTENT_DIR', str(tmp_path))
+
+    html = client.get('/blog/remote/').get_data(as_text=True)
+
+    assert (
+        '<link rel="preload" as="image" '
+        'href="https://cdn.example.com/hero.jpg" fetchpriority="high">'
+    ) in html
+    assert '<img src="https://cdn.example.com/hero.jpg"' in html
+    assert '/static/https:' not in html
+
+
+def _write_posts(directory, count):
+    for index in range(count):
+        (directory / f'post-{index}.md').write_text(
+            "---\n"
+            f"title: Post {index}\n"
+            f"slug: post-{index}\n"
+            f"date: 2024-01-{index + 1:02d}\n"
+            "---\n\nBody.\n"
+        )
+
+
+def test_blog_index_is_paginated(client, tmp_path, monkeypatch):
+    import app as app_module
+
+    _write_posts(tmp_path, 5)
+    monkeypatch.setenv('CONTENT_DIR', str(tmp_path))
+    monkeypatch.setattr(app_module, 'BLOG_PAGE_SIZE', 2)
+
+    first = client.get('/blog/').data
+    assert b'Post 4' in first and b'Post 3' in first
+    assert b'Post 2' not in first
+    assert b'<link rel="next" href="/blog/page/2/">' in first
+    assert b'rel="prev"' not in first
+
+    last = client.get('/blog/page/3/').data
+    assert b'Post 0' in last
+    assert b'<link rel="prev" href="/blog/page/2/">' in last
+    assert b'rel="next"' not in last
+
+    assert client.get('/blog/page/4/').status_code == 404
+    assert client.get('/blog/page/1/').status_code == 301
+
+
+def test_tag_and_archive_routes(client, tmp_path, monkeypatch):
+    (tmp_path / 'tagged.md').write_text(
+        "---\ntitle: Tagged Post\nslug: tagged\ndate: 2024-03-05\n"
+        "tags: [Python]\n---\n\nBody.\n"
+    )
+    monkeypatch.setenv('CONTENT_DIR', str(tmp_path))
+
+    tag_page = client.get('/blog/tag/python/')
+    assert tag_page.status_code == 200
+    assert b'Tagged Post' in tag_page.data
+
+    assert b'Tagged Post' in client.get('/blog/2024/').data
+    assert b'March 2024' in client.get('/blog/2024/03/').data
+    assert client.get('/blog/2023/').status_code == 404
+    assert client.get('/blog/tag/missing/').status_code == 404
+    assert b'href="/blog/tag/python/"' in client.get('/blog/tagged/').data
+
+    sitemap = client.get('/sitemap.xml').data
+    for path in (b'/blog/tag/python/', b'/blog/2024/', b'/blog/2024/03/'):
+        assert b'<loc>http://localhost' + path + b'</loc>' in sitemap
+
+
+def test_tag_and_archive_pages_are_paginated(client, tmp_path, monkeypatch):
+    import app as app_module
+
+    _write_posts(tmp_path, 5)
+    (tmp_path / '2024.md').write_text(
+        "---\ntitle: Year Post\ndate: 2024-02-01\n---\n\nBody.\n"
+    )
+    monkeypatch.setenv('CONTENT_DIR', str(tmp_path))
+    monkeypatch.setattr(app_module, 'BLOG_PAGE_SIZE', 2)
+
+    first = client.get('/blog/2024/01/').data
+    assert b'<link rel="next" href="/blog/2024/01/page/2/">' in first
+    last = client.get('/blog/2024/01/page/3/').data
+    assert b'Post 0' in last
+    assert b'<link rel="prev" href="/blog/2024/01/page/2/">' in last
+    assert client.get('/blog/2024/01/page/4/').status_code == 404
+    for base in ('/blog/2024/', '/blog/2024/01/', '/blog/tag/python/'):
+        redirect = client.get(f'{base}page/1/')
+        assert redirect.status_code == 301
+        assert redirect.headers['Location'] == base
+
+    # A numeric slug would be hidden by the year archive, so it is refused.
+    assert b'Year Post' not in client.get('/blog/2024/').data
+    assert client.get('/blog/2024/02/').status_code == 404
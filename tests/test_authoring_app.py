@@ -67,3 +67,67 @@ def test_upload_media_saves_file(authoring_client, tmp_path):
     saved_file = upload_path / 'photo.jpg'
     assert saved_file.exists()
     assert saved_file.read_bytes() == b'fake image data'
+
+
+def test_live_preview_renders_only_unknown_blocks(authoring_client):
+    content = '# Title\n\nFirst paragraph.\n\n```\ncode\n\nmore code\n```'
+    first = authoring_client.post(
+        '/authoring/preview', json={'content': content}
+    ).get_json()
+
+    assert len(first['blocks']) == 3
+    assert first['rendered'] == 3
+    assert '<h1>Title</h1>' in first['fragments'][first['blocks'][0]]
+    assert 'more code' in first['fragments'][first['blocks'][2]]
+
+    edited = content.replace('First paragraph.', 'Edited paragraph.')
+    second = authoring_client.post(
+        '/authoring/preview',
+        json={'content': edited, 'known': first['blocks']},
+    ).get_json()
+
+    assert second['rendered'] == 1
+    assert list(second['fragments']) == [second['blocks'][1]]
+    assert 'Edited paragraph.' in second['fragments'][second['blocks'][1]]
+
+
+def test_live_preview_highlights_code_and_sizes_media_like_posts(tmp_path):
+    from authoring_app.preview import render_incremental
+    from blog import parse_post
+
+    content = '```python\nimport os\n```\n\n![Alt](/static/missing.png)'
+    result = render_incremental('post-processing', content)
+    path = tmp_path / 'post.md'
+    path.write_text('---\ntitle: Post\n---\n\n' + content)
+
+    preview = '\n'.join(result['fragments'][key] for key in result['blocks'])
+    assert preview == parse_post(path)['content']
+    assert '<span class="kn">import</span>' in preview
+    assert 'loading="lazy"' in preview
+
+
+def test_split_blocks_keeps_nested_list_content_together():
+    from authoring_app.preview import split_blocks
+
+    blocks = split_blocks('- item\n\n    continued\n\nNext')
+    assert blocks == ['- item\n\n    continued', 'Next']
+
+
+def test_split_blocks_only_closes_fences_on_a_bare_fence_line():
+    from authoring_app.preview import split_blocks
+
+    blocks = split_blocks('````\n```python\n\nx = 1\n````\n\nAfter')
+    assert blocks == ['````\n```python\n\nx = 1\n````', 'After']
+
+
+def test_split_blocks_keeps_loose_lists_and_reference_links_whole():
+    from authoring_app.preview import render_incremental, split_blocks
+
+    assert split_blocks('- one\n\n- two\n\nNext') == [
+        '- one\n\n- two', 'Next',
+    ]
+    content = 'See [the docs][docs].\n\nMore.\n\n[docs]: https://example.com'
+    result = render_incremental('references', content)
+    assert len(result['blocks']) == 1
+    html = next(iter(result['fragments'].values()))
+    assert '<a href="https://example.com">the docs</a>' in html
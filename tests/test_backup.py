@@ -0,0 +1,165 @@
+import gzip
+import io
+import tarfile
+
+import pytest
+
+from authoring_app import create_app
+from authoring_app.backup import (
+    CHUNK_SIZE,
+    BackupError,
+    export_archive,
+    import_archive,
+)
+from blog.store import get_store
+
+MEDIA = {'png', 'jpg'}
+
+
+@pytest.fixture()
+def sites(tmp_path):
+    source = tmp_path / 'source'
+    (source / 'uploads').mkdir(parents=True)
+    (source / 'hello.md').write_text(
+        '---\ntitle: Hello\ndate: 2024-01-01\n---\n\nBody.\n'
+    )
+    (source / 'uploads' / 'photo.png').write_bytes(b'\x89PNG' + b'x' * 300_000)
+    return source, tmp_path / 'target'
+
+
+@pytest.fixture()
+def authoring_client(sites, monkeypatch):
+    source, _ = sites
+    monkeypatch.setenv('AUTHORING_CONTENT_DIR', str(source))
+    monkeypatch.setenv('AUTHORING_MEDIA_DIR', str(source / 'uploads'))
+    app = create_app()
+    app.config.update(TESTING=True)
+    with app.test_client() as client:
+        yield client
+
+
+def _tar(members):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w') as archive:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def test_export_streams_in_bounded_chunks(sites):
+    source, _ = sites
+    chunks = list(export_archive(source, source / 'uploads', 'none'))
+
+    assert max(len(chunk) for chunk in chunks) <= CHUNK_SIZE
+    with tarfile.open(fileobj=io.BytesIO(b''.join(chunks))) as archive:
+        assert archive.getnames() == ['posts/hello.md', 'uploads/photo.png']
+        assert archive.extractfile('uploads/photo.png').read() == (
+            (source / 'uploads' / 'photo.png').read_bytes()
+        )
+
+
+def test_export_endpoint_round_trips_through_import(authoring_client, sites):
+    source, target = sites
+    response = authoring_client.get('/authoring/export')
+
+    assert response.mimetype == 'application/gzip'
+    assert 'attachment' in response.headers['Content-Disposition']
+    summary = import_archive(
+        io.BytesIO(response.data), target, target / 'uploads', MEDIA,
+    )
+    assert summary == {'written': 2, 'skipped': 0, 'rejected': []}
+    assert (target / 'hello.md').read_text() == (source / 'hello.md').read_text()
+
+    again = import_archive(
+        io.BytesIO(response.data), target, target / 'uploads', MEDIA,
+    )
+    assert again == {'written': 0, 'skipped': 2, 'rejected': []}
+
+
+def test_import_rejects_paths_outside_posts_and_uploads(tmp_path):
+    archive = _tar({
+        'posts/ok.md': b'---\ntitle: Ok\n---\n',
+        'posts/../../evil.md': b'x',
+        'uploads/script.sh': b'x',
+        'settings.toml': b'x',
+    })
+    summary = import_archive(
+        io.BytesIO(archive), tmp_path / 'posts', tmp_path / 'uploads', MEDIA,
+    )
+
+    assert summary['written'] == 1
+    assert sorted(summary['rejected']) == [
+        'posts/../../evil.md', 'settings.toml', 'uploads/script.sh',
+    ]
+    assert not (tmp_path.parent / 'evil.md').exists()
+
+
+def test_import_endpoint_accepts_raw_body(authoring_client, sites):
+    source, _ = sites
+    body = _tar({'posts/new.md': b'---\ntitle: New\n---\n\nHi.\n'})
+
+    response = authoring_client.post('/authoring/import', data=body)
+
+    assert response.get_json()['written'] == 1
+    assert (source / 'new.md').exists()
+    bad = authoring_client.post('/authoring/import', data=b'not a tar')
+    assert bad.status_code == 400
+
+
+def test_truncated_archive_is_a_backup_error_and_keeps_what_was_written(
+        tmp_path):
+    body = gzip.compress(_tar({
+        'posts/first.md': b'---\ntitle: First\n---\n\nOne.\n',
+        'uploads/big.png': b'\x89PNG' + bytes(range(256)) * 2000,
+    }))
+    posts = tmp_path / 'posts'
+    posts.mkdir()
+    store = get_store(posts)
+
+    with pytest.raises(BackupError):
+        import_archive(
+            io.BytesIO(body[:len(body) // 2]), posts, tmp_path / 'uploads',
+            MEDIA,
+        )
+
+    assert (posts / 'first.md').exists()
+    assert 'first' in store.by_slug
+    assert not list((tmp_path / 'uploads').glob('.*.part'))
+
+
+def test_import_streams_members_under_a_size_limit(tmp_path):
+    body = _tar({'uploads/huge.png': b'x' * (CHUNK_SIZE * 3)})
+
+    with pytest.raises(BackupError, match='larger than'):
+        import_archive(
+            io.BytesIO(body), tmp_path / 'posts', tmp_path / 'uploads', MEDIA,
+            max_member_bytes=CHUNK_SIZE,
+        )
+    assert not list((tmp_path / 'uploads').iterdir())
+
+
+def test_duplicate_members_do_not_share_a_temporary_file(tmp_path):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w') as archive:
+        for body in (b'---\ntitle: A\n---\n', b'---\ntitle: B\n---\n') * 4:
+            info = tarfile.TarInfo('posts/same.md')
+            info.size = len(body)
+            archive.addfile(info, io.BytesIO(body))
+
+    summary = import_archive(
+        io.BytesIO(buffer.getvalue()), tmp_path / 'posts',
+        tmp_path / 'uploads', MEDIA,
+    )
+
+    assert summary['written'] + summary['skipped'] == 8
+    assert (tmp_path / 'posts' / 'same.md').read_bytes().startswith(b'---')
+    assert [path.name for path in (tmp_path / 'posts').iterdir()] == [
+        'same.md',
+    ]
+
+
+def test_unknown_compression_is_rejected(authoring_client):
+    response = authoring_client.get('/authoring/export?compression=lz4')
+    assert response.status_code == 400
@@ -0,0 +1,51 @@
+import pytest
+
+from benchmarks.run import compare_reports, run_benchmarks
+from benchmarks.synthetic import generate_posts
+from blog import load_posts
+
+
+def _report(median_s, peak_bytes):
+    return {
+        'version': 1,
+        'results': {
+            '10': {'parse_post': {'median_s': median_s, 'peak_bytes': peak_bytes}},
+        },
+    }
+
+
+def test_generate_posts_is_deterministic(tmp_path):
+    first = generate_posts(tmp_path / 'a', 5, seed=3)
+    second = generate_posts(tmp_path / 'b', 5, seed=3)
+
+    assert [p.read_text() for p in first] == [p.read_text() for p in second]
+    posts = load_posts(tmp_path / 'a')
+    assert len(posts) == 5
+    assert any('<table>' in post['content'] for post in posts)
+    assert any('<pre><code' in post['content'] for post in posts)
+
+
+def test_compare_reports_flags_regressions():
+    baseline = _report(0.010, 1000)
+
+    [steady] = compare_reports(baseline, _report(0.0105, 1000))
+    [slower] = compare_reports(baseline, _report(0.020, 1000))
+    [bigger] = compare_reports(baseline, _report(0.010, 5000))
+
+    assert steady['regression'] is False
+    assert slower['regression'] is True
+    assert bigger['regression'] is True
+
+
+def test_freeze_case_writes_only_under_its_temp_dir(tmp_path, monkeypatch):
+    import freeze
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(
+        freeze, 'refresh_ledger', lambda path: pytest.fail('ledger refreshed'),
+    )
+
+    report = run_benchmarks([10], 1, 0, only=['freeze.build_static_site'])
+
+    assert list(report['results']['10']) == ['freeze.build_static_site']
+    assert list(tmp_path.iterdir()) == []
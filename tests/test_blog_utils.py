@@ -53,3 +53,50 @@ def test_load_posts_uses_environment_directory(monkeypatch, tmp_path: Path):
 
     assert len(posts) == 1
     assert posts[0]['slug'] == 'sample'
+
+
+def _reference_stats(content):
+    """The original multi-copy implementation analyze_body replaces."""
+    from blog import strip_leading_metadata_lines
+
+    body = strip_leading_metadata_lines(content)
+    words = body.split()
+    return (
+        body,
+        len(words),
+        ' '.join(words[:50]),
+        max(1, round(len(words) / 200)),
+    )
+
+
+_FRAGMENTS = [
+    'word', 'Title: value', 'draft:true', 'key_1:  x', 'not meta', '# Heading',
+    ' ', '  ', '\t', '\n', '\n\n', '\x1f', '\xa0', '\u3000', '\xfcn\xef', '\u2014',
+    '...', ':', 'a:',
+]
+# Line breaks other than \n, which splitlines() normalises.
+_LINE_BREAKS = ['\r\n', '\r', '\x0b', '\x0c', '\x1c', '\x85', '\u2028']
+
+
+def test_analyze_body_matches_reference():
+    import random
+
+    from blog import analyze_body
+
+    for seed in range(300):
+        rng = random.Random(seed)
+        fragments = _FRAGMENTS + (_LINE_BREAKS if seed % 2 else [])
+        content = ''.join(
+            rng.choice(fragments) for _ in range(rng.randint(0, 120))
+        )
+
+        assert tuple(analyze_body(content)) == _reference_stats(content), seed
+
+
+def test_analyze_body_counts_words_across_chunk_boundaries(monkeypatch):
+    from blog import analyze_body, utils
+
+    monkeypatch.setattr(utils, '_COUNT_CHUNK', 7)
+    content = 'intro: skipped\n\n' + ' '.join(f'word{i}' for i in range(500))
+
+    assert tuple(analyze_body(content)) == _reference_stats(content)
@@ -0,0 +1,76 @@
+import pytest
+
+import early_hints
+
+PAGE = """<html><head>
+<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
+<link rel="preload" as="font" href="/static/fonts/a.woff2" crossorigin>
+<link rel="stylesheet" href="/static/css/style.css?v=3&amp;x=1">
+<link rel="stylesheet" href="https://fonts.googleapis.com/css2?family=X">
+<link rel="canonical" href="https://example.com/">
+</head><body>
+<script src="/static/js/script.js?v=3"></script>
+<script src="https://assets.example.com/widget.js"></script>
+</body></html>
+"""
+
+
+def _reader(tmp_path):
+    (tmp_path / 'css').mkdir()
+    (tmp_path / 'css' / 'style.css').write_text(
+        "@import url('base.css');\n@import \"blog.css\";\n"
+    )
+    return early_hints.static_stylesheet_reader(tmp_path)
+
+
+def test_critical_resources_follow_head_scripts_and_imports(tmp_path):
+    header = early_hints.link_header(
+        early_hints.critical_resources(PAGE, _reader(tmp_path))
+    )
+
+    assert header == ', '.join([
+        '<https://fonts.gstatic.com>; rel=preconnect; crossorigin',
+        '</static/fonts/a.woff2>; rel=preload; as=font; crossorigin',
+        '</static/css/style.css?v=3&x=1>; rel=preload; as=style',
+        '</static/css/base.css>; rel=preload; as=style',
+        '</static/css/blog.css>; rel=preload; as=style',
+        '</static/js/script.js?v=3>; rel=preload; as=script',
+    ])
+
+
+def test_html_pages_carry_link_headers(client):
+    page = client.get('/blog/')
+    feed = client.get('/feed.xml')
+
+    assert '/static/css/style.css' in page.headers['Link']
+    assert '</static/css/base.css>; rel=preload; as=style' in page.headers['Link']
+    assert 'Link' not in feed.headers
+
+
+def test_nginx_map_keys_built_files_by_uri(tmp_path):
+    build = tmp_path / 'build'
+    (build / 'blog').mkdir(parents=True)
+    (build / 'blog' / 'index.html').write_text(PAGE)
+    (build / 'robots.html').write_text('<html><head></head></html>')
+
+    path, pages = early_hints.write_nginx_map(build, tmp_path / 'map.conf')
+
+    text = path.read_text()
+    assert pages == 1
+    assert text.startswith('# Generated by freeze.py')
+    assert 'map $uri $preload_link {' in text
+    assert '"/blog/index.html" "<https://fonts.gstatic.com>;' in text
+    assert 'robots' not in text
+
+
+def test_link_header_is_computed_once_per_page(client, monkeypatch):
+    early_hints.clear_cache()
+    first = client.get('/blog/')
+    monkeypatch.setattr(
+        early_hints, 'critical_resources',
+        lambda *args: pytest.fail('scanned again'),
+    )
+
+    second = client.get('/blog/')
+
+    assert second.headers['Link'] == first.headers['Link']
@@ -0,0 +1,72 @@
+from datetime import datetime, timezone
+
+import feeds
+
+
+def _post(slug, content='<p>Body</p>'):
+    return {
+        'slug': slug,
+        'title': f'Post <{slug}>',
+        'date': datetime(2024, 1, 2),
+        'updated_at': datetime(2024, 1, 3, tzinfo=timezone.utc),
+        'description': '',
+        'excerpt': 'Summary',
+        'tags': ['python'],
+        'content': content,
+    }
+
+
+def test_entry_fragments_are_cached_by_content_hash(monkeypatch):
+    feeds.clear_cache()
+    calls = []
+    original = feeds.atom_entry
+    monkeypatch.setitem(
+        feeds._SERIALIZERS,
+        'atom',
+        lambda post, base: calls.append(post['slug']) or original(post, base),
+    )
+    post = _post('one')
+
+    feeds.entry_fragment('atom', post, 'https://example.com')
+    feeds.entry_fragment('atom', dict(post), 'https://example.com')
+    feeds.entry_fragment('atom', _post('one', '<p>Edited</p>'), 'https://example.com')
+    touched = dict(post, updated_at=datetime(2024, 2, 1, tzinfo=timezone.utc))
+    fragment = feeds.entry_fragment('atom', touched, 'https://example.com')
+
+    assert calls == ['one', 'one', 'one']
+    assert '<updated>2024-02-01T00:00:00+00:00</updated>' in fragment
+    assert feeds.feed_etag('atom', [post], '') != (
+        feeds.feed_etag('atom', [touched], '')
+    )
+
+
+def test_atom_feed_escapes_entries():
+    xml = ''.join(feeds.generate_feed(
+        'atom', [_post('one')], 'https://example.com', {'name': 'Site'},
+    ))
+
+    assert xml.startswith('<?xml')
+    assert '<title>Post &lt;one&gt;</title>' in xml
+    assert '&lt;p&gt;Body&lt;/p&gt;' in xml
+    assert '<published>2024-01-02T00:00:00+00:00</published>' in xml
+
+
+def test_feed_routes_support_conditional_requests(client, tmp_path, monkeypatch):
+    (tmp_path / 'hello.md').write_text(
+        "---\ntitle: Hello\nslug: hello\ndate: 2024-01-01\n---\n\nBody.\n"
+    )
+    monkeypatch.setenv('CONTENT_DIR', str(tmp_path))
+
+    response = client.get('/feed.xml')
+    assert response.status_code == 200
+    assert response.content_type.startswith('application/atom+xml')
+    assert b'/blog/hello/' in response.data
+    etag = response.headers['ETag']
+
+    cached = client.get('/feed.xml', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.data == b''
+
+    rss = client.get('/rss.xml')
+    assert rss.status_code == 200
+    assert b'<rss version="2.0"' in rss.data
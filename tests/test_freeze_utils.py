@@ -33,3 +33,34 @@ def test_static_build_allows_configured_site_url(monkeypatch):
     monkeypatch.setitem(SITE_CONFIG, 'site_url', 'https://example.com')
 
     require_site_url_for_static_build()
+
+
+def test_collect_routes_writes_one_file_per_blog_page(monkeypatch, tmp_path):
+    import freeze
+    from blog import PostStore
+
+    for index in range(5):
+        (tmp_path / f'post-{index}.md').write_text(
+            f"---\ntitle: Post {index}\ndate: 2024-0{index + 1}-01\n"
+            "tags: [python]\n---\n\nBody.\n"
+        )
+    store = PostStore(tmp_path)
+    store.refresh()
+    monkeypatch.setattr(freeze, 'BLOG_PAGE_SIZE', 2)
+
+    routes = freeze.collect_routes(store)
+
+    index_pages = [
+        r for r in routes if r == '/blog/' or r.startswith('/blog/page/')
+    ]
+    assert index_pages == ['/blog/', '/blog/page/2/', '/blog/page/3/']
+    assert '/blog/tag/python/page/3/' in routes
+    assert '/blog/2024/page/3/' in routes
+    assert '/blog/2024/05/page/2/' not in routes
+    assert '/feed.xml' in routes and '/rss.xml' in routes
+    assert '/blog/post-4/' in routes
+    assert '/blog/tag/python/' in routes
+    assert '/blog/2024/' in routes and '/blog/2024/05/' in routes
+    assert freeze.route_destination('/blog/page/2/') == (
+        freeze.BUILD_DIR / 'blog' / 'page' / '2' / 'index.html'
+    )
@@ -0,0 +1,48 @@
+import pytest
+
+from blog import highlight
+from blog.highlight import HighlightCache, highlight_code
+
+pytest.importorskip('pygments')
+
+FENCED = (
+    '<p>Intro</p>\n'
+    '<pre><code class="language-python">x = &quot;&lt;a&gt;&quot; &amp; 1\n'
+    '</code></pre>\n'
+    '<pre><code>plain &lt;text&gt;\n</code></pre>'
+)
+
+
+def test_highlight_code_tokenises_tagged_blocks_only():
+    html = highlight_code(FENCED, HighlightCache(None))
+
+    assert '<pre><code class="language-python"><span class="n">x</span>' in html
+    assert '<span class="s2">&quot;&lt;a&gt;&quot;</span>' in html
+    assert '<pre><code>plain &lt;text&gt;\n</code></pre>' in html
+
+
+def test_unknown_language_is_left_unchanged():
+    block = '<pre><code class="language-nope">a &lt; b\n</code></pre>'
+    assert highlight_code(block, HighlightCache(None)) == block
+
+
+def test_each_block_is_highlighted_once(tmp_path, monkeypatch):
+    cache = HighlightCache(tmp_path)
+    first = highlight_code(FENCED + FENCED, cache)
+
+    assert (cache.highlighted, cache.reused) == (1, 1)
+    assert len(list(tmp_path.rglob('*.html'))) == 1
+
+    # A new process (or rebuild) reads the block back from disk.
+    monkeypatch.setattr(highlight, '_highlight', None)
+    rebuilt = HighlightCache(tmp_path)
+    assert highlight_code(FENCED + FENCED, rebuilt) == first
+    assert rebuilt.highlighted == 0
+
+
+def test_committed_stylesheet_matches_site_styles():
+    styles = highlight.highlight_styles()
+    expected = highlight.stylesheet(styles['style'], styles['dark_style'])
+
+    assert highlight.STYLESHEET_PATH.read_text(encoding='utf-8') == expected
+    assert '[data-theme=dark] .blog-post-body pre code .k' in expected
@@ -0,0 +1,133 @@
+import pickle
+
+import pytest
+
+from blog import PostStore
+from blog.html_store import HtmlStore, PostRecord
+from blog.store import RETIRE_SECONDS
+
+
+def _filled(hot_size=2, spill_dir=None, count=4):
+    store = HtmlStore(hot_size=hot_size, spill_dir=spill_dir)
+    for index in range(count):
+        store.put(f'k{index}', f'<p>post {index}</p>' * 50)
+    return store
+
+
+def test_get_round_trips_and_counts_hits():
+    store = _filled()
+
+    assert store.get('k0') == '<p>post 0</p>' * 50
+    assert store.get('k0') == '<p>post 0</p>' * 50
+    stats = store.stats()
+    assert (stats['hits'], stats['misses']) == (1, 1)
+    assert stats['hit_rate'] == 0.5
+    assert stats['entries'] == 4
+    assert stats['cold_bytes'] < 4 * len('<p>post 0</p>' * 50)
+
+
+def test_hot_tier_evicts_least_recently_read():
+    store = _filled(hot_size=2)
+    store.get('k0')
+    store.get('k1')
+    store.get('k0')
+    store.get('k2')  # evicts k1
+
+    assert list(store._hot) == ['k0', 'k2']
+    assert store.stats()['hot_entries'] == 2
+
+
+def test_spill_dir_keeps_cold_tier_on_disk(tmp_path):
+    store = _filled(spill_dir=tmp_path)
+
+    assert len(list(tmp_path.glob('*.html.z'))) == 4
+    assert store.get('k3') == '<p>post 3</p>' * 50
+    assert store.stats()['resident_bytes'] == store.stats()['hot_bytes']
+    store.discard('k3')
+    assert 'k3' not in store
+    assert len(list(tmp_path.glob('*.html.z'))) == 3
+
+
+def test_store_survives_pickling():
+    store = _filled()
+    store.get('k0')
+
+    restored = pickle.loads(pickle.dumps(store))
+    assert restored.get('k1') == '<p>post 1</p>' * 50
+    assert restored.hits == 0 and restored.misses == 2
+
+
+def test_post_record_reads_content_through_store():
+    store = _filled()
+    post = PostRecord({'slug': 'a', 'content_hash': 'k2'}, store)
+
+    assert 'content' in post
+    assert post['content'] == post.get('content') == '<p>post 2</p>' * 50
+    assert post.materialize()['content'] == post['content']
+    assert 'content' not in dict(post)
+
+
+def test_post_store_serves_content_from_tiers(tmp_path):
+    (tmp_path / 'a.md').write_text(
+        '---\ntitle: A\ndate: 2024-01-01\n---\n\nHello **world**.\n',
+        encoding='utf-8',
+    )
+    store = PostStore(tmp_path)
+    store.refresh()
+
+    post = store.get('a')
+    assert '<strong>world</strong>' in post['content']
+    assert store.html.stats()['entries'] == 1
+
+
+def test_metrics_expose_html_store_gauges(monkeypatch):
+    import instrumentation
+
+    monkeypatch.setattr(instrumentation, '_enabled', True)
+    body = instrumentation.render_prometheus()
+
+    assert '# TYPE site_post_html_hit_ratio gauge' in body
+    assert 'site_post_html_resident_bytes ' in body
+
+
+def test_byte_budget_caps_the_hot_tier():
+    store = _filled(hot_size=10)
+    for key in ('k0', 'k1', 'k2'):
+        store.get(key)
+
+    store.set_budget(store.stats()['hot_bytes'] // 2)
+    assert list(store._hot) == ['k2']
+    store.get('k3')
+    assert list(store._hot) == ['k3']
+
+
+def test_discarded_keys_raise_key_error(tmp_path):
+    for spill_dir in (None, tmp_path):
+        store = _filled(spill_dir=spill_dir)
+        store.discard('k1')
+        post = PostRecord({'slug': 'a', 'content_hash': 'k1'}, store)
+
+        with pytest.raises(KeyError):
+            store.get('k1')
+        assert post.get('content') is None
+
+
+def test_records_held_across_a_rescan_keep_their_content(tmp_path):
+    path = tmp_path / 'a.md'
+    path.write_text('---\ntitle: A\n---\n\nOld.\n', encoding='utf-8')
+    store = PostStore(tmp_path)
+    now = [1_000_000.0]
+    store.clock = lambda: now[0]
+    store.refresh()
+    held = store.get('a')
+
+    path.write_text('---\ntitle: A\n---\n\nNew text.\n', encoding='utf-8')
+    store.refresh(force=True)
+    assert 'Old.' in held['content']
+    assert len(store.html) == 2
+
+    now[0] += RETIRE_SECONDS + 1
+    store.refresh(force=True)
+    assert 'New text.' in store.get('a')['content']
+    assert len(store.html) == 1
+    assert held.get('content') is None
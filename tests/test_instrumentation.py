@@ -0,0 +1,47 @@
+import importlib
+
+import pytest
+
+import instrumentation
+
+
+@pytest.fixture
+def instrumented_client(monkeypatch):
+    monkeypatch.setattr(instrumentation, '_enabled', False)
+    monkeypatch.setenv('INSTRUMENTATION', 'true')
+    instrumentation.reset()
+    app_module = importlib.reload(importlib.import_module('app'))
+    app_module.app.config.update(TESTING=True)
+    with app_module.app.test_client() as client:
+        yield client
+    instrumentation.reset()
+
+
+def test_disabled_by_default(client):
+    response = client.get('/blog/')
+    assert 'Server-Timing' not in response.headers
+    assert client.get('/__metrics').status_code == 404
+
+
+def test_server_timing_header_lists_phases(instrumented_client):
+    response = instrumented_client.get('/blog/')
+    header = response.headers['Server-Timing']
+
+    for phase in ('posts', 'context', 'render', 'total'):
+        assert f'{phase};dur=' in header
+
+
+def test_metrics_endpoint_exposes_histograms(instrumented_client):
+    instrumented_client.get('/about/')
+    response = instrumented_client.get('/__metrics')
+    body = response.get_data(as_text=True)
+
+    assert response.status_code == 200
+    assert '# TYPE site_phase_duration_seconds histogram' in body
+    assert 'site_request_duration_seconds_count{endpoint="about"} 1' in body
+    assert 'site_phase_duration_seconds_bucket{phase="render",le="+Inf"}' in body
+
+
+def test_span_is_shared_noop_when_disabled(monkeypatch):
+    monkeypatch.setattr(instrumentation, '_enabled', False)
+    assert instrumentation.span('markdown') is instrumentation._NULL_SPAN
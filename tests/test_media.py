@@ -0,0 +1,72 @@
+import struct
+import zlib
+
+from blog.media import ImageSizeIndex, image_size, process_media
+
+
+def _png(width, height):
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    chunk = b'IHDR' + header
+    return (
+        b'\x89PNG\r\n\x1a\n'
+        + struct.pack('>I', len(header)) + chunk
+        + struct.pack('>I', zlib.crc32(chunk))
+    )
+
+
+def _jpeg(width, height):
+    app0 = b'\xff\xe0' + struct.pack('>H', 16) + b'JFIF\0' + b'\0' * 9
+    sof = b'\xff\xc0' + struct.pack('>HBHH', 11, 8, height, width) + b'\0' * 4
+    return b'\xff\xd8' + app0 + sof + b'\xff\xd9'
+
+
+def test_image_size_reads_headers(tmp_path):
+    files = {
+        'a.png': _png(640, 480),
+        'b.gif': b'GIF89a' + struct.pack('<HH', 32, 16) + b'\0' * 8,
+        'c.jpg': _jpeg(1200, 800),
+        'd.txt': b'not an image',
+    }
+    for name, data in files.items():
+        (tmp_path / name).write_bytes(data)
+
+    assert image_size(tmp_path / 'a.png') == (640, 480)
+    assert image_size(tmp_path / 'b.gif') == (32, 16)
+    assert image_size(tmp_path / 'c.jpg') == (1200, 800)
+    assert image_size(tmp_path / 'd.txt') is None
+
+
+def test_process_media_adds_lazy_attributes_and_sizes(tmp_path):
+    (tmp_path / 'shot.png').write_bytes(_png(300, 200))
+    index = ImageSizeIndex({'/static/': tmp_path})
+
+    html = process_media(
+        '<p><img alt="x" src="/static/shot.png" /></p>'
+        '<p><img src="https://example.com/remote.png"></p>'
+        '<img src="/static/shot.png" loading="eager" width="10">'
+        '<iframe src="https://example.com/embed"></iframe>'
+        '<video src="/static/clip.mp4"></video>'
+        '<pre><code>&lt;img src="x"&gt;</code></pre>',
+        index,
+    )
+
+    assert (
+        '<img alt="x" src="/static/shot.png" loading="lazy" decoding="async" '
+        'width="300" height="200" />'
+    ) in html
+    assert (
+        '<img src="https://example.com/remote.png" loading="lazy" '
+        'decoding="async">'
+    ) in html
+    assert '<img src="/static/shot.png" loading="eager" width="10" ' \
+        'decoding="async">' in html
+    assert '<iframe src="https://example.com/embed" loading="lazy">' in html
+    assert '<video src="/static/clip.mp4" preload="metadata">' in html
+    assert '&lt;img src="x"&gt;' in html
+
+
+def test_size_index_rejects_paths_outside_roots(tmp_path):
+    index = ImageSizeIndex({'/static/': tmp_path / 'static'})
+
+    assert index.resolve('/static/../secret.png') is None
+    assert index.resolve('/elsewhere/a.png') is None
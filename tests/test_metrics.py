@@ -106,3 +106,96 @@ def test_git_helper_swallows_command_failure(monkeypatch):
 
     monkeypatch.setattr(subprocess, 'run', raise_called_process_error)
     assert metrics._git(['log', '-1']) is None
+
+
+def _ledger_git(head, history, shallow=False):
+    """Fake git over `history`: a list of (sha, commit time), oldest first."""
+    calls = []
+    shas = [sha for sha, _ in history]
+
+    def fake_git(args, cwd=None, timeout=None):
+        calls.append(args)
+        if args == ['rev-parse', 'HEAD']:
+            return head
+        if args == ['rev-parse', '--is-shallow-repository']:
+            return 'true' if shallow else 'false'
+        if args[:2] == ['merge-base', '--is-ancestor']:
+            return '' if args[2] in shas else None
+        if args[:2] == ['log', '--format=%ct']:
+            start = 0
+            if '..' in args[2]:
+                start = shas.index(args[2].split('..')[0]) + 1
+            return '\n'.join(_epoch(moment) for _, moment in history[start:])
+        if args == ['log', '-1', '--format=%cI']:
+            return history[-1][1].isoformat()
+        if args[0] == 'fetch':
+            return ''
+        raise AssertionError(f'unexpected git args: {args}')
+
+    return fake_git, calls
+
+
+def test_ledger_scans_only_new_commits(monkeypatch, tmp_path):
+    ledger_path = tmp_path / 'ledger.json'
+    history = [
+        ('a1', NOW - timedelta(weeks=20)),
+        ('b2', NOW - timedelta(weeks=3)),
+        ('c3', NOW - timedelta(days=1)),
+    ]
+    fake_git, _ = _ledger_git('c3', history)
+    monkeypatch.setattr(metrics, '_git', fake_git)
+    metrics.refresh_ledger(ledger_path)
+    first = metrics.collect_metrics(now=NOW, ledger_path=ledger_path)
+
+    history.append(('d4', NOW - timedelta(hours=2)))
+    fake_git, calls = _ledger_git('d4', history, shallow=True)
+    monkeypatch.setattr(metrics, '_git', fake_git)
+    metrics.refresh_ledger(ledger_path)
+    second = metrics.collect_metrics(now=NOW, ledger_path=ledger_path)
+
+    assert first['total_commits'] == 3
+    assert second['total_commits'] == 4
+    assert second['weekly_commits'][-1] == 2
+    assert second['weekly_commits'][-4] == 1
+    assert sum(second['weekly_commits']) == 3
+    assert ['log', '--format=%ct', 'c3..HEAD'] in calls
+    assert ['log', '--format=%ct', 'HEAD'] not in calls
+    assert not any(args[0] == 'fetch' for args in calls)
+
+
+def test_ledger_unknown_to_shallow_clone_fetches_history(monkeypatch, tmp_path):
+    ledger_path = tmp_path / 'ledger.json'
+    metrics.save_ledger(
+        {'version': 1, 'commit': 'gone', 'total': 99, 'weeks': {}}, ledger_path,
+    )
+    fake_git, calls = _ledger_git('b2', [
+        ('a1', NOW - timedelta(days=8)),
+        ('b2', NOW - timedelta(days=1)),
+    ], shallow=True)
+    monkeypatch.setattr(metrics, '_git', fake_git)
+
+    metrics.refresh_ledger(ledger_path)
+    result = metrics.collect_metrics(now=NOW, ledger_path=ledger_path)
+
+    assert ['fetch', '--unshallow', '--quiet'] in calls
+    assert result['total_commits'] == 2
+    assert metrics.load_ledger(ledger_path)['commit'] == 'b2'
+
+
+def test_collect_metrics_only_reads_the_ledger(monkeypatch, tmp_path):
+    ledger_path = tmp_path / 'ledger.json'
+    metrics.save_ledger(
+        {'version': 1, 'commit': 'gone', 'total': 99, 'weeks': {}}, ledger_path,
+    )
+    before = ledger_path.read_text()
+    fake_git, calls = _ledger_git('b2', [
+        ('a1', NOW - timedelta(days=8)),
+        ('b2', NOW - timedelta(days=1)),
+    ], shallow=True)
+    monkeypatch.setattr(metrics, '_git', fake_git)
+
+    result = metrics.collect_metrics(now=NOW, ledger_path=ledger_path)
+
+    assert result['total_commits'] == 99
+    assert calls == [['log', '-1', '--format=%cI']]
+    assert ledger_path.read_text() == before
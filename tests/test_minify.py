@@ -0,0 +1,64 @@
+import minify
+
+
+def test_minify_html_collapses_whitespace_and_drops_comments():
+    html = minify.minify_html(
+        '<!DOCTYPE html>\n<html>\n    <!-- layout -->\n'
+        '    <body class="a  b">\n'
+        '        <p>One   two\n\n   three</p>\n'
+        '        <img src="x.png"\n             alt="x" />\n'
+        '        <!--[if IE]><p>old</p><![endif]-->\n'
+        '    </body>\n</html>\n'
+    )
+
+    assert html == (
+        '<!DOCTYPE html>\n<html>\n'
+        '<body class="a  b">\n'
+        '<p>One two\nthree</p>\n'
+        '<img src="x.png"\nalt="x"/>\n'
+        '<!--[if IE]><p>old</p><![endif]-->\n'
+        '</body>\n</html>\n'
+    )
+
+
+def test_minify_html_keeps_whitespace_sensitive_elements():
+    protected = (
+        '<pre><code>def f():\n    return  1\n</code></pre>'
+        '<p>Use <code>a  =  b</code></p>'
+        '<textarea name="body">  keep\n  me</textarea>'
+        '<script>if (a <b) {\n    x = "  y  ";\n}</script>'
+        '<style>\n  p  { margin: 0 }\n</style>'
+        '<p title="x > y   z">text</p>'
+    )
+
+    html = minify.minify_html('\n    ' + protected + '\n\n')
+
+    assert html == protected + '\n'
+
+
+def test_minify_xml_removes_template_indentation():
+    xml = minify.minify_xml(
+        '<?xml version="1.0"?>\n<urlset>\n\n    <url>\n'
+        '        <loc>https://example.com/a b</loc>\n'
+        '        \n    </url>\n</urlset>\n'
+    )
+
+    assert xml == (
+        '<?xml version="1.0"?><urlset><url>'
+        '<loc>https://example.com/a b</loc></url></urlset>\n'
+    )
+
+
+def test_minify_files_reports_bytes_saved(tmp_path):
+    page = tmp_path / 'index.html'
+    page.write_text('<p>\n    Hello\n</p>\n')
+    already = tmp_path / 'tight.html'
+    already.write_text('<p>Hi</p>\n')
+    text = tmp_path / 'robots.txt'
+    text.write_text('User-agent: *\n\n')
+
+    results = minify.minify_files([page, already, text], workers=2)
+
+    assert results == [(page, 19, 15), (already, 10, 10), (text, 15, 15)]
+    assert page.read_text() == '<p>\nHello\n</p>\n'
+    assert text.read_text() == 'User-agent: *\n\n'
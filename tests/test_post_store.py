@@ -0,0 +1,203 @@
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from blog import PostStore, load_posts
+
+
+def _write(path: Path, title, date, tags='[]', body='Body.'):
+    path.write_text(
+        f"---\ntitle: {title}\ndate: {date}\ntags: {tags}\n---\n\n{body}\n",
+        encoding='utf-8',
+    )
+
+
+def _bump(path: Path):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_store_matches_load_posts_order(tmp_path):
+    _write(tmp_path / 'b.md', 'B', '2024-02-01')
+    _write(tmp_path / 'a.md', 'A', '2024-02-01')
+    _write(tmp_path / 'c.md', 'C', '2024-03-01')
+    store = PostStore(tmp_path)
+    store.refresh()
+
+    assert [p['slug'] for p in store.posts] == [
+        p['slug'] for p in load_posts(tmp_path)
+    ]
+    assert store.get('a')['title'] == 'A'
+
+
+def test_store_indexes_tags_and_archives(tmp_path):
+    _write(tmp_path / 'one.md', 'One', '2023-05-01', '[Python, DevOps]')
+    _write(tmp_path / 'two.md', 'Two', '2024-01-15', 'python')
+    store = PostStore(tmp_path)
+    store.refresh()
+
+    assert [p['slug'] for p in store.tag_posts('python')] == ['two', 'one']
+    assert store.tag_labels['devops'] == 'DevOps'
+    assert [p['slug'] for p in store.archive_posts(2023, 5)] == ['one']
+    assert store.years() == [2024, 2023]
+
+
+def test_store_reparses_only_changed_files(tmp_path, monkeypatch):
+    import blog.store
+
+    _write(tmp_path / 'one.md', 'One', '2023-05-01', '[python]')
+    _write(tmp_path / 'two.md', 'Two', '2024-01-15', '[python]')
+    store = PostStore(tmp_path)
+    store.refresh()
+
+    parsed = []
+    original = blog.store.parse_post
+    monkeypatch.setattr(
+        blog.store, 'parse_post', lambda path: parsed.append(path) or original(path)
+    )
+    _write(tmp_path / 'one.md', 'One', '2023-05-01', '[docker]')
+    _bump(tmp_path / 'one.md')
+    (tmp_path / 'two.md').unlink()
+
+    assert store.refresh(force=True) is True
+    assert parsed == [tmp_path / 'one.md']
+    assert 'python' not in store.tags
+    assert [p['slug'] for p in store.tag_posts('docker')] == ['one']
+    assert store.archive_posts(2024) == []
+    assert store.refresh(force=True) is False
+
+
+def _write_status(path: Path, title, date, status):
+    path.write_text(
+        f"---\ntitle: {title}\ndate: {date}\nstatus: {status}\n---\n\nBody.\n",
+        encoding='utf-8',
+    )
+
+
+def test_drafts_are_not_listed(tmp_path):
+    _write_status(tmp_path / 'live.md', 'Live', '2024-01-01', 'published')
+    _write_status(tmp_path / 'wip.md', 'WIP', '2024-01-02', 'draft')
+    store = PostStore(tmp_path)
+    store.refresh()
+
+    assert [p['slug'] for p in store.posts] == ['live']
+    assert store.get('wip') is None
+    assert store.archive_posts(2024, 1) == [store.get('live')]
+    assert [p['slug'] for p in load_posts(tmp_path)] == ['live']
+    assert store.next_publish_at() is None
+
+
+def test_scheduled_post_goes_live_without_a_rescan(tmp_path, monkeypatch):
+    _write(tmp_path / 'old.md', 'Old', '2024-01-01', 'python')
+    _write(tmp_path / 'later.md', 'Later', '2024-06-01T09:30:00', 'python')
+    store = PostStore(tmp_path)
+    now = datetime(2024, 5, 1, tzinfo=timezone.utc).timestamp()
+    store.clock = lambda: now
+    store.refresh()
+
+    assert [p['slug'] for p in store.posts] == ['old']
+    assert store.next_publish_at() == datetime(
+        2024, 6, 1, 9, 30, tzinfo=timezone.utc,
+    )
+    generation = store.generation
+
+    monkeypatch.setattr('blog.store.REFRESH_INTERVAL', 3600)
+    monkeypatch.setattr(
+        store, '_rescan', lambda: pytest.fail('rescanned'),
+    )
+    assert store.refresh() is False
+    now = datetime(2024, 6, 1, 9, 30, tzinfo=timezone.utc).timestamp()
+    assert store.refresh() is True
+
+    assert [p['slug'] for p in store.posts] == ['later', 'old']
+    assert [p['slug'] for p in store.tag_posts('python')] == ['later', 'old']
+    assert store.next_publish_at() is None
+    changes = store.changes_since(generation)
+    assert ('post', 'later') in changes
+    assert ('archive', (2024, 6)) in changes
+    assert ('archive', (2024, 1)) not in changes
+    assert ('index', None) in changes
+
+
+def test_rescheduled_post_ignores_its_old_publish_time(tmp_path):
+    path = tmp_path / 'later.md'
+    _write(path, 'Later', '2024-06-01')
+    store = PostStore(tmp_path)
+    now = datetime(2024, 5, 1, tzinfo=timezone.utc).timestamp()
+    store.clock = lambda: now
+    store.refresh()
+
+    _write(path, 'Later', '2024-07-01')
+    _bump(path)
+    store.refresh(force=True)
+    now = datetime(2024, 6, 15, tzinfo=timezone.utc).timestamp()
+    store.refresh(force=True)
+
+    assert store.posts == []
+    assert store.next_publish_at() == datetime(2024, 7, 1, tzinfo=timezone.utc)
+    assert store.changes_since(store.generation) == set()
+    assert store.changes_since(-1) is None
+
+
+def test_sandbox_fallback_is_retried_with_backoff(tmp_path, monkeypatch):
+    import blog.utils
+    from blog.rendering import fallback_html, render_markdown
+    from blog.store import RENDER_RETRY_SECONDS
+
+    _write(tmp_path / 'slow.md', 'Slow', '2024-01-01', body='*Body.*')
+    renders = []
+    monkeypatch.setattr(
+        blog.utils, 'render_markdown',
+        lambda text: renders.append(text) or fallback_html(text),
+    )
+    store = PostStore(tmp_path)
+    now = [time.time()]
+    store.clock = lambda: now[0]
+    store.refresh()
+    generation = store.generation
+
+    for _ in range(5):
+        now[0] += 1
+        assert not store.refresh(force=True)
+    assert len(renders) == 1
+    assert store.generation == generation
+    assert 'markdown-fallback' in store.get('slow')['content']
+
+    now[0] += RENDER_RETRY_SECONDS
+    assert store.refresh(force=True)
+    assert len(renders) == 2
+    now[0] += RENDER_RETRY_SECONDS
+    assert not store.refresh(force=True)
+    assert len(renders) == 2
+
+    monkeypatch.setattr(blog.utils, 'render_markdown', render_markdown)
+    now[0] += RENDER_RETRY_SECONDS
+    assert store.refresh(force=True)
+    assert store.get('slow')['content'] == '<p><em>Body.</em></p>'
+    now[0] += RENDER_RETRY_SECONDS * 10
+    assert not store.refresh(force=True)
+
+
+def test_broken_file_is_not_reparsed_until_it_changes(tmp_path, capsys):
+    _write(tmp_path / 'good.md', 'Good', '2024-01-01')
+    (tmp_path / '2024.md').write_text('---\ntitle: Year\n---\n\nBody.\n')
+    store = PostStore(tmp_path)
+    store.refresh()
+    generation = store.generation
+    assert capsys.readouterr().out.count('2024.md') == 1
+
+    for _ in range(5):
+        assert not store.refresh(force=True)
+    assert store.generation == generation
+    assert store.changes_since(generation) == set()
+    assert '2024.md' not in capsys.readouterr().out
+
+    (tmp_path / '2024.md').write_text(
+        '---\ntitle: Year\nslug: year-post\n---\n\nBody.\n'
+    )
+    _bump(tmp_path / '2024.md')
+    assert store.refresh(force=True)
+    assert store.get('year-post')['title'] == 'Year'
@@ -0,0 +1,68 @@
+import json
+import re
+
+import prefetch
+
+PAGE = """<html><head><title>{title}</title></head><body>
+<nav><a href="/">Home</a><a href="/blog/">Blog</a></nav>
+<main>{links}</main>
+</body></html>
+"""
+
+
+def _page(title, *hrefs):
+    links = ''.join(f'<a href="{href}">x</a>' for href in hrefs)
+    return PAGE.format(title=title, links=links)
+
+
+def _rules(document):
+    match = re.search(
+        r'<script type="speculationrules">(.*?)</script>', document,
+    )
+    return json.loads(match.group(1)) if match else None
+
+
+def test_page_links_reads_main_only_and_drops_fragments():
+    document = _page(
+        'Index', '/blog/a/#comments', 'https://example.com/', '//cdn/x',
+        '/blog/b/?ref=1', 'mailto:me@example.com',
+    )
+
+    assert prefetch.page_links(document) == ['/blog/a/', '/blog/b/']
+
+
+def test_top_destinations_rank_by_page_then_site_links():
+    graph = prefetch.link_graph({
+        '/blog/': _page('Index', '/blog/a/', '/blog/b/', '/blog/b/',
+                        '/blog/c/', '/missing/'),
+        '/blog/a/': _page('A', '/blog/', '/blog/c/'),
+        '/blog/b/': _page('B', '/blog/b/'),
+        '/blog/c/': _page('C'),
+    })
+
+    ranked = prefetch.top_destinations(graph, limit=2)
+
+    assert ranked['/blog/'] == ['/blog/b/', '/blog/c/']
+    assert ranked['/blog/a/'] == ['/blog/c/', '/blog/']
+    assert ranked['/blog/b/'] == []
+
+
+def test_apply_prefetch_writes_speculation_rules(tmp_path):
+    (tmp_path / 'blog' / 'a').mkdir(parents=True)
+    (tmp_path / 'index.html').write_text(_page('Home', '/base/blog/a/'))
+    (tmp_path / 'blog' / 'a' / 'index.html').write_text(_page('A'))
+
+    assert prefetch.apply_prefetch(tmp_path, '/base', limit=4) == 1
+
+    rules = _rules((tmp_path / 'index.html').read_text())
+    assert rules['prefetch'] == [{'source': 'list', 'urls': ['/base/blog/a/']}]
+    assert rules['prerender'][0]['eagerness'] == 'moderate'
+    assert _rules((tmp_path / 'blog' / 'a' / 'index.html').read_text()) is None
+
+
+def test_zero_limit_disables_hints(tmp_path):
+    (tmp_path / 'index.html').write_text(_page('Home', '/about.html'))
+    (tmp_path / 'about.html').write_text(_page('About'))
+
+    assert prefetch.apply_prefetch(tmp_path, limit=0) == 0
+    assert 'speculationrules' not in (tmp_path / 'index.html').read_text()
@@ -0,0 +1,72 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import profiler
+
+
+@pytest.fixture
+def profile_dir(tmp_path):
+    previous = dict(profiler._settings)
+    profiler.configure(
+        enabled=True,
+        interval=0.001,
+        threshold=0.02,
+        directory=tmp_path,
+        keep=2,
+    )
+    yield tmp_path
+    profiler._settings.update(previous)
+
+
+def _busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_slow_call_writes_collapsed_stacks(profile_dir):
+    profiled_busy = profiler.profiled('busy')(_busy)
+    profiled_busy(0.1)
+
+    [written] = list(profile_dir.glob('*.profile.collapsed'))
+    assert written.name.endswith('ms-busy.profile.collapsed')
+    assert '_busy (test_profiler.py:' in written.read_text()
+
+
+def test_fast_call_is_discarded(profile_dir):
+    profiler.profiled('quick')(_busy)(0)
+    assert not list(profile_dir.iterdir())
+
+
+def test_ring_directory_keeps_newest_files(profile_dir):
+    for _ in range(3):
+        profiler.profiled('busy')(_busy)(0.03)
+    assert len(list(profile_dir.iterdir())) == 2
+
+
+def test_speedscope_output_shares_frames():
+    samples = {('main (a.py:1)', 'work (a.py:5)'): 3, ('main (a.py:1)',): 1}
+    payload = profiler.to_speedscope('demo', samples, 0.005)
+
+    assert [frame['name'] for frame in payload['shared']['frames']] == [
+        'main (a.py:1)',
+        'work (a.py:5)',
+    ]
+    assert payload['profiles'][0]['samples'] == [[0, 1], [0]]
+
+
+def test_sampler_sleeps_until_a_section_starts(profile_dir, monkeypatch):
+    profiler.profiled('quick')(_busy)(0)
+    time.sleep(0.01)  # let an in-flight sample finish
+    wakeups = []
+    monkeypatch.setattr(profiler, 'time', SimpleNamespace(
+        sleep=wakeups.append, perf_counter=time.perf_counter,
+    ))
+
+    time.sleep(0.05)
+    assert wakeups == []
+
+    profiler.profiled('busy')(_busy)(0.01)
+    assert wakeups
@@ -0,0 +1,53 @@
+from blog.related import RelatedIndex
+
+
+def _post(slug, body, tags=()):
+    return {'slug': slug, 'content': f'<p>{body}</p>', 'tags': list(tags)}
+
+
+POSTS = [
+    _post('docker-basics', 'docker containers images compose volumes', ['docker']),
+    _post('docker-compose', 'compose services docker networks volumes', ['docker']),
+    _post('python-tooling', 'python packaging virtualenv pytest tooling', ['python']),
+    _post('python-tests', 'pytest fixtures python assertions tooling', ['python']),
+]
+
+
+def test_rebuild_ranks_similar_posts_first():
+    index = RelatedIndex(top_k=1)
+    index.rebuild(POSTS)
+
+    assert index.neighbours['docker-basics'] == ['docker-compose']
+    assert index.neighbours['python-tests'] == ['python-tooling']
+
+
+def test_update_recomputes_only_affected_rows():
+    index = RelatedIndex(top_k=1)
+    index.rebuild(POSTS)
+
+    edited = _post('python-tests', 'docker compose volumes networks', ['docker'])
+    dirty = index.update([edited], [])
+
+    assert 'python-tests' in dirty
+    assert index.neighbours['python-tests'] in (
+        ['docker-basics'], ['docker-compose'],
+    )
+    assert index.neighbours['python-tooling'] == []
+
+
+def test_blog_detail_renders_related_links(client, tmp_path, monkeypatch):
+    for slug, body in (
+        ('alpha', 'kubernetes helm charts clusters'),
+        ('beta', 'kubernetes helm clusters deployments'),
+        ('gamma', 'watercolour painting brushes'),
+    ):
+        (tmp_path / f'{slug}.md').write_text(
+            f"---\ntitle: {slug.title()}\nslug: {slug}\ndate: 2024-01-01\n"
+            f"---\n\n{body}\n"
+        )
+    monkeypatch.setenv('CONTENT_DIR', str(tmp_path))
+
+    body = client.get('/blog/alpha/').data
+
+    assert b'href="/blog/beta/"' in body
+    assert b'No other posts yet.' not in body
@@ -0,0 +1,67 @@
+import pytest
+
+from blog import rendering
+from blog.rendering import MarkdownSandbox, fallback_html, render_markdown
+
+
+@pytest.fixture(autouse=True)
+def _fresh_stats():
+    rendering.render_stats.reset()
+    yield
+    rendering.render_stats.reset()
+
+
+@pytest.fixture
+def sandbox():
+    pool = MarkdownSandbox(workers=1, timeout=5, max_bytes=10_000)
+    yield pool
+    pool.close()
+
+
+def test_inline_render_records_durations():
+    assert render_markdown('Hello **world**') == (
+        '<p>Hello <strong>world</strong></p>'
+    )
+    assert rendering.render_stats.renders == 1
+    assert rendering.render_stats.percentiles()[0.5] > 0
+
+
+def test_sandbox_renders_in_worker(sandbox):
+    assert render_markdown('| a |\n| - |\n| 1 |', sandbox).startswith('<table>')
+    assert not rendering.render_stats.fallbacks
+
+
+def test_oversize_input_falls_back_to_escaped_text(sandbox, capsys):
+    text = '<script>x</script>\n' * 1000
+
+    assert render_markdown(text, sandbox) == fallback_html(text)
+    assert '&lt;script&gt;' in fallback_html(text)
+    assert rendering.render_stats.fallbacks['oversize'] == 1
+    assert 'oversize' in capsys.readouterr().out
+
+
+def test_timeout_replaces_the_pool(sandbox):
+    sandbox.max_bytes = 10_000_000
+    sandbox.start()
+    slow = '\n'.join(
+        '    ' * (depth % 12) + f'- item {depth} with *emphasis*'
+        for depth in range(20_000)
+    )
+    sandbox.timeout = 0.001
+
+    assert render_markdown(slow, sandbox) == fallback_html(slow)
+    assert rendering.render_stats.fallbacks['timeout'] == 1
+
+    sandbox.timeout = 5
+    assert render_markdown('*ok*', sandbox) == '<p><em>ok</em></p>'
+
+
+def test_metrics_report_render_percentiles(monkeypatch):
+    import instrumentation
+
+    render_markdown('text')
+    body = instrumentation.render_prometheus()
+
+    assert '# TYPE site_markdown_render_seconds_p99 gauge' in body
+    assert 'site_markdown_renders_total 1' in body
+    assert 'site_markdown_fallbacks_timeout_total 0' in body
@@ -0,0 +1,61 @@
+import json
+import re
+
+import service_worker
+
+PAGE = """<html><head>
+<link rel="stylesheet" href="/base/static/css/style.css?v=3">
+<link rel="preload" as="font" href="/base/static/fonts/a.woff2" crossorigin>
+<link rel="stylesheet" href="https://fonts.googleapis.com/css2?family=X">
+<link rel="canonical" href="/base/static/css/unused.css">
+</head><body><script src="/base/static/js/script.js?v=3"></script></body></html>
+"""
+
+
+def _build(tmp_path):
+    css = tmp_path / 'static' / 'css'
+    css.mkdir(parents=True)
+    (tmp_path / 'static' / 'js').mkdir()
+    (tmp_path / 'static' / 'fonts').mkdir()
+    (css / 'style.css').write_text(
+        "@import url('base.css');\n"
+        "@font-face{src:url(/base/static/fonts/a.woff2)}\n"
+    )
+    (css / 'base.css').write_text("body{background:url('data:x')}\n")
+    (css / 'unused.css').write_text('')
+    (tmp_path / 'static' / 'js' / 'script.js').write_text('')
+    (tmp_path / 'static' / 'fonts' / 'a.woff2').write_bytes(b'wOF2')
+    (tmp_path / 'index.html').write_text(PAGE)
+    return tmp_path
+
+
+def _precache(worker):
+    return json.loads(re.search(r'PRECACHE = (\[.*?\]);', worker, re.S).group(1))
+
+
+def test_shell_follows_head_links_scripts_and_css_imports(tmp_path):
+    shell = service_worker.collect_shell(_build(tmp_path), '/base')
+
+    assert list(shell) == [
+        '/base/static/css/base.css',
+        '/base/static/css/style.css?v=3',
+        '/base/static/fonts/a.woff2',
+        '/base/static/js/script.js?v=3',
+    ]
+
+
+def test_worker_version_changes_with_shell_content(tmp_path):
+    build = _build(tmp_path)
+    path, version, _ = service_worker.build_service_worker(build, '/base')
+
+    worker = path.read_text()
+    assert f"VERSION = '{version}'" in worker
+    assert '/base/static/css/base.css' in _precache(worker)
+    assert '<meta name="service-worker" content="/base/sw.js">' in (
+        (build / 'index.html').read_text()
+    )
+
+    (build / 'static' / 'css' / 'base.css').write_text('body{color:red}\n')
+    _, changed, _ = service_worker.build_service_worker(build, '/base')
+    assert changed != version
+    assert (build / 'index.html').read_text().count('name="service-worker"') == 1
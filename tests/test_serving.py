@@ -0,0 +1,99 @@
+import os
+import time
+
+import pytest
+
+import early_hints
+import serving
+
+
+@pytest.fixture
+def posts_dir(tmp_path, monkeypatch):
+    (tmp_path / 'hello.md').write_text(
+        "---\ntitle: Hello\nslug: hello\ndate: 2024-01-01\n---\n\nBody.\n"
+    )
+    monkeypatch.setenv('CONTENT_DIR', str(tmp_path))
+    serving.reset()
+    yield tmp_path
+    serving.reset()
+
+
+def test_ready_only_after_warm_up(app, client, posts_dir):
+    assert client.get('/ready').status_code == 503
+
+    summary = serving.warm_up(app, ['/blog/', '/blog/hello/', '/missing/'])
+
+    assert summary['posts'] == 1
+    assert summary['pages'] == 2
+    assert summary['templates'] > 0
+    assert client.get('/ready').status_code == 200
+
+
+def test_warm_pages_are_served_from_the_shared_segment(
+    app, client, posts_dir, monkeypatch,
+):
+    serving.warm_up(app, ['/blog/hello/'])
+    live = app.view_functions['blog_detail']
+    app.view_functions['blog_detail'] = lambda slug: pytest.fail('rendered')
+    early_hints.clear_cache()
+    monkeypatch.setattr(
+        early_hints, 'critical_resources',
+        lambda *args: pytest.fail('scanned'),
+    )
+
+    response = client.get('/blog/hello/')
+    cached = client.get(
+        '/blog/hello/', headers={'If-None-Match': response.headers['ETag']},
+    )
+
+    app.view_functions['blog_detail'] = live
+    assert response.status_code == 200
+    assert '/static/css/style.css' in response.headers['Link']
+    assert b'Hello' in response.data
+    assert cached.status_code == 304
+
+
+def test_edited_content_bypasses_the_shared_segment(
+    app, client, posts_dir, monkeypatch,
+):
+    monkeypatch.setattr('blog.store.REFRESH_INTERVAL', 0)
+    serving.warm_up(app, ['/blog/hello/'])
+
+    path = posts_dir / 'hello.md'
+    path.write_text(
+        "---\ntitle: Hello again\nslug: hello\ndate: 2024-01-01\n---\n\nNew.\n"
+    )
+    later = time.time() + 5
+    os.utime(path, (later, later))
+
+    assert b'Hello again' in client.get('/blog/hello/').data
+
+
+def test_scheduled_post_only_invalidates_the_pages_it_affects(
+    app, client, posts_dir,
+):
+    (posts_dir / 'soon.md').write_text(
+        "---\ntitle: Soon\nslug: soon\ndate: 2999-01-01\n---\n\nLater.\n"
+    )
+    serving.warm_up(app, ['/blog/', '/blog/hello/'])
+    from blog import get_store
+
+    with app.app_context():
+        store = get_store()
+    segment = serving.page_segment()
+    store.clock = lambda: 32503680000.0  # 3000-01-01
+    store.refresh()
+
+    assert store.get('soon') is not None
+    assert segment.is_current('/blog/hello/', store)
+    assert not segment.is_current('/blog/', store)
+    assert b'Soon' in client.get('/blog/').data
+
+
+def test_page_change_keys():
+    assert serving.page_change_key('/blog/hello/') == ('post', 'hello')
+    assert serving.page_change_key('/blog/tag/python/') == ('tag', 'python')
+    assert serving.page_change_key('/blog/2024/05/') == ('archive', (2024, 5))
+    assert serving.page_change_key('/blog/2024/') == ('archive', (2024, None))
+    assert serving.page_change_key('/blog/page/2/') == ('index', None)
+    assert serving.page_change_key('/') == ('index', None)
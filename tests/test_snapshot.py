@@ -0,0 +1,84 @@
+from blog import snapshot
+from blog.store import PostStore, clear_stores, get_store
+
+
+POST = """---
+title: {title}
+date: 2024-03-01
+tags: [python]
+---
+
+Body for {title}.
+"""
+
+
+def _write(directory, slug, title):
+    path = directory / f'{slug}.md'
+    path.write_text(POST.format(title=title), encoding='utf-8')
+
+
+def _built_store(tmp_path):
+    content = tmp_path / 'content'
+    content.mkdir()
+    _write(content, 'first', 'First')
+    _write(content, 'second', 'Second')
+    store = PostStore(content.resolve())
+    store.refresh(force=True)
+    return store
+
+
+def test_snapshot_round_trip_installs_store(tmp_path):
+    store = _built_store(tmp_path)
+    path = snapshot.write_snapshot(store, tmp_path / 'content.snapshot')
+    clear_stores()
+
+    loaded = snapshot.install_snapshot(path)
+
+    assert loaded is not None
+    assert [post['slug'] for post in loaded.posts] == ['first', 'second']
+    assert loaded.tag_posts('python') == loaded.posts
+    assert loaded.get('first')['content_hash'] == store.get('first')['content_hash']
+    assert get_store(store.directory) is loaded
+    clear_stores()
+
+
+def test_installed_snapshot_picks_up_later_edits(tmp_path):
+    store = _built_store(tmp_path)
+    path = snapshot.write_snapshot(store, tmp_path / 'content.snapshot')
+    clear_stores()
+    snapshot.install_snapshot(path)
+
+    _write(store.directory, 'third', 'Third')
+
+    assert get_store(store.directory).get('third') is not None
+    clear_stores()
+
+
+def test_snapshot_from_other_parser_code_is_ignored(tmp_path, monkeypatch):
+    store = _built_store(tmp_path)
+    path = snapshot.write_snapshot(store, tmp_path / 'content.snapshot')
+    monkeypatch.setattr(snapshot, 'code_fingerprint', lambda: b'\0' * 32)
+
+    assert snapshot.install_snapshot(path) is None
+
+
+def test_missing_or_truncated_snapshot_falls_back(tmp_path):
+    assert snapshot.install_snapshot(tmp_path / 'missing.snapshot') is None
+    empty = tmp_path / 'empty.snapshot'
+    empty.write_bytes(b'')
+    assert snapshot.install_snapshot(empty) is None
+    short = tmp_path / 'short.snapshot'
+    short.write_bytes(snapshot.MAGIC)
+    assert snapshot.install_snapshot(short) is None
+
+
+def test_corrupt_snapshot_body_falls_back(tmp_path):
+    store = _built_store(tmp_path)
+    path = snapshot.write_snapshot(store, tmp_path / 'content.snapshot')
+    data = path.read_bytes()
+    header = snapshot._HEADER.size
+
+    path.write_bytes(data[:header] + b'\xff' * 16 + data[header + 16:])
+    assert snapshot.install_snapshot(path) is None
+    path.write_bytes(data[:header + (len(data) - header) // 2])
+    assert snapshot.install_snapshot(path) is None
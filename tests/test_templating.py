@@ -0,0 +1,46 @@
+from flask import Flask
+
+import templating
+
+
+def _make_app(debug):
+    app = Flask(__name__, template_folder='../templates')
+    app.debug = debug
+    templating.configure_templates(app)
+    return app
+
+
+def test_debug_mode_reloads_templates_without_cache():
+    app = _make_app(debug=True)
+
+    assert app.jinja_env.auto_reload is True
+    assert app.jinja_env.bytecode_cache is None
+
+
+def test_production_mode_uses_shared_bytecode_cache(monkeypatch, tmp_path):
+    monkeypatch.setenv('TEMPLATE_CACHE_DIR', str(tmp_path))
+    app = _make_app(debug=False)
+
+    assert app.config['TEMPLATES_AUTO_RELOAD'] is False
+    assert app.jinja_env.auto_reload is False
+
+    count = templating.precompile_templates(app)
+
+    assert count == len(app.jinja_env.list_templates())
+    assert len(list(tmp_path.glob('__jinja2_*.cache'))) == count
+
+
+def test_freeze_and_app_startup_share_the_default_cache(monkeypatch):
+    import freeze
+
+    monkeypatch.delenv('TEMPLATE_CACHE_DIR', raising=False)
+    app = _make_app(debug=False)
+    authoring_app = freeze.create_authoring_app()
+
+    directories = {
+        app.jinja_env.bytecode_cache.directory,
+        freeze.app.jinja_env.bytecode_cache.directory,
+        authoring_app.jinja_env.bytecode_cache.directory,
+        templating.template_cache_dir(),
+    }
+    assert directories == {templating.DEFAULT_TEMPLATE_CACHE_DIR}
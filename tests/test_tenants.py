@@ -0,0 +1,123 @@
+import importlib
+
+import pytest
+
+import tenants
+from blog.store import _stores
+
+
+def _site(root, name, posts):
+    (root / 'posts').mkdir(parents=True)
+    (root / 'site.toml').write_text(f'[site]\nname = "{name}"\n')
+    for slug, title in posts:
+        (root / 'posts' / f'{slug}.md').write_text(
+            f'---\ntitle: {title}\nslug: {slug}\ndate: 2024-01-01\n---\n\nBody.\n'
+        )
+
+
+@pytest.fixture
+def tenants_file(tmp_path):
+    _site(tmp_path / 'sites' / 'alice', 'Alice Writes', [('a1', 'Alice One')])
+    _site(tmp_path / 'sites' / 'bob', 'Bob Builds', [('b1', 'Bob One')])
+    path = tmp_path / 'tenants.toml'
+    path.write_text(
+        '[defaults]\nmemory_budget_mb = 4\n\n'
+        '[[tenants]]\nname = "alice"\nhosts = ["alice.test"]\n'
+        'root = "sites/alice"\n\n'
+        '[[tenants]]\nname = "bob"\nhosts = ["bob.test", "www.bob.test"]\n'
+        'root = "sites/bob"\nmemory_budget_mb = 1\n'
+    )
+    return path
+
+
+@pytest.fixture
+def tenant_client(tenants_file, tmp_path, monkeypatch):
+    (tmp_path / 'primary').mkdir()
+    monkeypatch.setenv('CONTENT_DIR', str(tmp_path / 'primary'))
+    monkeypatch.setattr(tenants, 'TENANTS_FILE', str(tenants_file))
+    monkeypatch.setattr(tenants, '_registry', None)
+    app_module = importlib.reload(importlib.import_module('app'))
+    app_module.app.config.update(TESTING=True)
+    with app_module.app.test_client() as client:
+        yield client
+
+
+def test_load_tenants_resolves_roots_and_budgets(tenants_file):
+    alice, bob = tenants.load_tenants(tenants_file)
+
+    assert alice.content_dir == tenants_file.parent / 'sites' / 'alice' / 'posts'
+    assert alice.memory_budget == 4 * 2 ** 20
+    assert bob.memory_budget == 2 ** 20
+    assert bob.site()['config']['name'] == 'Bob Builds'
+    # Tables the tenant doesn't override come from the primary site.toml.
+    assert bob.site()['nav_links'] == tenants.SITE_CONTENT['nav_links']
+
+
+def test_requests_are_served_per_host(tenant_client):
+    alice = tenant_client.get('/blog/', base_url='http://alice.test').data
+    bob = tenant_client.get('/blog/b1/', base_url='http://www.bob.test:8000')
+    primary = tenant_client.get('/blog/').data
+
+    assert b'Alice One' in alice and b'Bob One' not in alice
+    assert b'Alice Writes' in alice
+    assert bob.status_code == 200 and b'Bob Builds' in bob.data
+    assert tenant_client.get(
+        '/blog/a1/', base_url='http://bob.test',
+    ).status_code == 404
+    assert b'Alice One' not in primary
+
+
+def test_least_recently_used_tenant_is_evicted(tenants_file):
+    alice, bob = tenants.load_tenants(tenants_file)
+    registry = tenants.TenantRegistry([alice, bob], max_active=1)
+
+    first = registry.store(alice)
+    assert 0 < first.html.max_hot_bytes < 4 * 2 ** 20
+    registry.store(bob)
+
+    assert registry.active() == ['bob']
+    assert registry.evictions == 1
+    assert alice.content_dir.resolve() not in _stores
+    assert registry.store(alice) is not first
+
+
+def test_idle_tenants_are_evicted(tenants_file):
+    alice, bob = tenants.load_tenants(tenants_file)
+    registry = tenants.TenantRegistry([alice, bob], idle_seconds=0)
+
+    registry.store(alice)
+    registry.store(bob)
+
+    assert registry.active() == ['bob']
+
+
+def test_idle_tenants_are_swept_without_a_tenant_request(tenants_file):
+    alice, bob = tenants.load_tenants(tenants_file)
+    registry = tenants.TenantRegistry([alice, bob], idle_seconds=60)
+    now = [1000.0]
+    registry.clock = lambda: now[0]
+
+    registry.store(alice)
+    now[0] += 30
+    registry.store(bob)
+    now[0] += 45
+    registry.sweep()
+    assert registry.active() == ['bob']
+    now[0] += 30
+    registry.sweep()
+    assert registry.active() == []
+    assert registry.evictions == 2
+
+
+def test_tenant_budget_counts_the_cold_tier(tenants_file):
+    alice, _ = tenants.load_tenants(tenants_file)
+    registry = tenants.TenantRegistry([alice])
+
+    store = registry.store(alice)
+    stats = store.html.stats()
+    cold = stats['resident_bytes'] - stats['hot_bytes']
+    assert cold > 0
+    assert store.html.max_hot_bytes == alice.memory_budget - cold
+
+    alice.memory_budget = cold // 2
+    assert registry.store(alice).html.max_hot_bytes == 0
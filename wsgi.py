@@ -0,0 +1,22 @@
+"""Gunicorn entry point: ``gunicorn -c gunicorn.conf.py``.
+
+With ``preload_app`` this module is imported once in the master, so the
+warm-up below runs before workers fork and they inherit its caches.
+"""
+
+import gc
+
+from app import app
+from blog import get_store
+from content.loader import message
+from freeze import collect_routes
+import serving
+
+summary = serving.warm_up(app, collect_routes(get_store()))
+print(message('serving', 'warmed', **summary))
+# Objects built during warm-up live for the life of the process. Moving
+# them out of the collector's generations keeps each worker's collections
+# from touching (and un-sharing) the pages that hold them.
+gc.freeze()
+
+application = app